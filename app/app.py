@@ -6,13 +6,21 @@
 
 
 import os
+import sys
 import folium
 from folium.plugins import HeatMap
 import csv
-import mysql.connector
 import webview
 from datetime import datetime
 
+# Shared connection pool and rollup modules (dbpool.py, rollups.py at the
+# repository root), needed when this file is run as a script
+_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if _ROOT not in sys.path:
+    sys.path.append(_ROOT)
+import dbpool
+import rollups
+
 DATABASE1 = 'team404.sql'
 # Database configuration
 DATABASE = {
@@ -27,8 +35,76 @@ DATABASE = {
 
 
 def get_connection():
-    """Return a new database connection."""
-    return mysql.connector.connect(**DATABASE) 
+    """Return a pooled database connection; close() hands it back."""
+    return dbpool.get_connection(DATABASE, "app")
+
+# GPS fixes and signal strength of one SSID, for its heatmap
+HEATMAP_QUERY = """
+    SELECT gpsLat, gpsLong, strength
+    FROM IngestDB
+    WHERE SSID = %s AND gpsLat IS NOT NULL AND gpsLong IS NOT NULL;
+"""
+
+# Strength of the newest frame of one SSID
+LATEST_SIGNAL_QUERY = """
+    SELECT strength
+    FROM IngestDB
+    WHERE SSID = %s
+    ORDER BY captureTime DESC
+    LIMIT 1;
+"""
+
+# Per-SSID frame counts of the latest project, from the rollup table
+# (setup.sql ProjectSSIDStats), kept current by the writers and
+# rollups.refresh_if_behind()
+SSID_COUNTS_QUERY = """
+    SELECT
+        NULLIF(SSID, '') AS ssid,
+        frames AS ssid_count
+    FROM ProjectSSIDStats
+    WHERE projectID = (
+        SELECT MAX(projectID) FROM ProjectSSIDStats
+    )
+    ORDER BY ssid_count DESC;
+"""
+
+# Project of the most recent frame (one probe of idx_time)
+LATEST_PROJECT_QUERY = """
+    SELECT projectID
+    FROM IngestDB
+    ORDER BY captureTime DESC
+    LIMIT 1;
+"""
+
+# Per-MAC summary of one SSID in one project, in a single pass over
+# idx_project_ssid_mac_time: the window functions number each MAC's rows
+# newest first and carry the per-MAC aggregates, and the outer query keeps
+# the newest row. Aggregated beacon rows (scan.py --beacon-window) count as
+# frameCount frames, as in the rollup tables.
+WIFI_CLICK_QUERY = """
+    SELECT
+        srcMac AS MAC,
+        strength AS mostRecentStrength,
+        ROUND(strengthSum / NULLIF(strengthN, 0), 2) AS AvgStrength,
+        frames AS count,
+        TIMESTAMPDIFF(SECOND, lastCapture, NOW()) AS lastSeen,
+        encType,
+        authMode
+    FROM (
+        SELECT
+            srcMac, strength, encType, authMode,
+            ROW_NUMBER() OVER (PARTITION BY srcMac ORDER BY captureTime DESC, ID DESC) AS rn,
+            SUM(strength * COALESCE(frameCount, 1)) OVER w AS strengthSum,
+            SUM(IF(strength IS NULL, 0, COALESCE(frameCount, 1))) OVER w AS strengthN,
+            SUM(COALESCE(frameCount, 1)) OVER w AS frames,
+            MAX(COALESCE(lastSeen, captureTime)) OVER w AS lastCapture
+        FROM IngestDB
+        WHERE projectID = %s AND SSID = %s
+        WINDOW w AS (PARTITION BY srcMac)
+    ) latest
+    WHERE rn = 1
+    ORDER BY MAC ASC;
+"""
 
 class HeatmapGenerator:
     def __init__(self, data_file='data.csv'):
@@ -87,12 +163,7 @@ class HeatmapApp:
         conn = get_connection()
         cursor = conn.cursor()
 
-        query = """
-        SELECT gpsLat, gpsLong, strength
-        FROM IngestDB
-        WHERE SSID = %s AND gpsLat IS NOT NULL AND gpsLong IS NOT NULL;
-        """
-        cursor.execute(query, (ssid,))
+        cursor.execute(HEATMAP_QUERY, (ssid,))
         rows = cursor.fetchall()
         conn.close()
 
@@ -132,14 +203,7 @@ class HeatmapApp:
         conn = get_connection()
         cursor = conn.cursor()
 
-        query = """
-        SELECT strength
-        FROM IngestDB
-        WHERE SSID = %s
-        ORDER BY captureTime DESC
-        LIMIT 1;
-        """
-        cursor.execute(query, (ssid,))
+        cursor.execute(LATEST_SIGNAL_QUERY, (ssid,))
         result = cursor.fetchone()
         conn.close()
 
@@ -172,43 +236,12 @@ class HeatmapApp:
         """Return full analytics data for selected SSID from SQL database."""
         conn = get_connection()
         cursor = conn.cursor()
-        query = f"""SELECT 
-            srcMac AS MAC,
-            (SELECT strength 
-            FROM IngestDB i2 
-            WHERE i2.srcMac = i1.srcMac 
-            AND i2.SSID = i1.SSID 
-            AND i2.projectID = i1.projectID
-            ORDER BY captureTime DESC 
-            LIMIT 1) AS mostRecentStrength,
-            ROUND(AVG(strength), 2) AS AvgStrength,
-            COUNT(*) AS count,
-            TIMESTAMPDIFF(SECOND, MAX(captureTime), NOW()) AS lastSeen,
-            (SELECT encType 
-            FROM IngestDB i2 
-            WHERE i2.srcMac = i1.srcMac 
-            AND i2.SSID = i1.SSID 
-            AND i2.projectID = i1.projectID
-            ORDER BY captureTime DESC 
-            LIMIT 1) AS encType,
-            (SELECT authMode 
-            FROM IngestDB i2 
-            WHERE i2.srcMac = i1.srcMac 
-            AND i2.SSID = i1.SSID 
-            AND i2.projectID = i1.projectID
-            ORDER BY captureTime DESC 
-            LIMIT 1) AS authMode
-        FROM IngestDB i1
-        WHERE SSID = '{ssid}'
-        AND projectID = (SELECT projectID 
-                        FROM IngestDB 
-                        ORDER BY captureTime DESC 
-                        LIMIT 1)
-        GROUP BY srcMac
-        ORDER BY MAC ASC;"""
-        
-        cursor.execute(query)
-        rows = cursor.fetchall()
+        cursor.execute(LATEST_PROJECT_QUERY)
+        latest = cursor.fetchone()
+        rows = []
+        if latest:
+            cursor.execute(WIFI_CLICK_QUERY, (latest[0], ssid))
+            rows = cursor.fetchall()
         conn.close()
         
         column_names = [
@@ -235,19 +268,8 @@ class HeatmapApp:
         conn = get_connection()
         cursor = conn.cursor()
 
-        # Modify the query to match your table structure
-        query = """
-            SELECT 
-                ssid,
-                COUNT(*) AS ssid_count
-            FROM IngestDB
-            WHERE projectID = (
-                SELECT MAX(projectID) FROM IngestDB
-            )
-            GROUP BY ssid
-            ORDER BY ssid_count DESC;
-        """
-        cursor.execute(query)
+        rollups.refresh_if_behind(cursor, DATABASE, "app")
+        cursor.execute(SSID_COUNTS_QUERY)
         wifi_data = cursor.fetchall()
         print(wifi_data)
 
@@ -266,19 +288,8 @@ class HeatmapApp:
         conn = get_connection()
         cursor = conn.cursor()
 
-        # Modify the query to match your table structure
-        query = """
-            SELECT 
-                ssid,
-                COUNT(*) AS ssid_count
-            FROM IngestDB
-            WHERE projectID = (
-                SELECT MAX(projectID) FROM IngestDB
-            )
-            GROUP BY ssid
-            ORDER BY ssid_count DESC;
-        """
-        cursor.execute(query)
+        rollups.refresh_if_behind(cursor, DATABASE, "app")
+        cursor.execute(SSID_COUNTS_QUERY)
         wifi_data = cursor.fetchall()
         print(wifi_data)
 
@@ -299,6 +310,10 @@ class HeatmapApp:
         """Returns WiFi data to the frontend."""
         return self.read_wifi_data()
 
+    def get_pool_stats(self):
+        """Connection pool checkouts and wait times, for the frontend."""
+        return dbpool.stats("app")
+
 def main():
     # Run HeatmapApp on startup
     app = HeatmapApp()
@@ -0,0 +1,200 @@
+#!/etc/.venv/python3
+"""
+Benchmark app.py HeatmapApp.on_wifi_click: the old per-MAC correlated
+subqueries against the single-pass window-function query.
+
+Creates a synthetic project (10M IngestDB rows by default, spread over
+--ssids SSIDs and --macs MACs, generated server-side with MariaDB's
+sequence engine), makes it the latest project, times both queries for the
+busiest SSID and checks they agree on each MAC's latest row. The project is dropped afterwards unless --keep is given.
+
+The old query rescans each MAC's rows three times, so on 10M rows it can
+take minutes; --old-timeout caps it (max_statement_time).
+
+    python3 bench_wifi_click.py
+    python3 bench_wifi_click.py --rows 1000000 --repeat 5 --keep
+"""
+
+import argparse
+import sys
+import time
+
+import mysql.connector
+from mysql.connector import Error
+
+import retention
+from app.app import LATEST_PROJECT_QUERY, WIFI_CLICK_QUERY
+
+# Database configuration
+DB_CONFIG = {
+    'host': 'localhost',
+    'user': 'team404user',
+    'password': 'pass',
+    'database': 'team404'
+}
+
+# on_wifi_click before the rewrite, kept for comparison
+OLD_QUERY = """
+    SELECT
+        srcMac AS MAC,
+        (SELECT strength FROM IngestDB i2
+         WHERE i2.srcMac = i1.srcMac AND i2.SSID = i1.SSID AND i2.projectID = i1.projectID
+         ORDER BY captureTime DESC LIMIT 1) AS mostRecentStrength,
+        ROUND(AVG(strength), 2) AS AvgStrength,
+        COUNT(*) AS count,
+        TIMESTAMPDIFF(SECOND, MAX(captureTime), NOW()) AS lastSeen,
+        (SELECT encType FROM IngestDB i2
+         WHERE i2.srcMac = i1.srcMac AND i2.SSID = i1.SSID AND i2.projectID = i1.projectID
+         ORDER BY captureTime DESC LIMIT 1) AS encType,
+        (SELECT authMode FROM IngestDB i2
+         WHERE i2.srcMac = i1.srcMac AND i2.SSID = i1.SSID AND i2.projectID = i1.projectID
+         ORDER BY captureTime DESC LIMIT 1) AS authMode
+    FROM IngestDB i1
+    WHERE SSID = %s
+    AND projectID = (SELECT projectID FROM IngestDB ORDER BY captureTime DESC LIMIT 1)
+    GROUP BY srcMac
+    ORDER BY MAC ASC
+"""
+
+INSERT_CHUNK = 1000000
+
+
+def create_synthetic_project(conn, cur, rows, ssids, macs):
+    """New ProjectDB row plus `rows` IngestDB rows ending now; returns the ID."""
+    cur.execute("INSERT INTO ProjectDB (startTime, projectType) "
+                "VALUES (NOW() - INTERVAL 1 DAY, 'sniff_external')")
+    pid = cur.lastrowid
+    cur.callproc("EnsureProjectPartition", (pid,))
+    conn.commit()
+
+    # One frame every 5 ms, the last one now. Row n belongs to MAC n % macs,
+    # which always beacons the same SSID, so every SSID has macs / ssids MACs.
+    # Every 97th row is a collapsed beacon window (frameCount 10).
+    for lo in range(0, rows, INSERT_CHUNK):
+        hi = min(rows, lo + INSERT_CHUNK)
+        cur.execute(f"""
+            INSERT INTO IngestDB (projectID, captureTime, srcMac, dstMac, SSID, encType, authMode,
+                                  strength, contentLength, typeExternal, sniffType, channel, frameCount)
+            SELECT %s,
+                   NOW() - INTERVAL ((%s - seq) * 5000) MICROSECOND,
+                   CONCAT('02:00:', INSERT(INSERT(INSERT(LPAD(HEX(seq MOD %s), 8, '0'), 7, 0, ':'), 5, 0, ':'), 3, 0, ':')),
+                   'ff:ff:ff:ff:ff:ff',
+                   CONCAT('bench-', (seq MOD %s) MOD %s),
+                   ELT(1 + (seq MOD 4), 'Public', 'WPA', 'WPA2', 'WPA3'),
+                   IF(seq MOD 3 = 0, 'Enterprise', 'PSK'),
+                   -30 - (seq * 7919) MOD 65,
+                   100 + seq MOD 1400,
+                   'Beacon',
+                   'external',
+                   1 + (seq MOD %s) MOD 11,
+                   IF(seq MOD 97 = 0, 10, NULL)
+            FROM seq_{lo}_to_{hi - 1}
+        """, (pid, rows, macs, macs, ssids, macs))
+        conn.commit()
+        print(f"[*] Inserted {hi:,}/{rows:,} rows", end="\r", flush=True)
+    print()
+    cur.execute("ANALYZE TABLE IngestDB")
+    cur.fetchall()
+    return pid
+
+
+def time_query(cur, sql, params, repeat):
+    """Best wall time (s) over repeat runs, and the rows of the last run."""
+    best, rows = None, None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        cur.execute(sql, params)
+        rows = cur.fetchall()
+        dt = time.perf_counter() - t0
+        best = dt if best is None else min(best, dt)
+    return best, rows
+
+
+def time_new(cur, ssid, repeat):
+    """Both statements on_wifi_click now runs."""
+    best, rows = None, None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        cur.execute(LATEST_PROJECT_QUERY)
+        pid = cur.fetchone()[0]
+        cur.execute(WIFI_CLICK_QUERY, (pid, ssid))
+        rows = cur.fetchall()
+        dt = time.perf_counter() - t0
+        best = dt if best is None else min(best, dt)
+    return best, rows
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compare the old and new on_wifi_click queries on a synthetic project."
+    )
+    parser.add_argument("--host", default=DB_CONFIG["host"], help="MySQL host (default: localhost)")
+    parser.add_argument("--user", default=DB_CONFIG["user"], help="MySQL user (default: team404user)")
+    parser.add_argument("--password", default=DB_CONFIG["password"], help="MySQL password")
+    parser.add_argument("--database", default=DB_CONFIG["database"], help="database (default: team404)")
+    parser.add_argument("--rows", type=int, default=10000000, help="synthetic rows (default: 10M)")
+    parser.add_argument("--ssids", type=int, default=50, help="distinct SSIDs (default: 50)")
+    parser.add_argument("--macs", type=int, default=5000, help="distinct source MACs (default: 5000)")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per query, best is reported (default: 3)")
+    parser.add_argument("--old-timeout", type=float, default=600,
+                        help="give up on the old query after this many seconds (default: 600)")
+    parser.add_argument("--project", type=int, help="reuse a project kept by an earlier --keep run")
+    parser.add_argument("--keep", action="store_true", help="keep the synthetic project afterwards")
+    args = parser.parse_args()
+
+    try:
+        conn = mysql.connector.connect(host=args.host, user=args.user,
+                                       password=args.password, database=args.database)
+    except Error as e:
+        print(f"[!] Database connection error: {e}", file=sys.stderr)
+        sys.exit(2)
+    cur = conn.cursor()
+
+    pid = args.project
+    try:
+        if pid is None:
+            print(f"[*] Creating a {args.rows:,}-row project ({args.ssids} SSIDs, {args.macs} MACs)")
+            t0 = time.perf_counter()
+            pid = create_synthetic_project(conn, cur, args.rows, args.ssids, args.macs)
+            print(f"[+] Project {pid} ready in {time.perf_counter() - t0:.1f}s")
+
+        cur.execute("SELECT SSID, COUNT(*) c FROM IngestDB WHERE projectID = %s "
+                    "GROUP BY SSID ORDER BY c DESC LIMIT 1", (pid,))
+        ssid, ssid_rows = cur.fetchone()
+        print(f"[*] SSID {ssid!r}: {ssid_rows:,} rows")
+
+        new_s, new_rows = time_new(cur, ssid, args.repeat)
+        print(f"[+] new: {new_s * 1000:10.1f} ms  ({len(new_rows)} MACs)")
+
+        cur.execute("SET SESSION max_statement_time = %s", (args.old_timeout,))
+        try:
+            old_s, old_rows = time_query(cur, OLD_QUERY, (ssid,), args.repeat)
+        except Error as e:
+            print(f"[!] old: gave up after {args.old_timeout:.0f}s ({e.msg})")
+            old_s, old_rows = None, None
+        cur.execute("SET SESSION max_statement_time = 0")
+
+        if old_s is not None:
+            print(f"[+] old: {old_s * 1000:10.1f} ms  ({len(old_rows)} MACs)")
+            print(f"[*] speedup: {old_s / new_s:.1f}x")
+            # A MAC's rows are --macs x 5 ms apart, so (with the default 5000
+            # MACs) its newest row has a unique captureTime and both queries
+            # must pick it. Counts differ by design: the new one adds frameCount.
+            old_by_mac = {r[0]: (r[1], r[5], r[6]) for r in old_rows}
+            new_by_mac = {r[0]: (r[1], r[5], r[6]) for r in new_rows}
+            if old_by_mac != new_by_mac:
+                print("[!] old and new queries disagree on the latest row per MAC", file=sys.stderr)
+                sys.exit(1)
+            print("[+] Latest strength/encType/authMode per MAC match")
+    except Error as e:
+        print(f"[!] Database error: {e}", file=sys.stderr)
+        sys.exit(1)
+    finally:
+        if pid is not None and args.project is None and not args.keep:
+            print(f"[*] Dropping project {pid}")
+            retention.retire(conn, cur, pid, "drop", True)
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+"""
+Shared MySQL connection pools for the dashboard (app/app.py), the web UI
+(db_utils_web.py via databaseTemplates.py) and the ingest client
+(client/ingest_client.py).
+
+Each caller keeps its own DB_CONFIG and asks for a connection by pool name:
+
+    conn = dbpool.get_connection(DB_CONFIG, "web")
+    ...
+    conn.close()          # back to the pool, session reset
+
+The pool is created on first use (size connections, opened up front) and
+rebuilt in a forked child. Checkout health-checks the connection (ping)
+and reconnects it if the server dropped it. When every connection is
+checked out, get_connection waits up to timeout seconds for one to come
+back, then raises PoolError. A connection dropped without close() is
+reset and returned to its pool when it is garbage collected.
+
+Environment overrides (defaults in brackets):
+  TEAM404_DB_POOL_SIZE     connections per pool [5], at most 32
+  TEAM404_DB_POOL_TIMEOUT  seconds to wait for a free connection [10]
+
+stats() reports checkouts, waits and wait times per pool; check() runs a
+round trip on a pooled connection.
+"""
+
+import os
+import threading
+import time
+import weakref
+
+from mysql.connector import Error
+from mysql.connector.errors import PoolError
+from mysql.connector.pooling import CNX_POOL_MAXSIZE, MySQLConnectionPool
+
+POOL_SIZE = int(os.getenv("TEAM404_DB_POOL_SIZE", "5"))
+POOL_TIMEOUT = float(os.getenv("TEAM404_DB_POOL_TIMEOUT", "10"))
+RETRY_S = 0.005
+
+_pools = {}
+_lock = threading.Lock()
+
+
+class _Pool:
+    def __init__(self, name, config, size, timeout):
+        self.size = max(1, min(size, CNX_POOL_MAXSIZE))
+        self.timeout = timeout
+        self.pid = os.getpid()
+        self.pool = MySQLConnectionPool(pool_name=f"team404-{name}-{self.pid}",
+                                        pool_size=self.size, pool_reset_session=True,
+                                        **config)
+        self.lock = threading.Lock()
+        self.checkouts = 0
+        self.waits = 0          # checkouts that found the pool empty
+        self.timeouts = 0
+        self.reclaimed = 0      # connections returned by the garbage collector
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def stats(self):
+        with self.lock:
+            return {
+                "size": self.size,
+                "checkouts": self.checkouts,
+                "waits": self.waits,
+                "timeouts": self.timeouts,
+                "reclaimed": self.reclaimed,
+                "wait_ms_total": round(self.wait_total * 1000, 1),
+                "wait_ms_avg": round(self.wait_total * 1000 / self.checkouts, 3) if self.checkouts else 0.0,
+                "wait_ms_max": round(self.wait_max * 1000, 1),
+            }
+
+
+def _get_pool(name, config, size, timeout):
+    p = _pools.get(name)
+    if p is not None and p.pid == os.getpid():
+        return p
+    with _lock:
+        p = _pools.get(name)
+        if p is None or p.pid != os.getpid():
+            # A forked child must not share the parent's sockets
+            p = _Pool(name, config,
+                      POOL_SIZE if size is None else size,
+                      POOL_TIMEOUT if timeout is None else timeout)
+            _pools[name] = p
+        return p
+
+
+def _reclaim(p, state):
+    """Finalizer: hand back a connection that was dropped without close()."""
+    cnx = state.get("_cnx")
+    if cnx is None:
+        return  # closed normally
+    try:
+        cnx.reset_session()
+    except Error:
+        pass  # dead; the next checkout reconnects it
+    try:
+        p.pool.add_connection(cnx)
+    except Error:
+        return
+    with p.lock:
+        p.reclaimed += 1
+
+
+def get_connection(config, name="default", size=None, timeout=None):
+    """
+    Check out a connection from the named pool, creating the pool from
+    config on first use. size and timeout only apply when it is created.
+    """
+    p = _get_pool(name, config, size, timeout)
+    t0 = time.perf_counter()
+    waited = False
+    while True:
+        try:
+            conn = p.pool.get_connection()
+            break
+        except PoolError:
+            waited = True
+            if time.perf_counter() - t0 >= p.timeout:
+                with p.lock:
+                    p.timeouts += 1
+                raise PoolError(f"No free connection in pool '{name}' after {p.timeout:.1f}s "
+                                f"({p.size} connections)")
+            time.sleep(RETRY_S)
+    wait = time.perf_counter() - t0
+    with p.lock:
+        p.checkouts += 1
+        if waited:
+            p.waits += 1
+        p.wait_total += wait
+        p.wait_max = max(p.wait_max, wait)
+    weakref.finalize(conn, _reclaim, p, conn.__dict__)
+    return conn
+
+
+def stats(name=None):
+    """Counters of one pool, or {name: counters} of every pool in this process."""
+    if name is not None:
+        p = _pools.get(name)
+        return p.stats() if p is not None else None
+    return {n: p.stats() for n, p in list(_pools.items())}
+
+
+def check(config, name="default"):
+    """Round-trip time (ms) of SELECT 1 on a pooled connection; raises on failure."""
+    conn = get_connection(config, name)
+    try:
+        t0 = time.perf_counter()
+        cur = conn.cursor()
+        cur.execute("SELECT 1")
+        cur.fetchall()
+        cur.close()
+        return round((time.perf_counter() - t0) * 1000, 2)
+    finally:
+        conn.close()
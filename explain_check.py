@@ -0,0 +1,146 @@
+#!/etc/.venv/python3
+"""
+Check that the IngestDB (and rollup table) queries shipped with the
+dashboard, web UI and report generator are served by an index (setup.sql,
+schema version 2+).
+
+Runs EXPLAIN on each query with parameters taken from the database itself
+(the latest project and its busiest SSID/MAC) and fails if any step reads
+IngestDB with a full table scan or without a key, or if a query for one
+project is not pruned to a single IngestDB partition (schema version 3+). Run it against a
+populated database: on a near-empty table the optimizer may prefer a scan.
+
+    python3 explain_check.py
+    python3 explain_check.py --host 10.0.0.5 --user team404user --password pass
+"""
+
+import argparse
+import os
+import sys
+
+import mysql.connector
+from mysql.connector import Error
+
+from app.app import (HEATMAP_QUERY, LATEST_PROJECT_QUERY, LATEST_SIGNAL_QUERY,
+                     SSID_COUNTS_QUERY as APP_SSID_COUNTS_QUERY, WIFI_CLICK_QUERY)
+
+_WEBUI = os.path.join(os.path.dirname(os.path.abspath(__file__)), "webUI")
+sys.path.append(os.path.join(_WEBUI, "wifi-intel-main"))
+sys.path.append(os.path.join(_WEBUI, "Integrated-Web-UI-main", "web"))
+from client.ingest_client import INGESTS_BY_MAC_QUERY, INGESTS_BY_PROJECT_QUERY
+from db_utils_web import (MACS_BY_SSID_QUERY, PROJECTS_QUERY, SSIDS_QUERY,
+                          SSID_COUNTS_QUERY as WEB_SSID_COUNTS_QUERY)
+from report.db_adapter import INGEST_ANALYSIS_QUERY
+
+# Database configuration
+DB_CONFIG = {
+    'host': 'localhost',
+    'user': 'team404user',
+    'password': 'pass',
+    'database': 'team404'
+}
+
+# (where it is used, SQL, parameter names); the SQL is imported from the callers
+QUERIES = [
+    ("app.py generate_heatmap_for_ssid", HEATMAP_QUERY, ("ssid",)),
+    ("app.py get_latest_signal", LATEST_SIGNAL_QUERY, ("ssid",)),
+    ("app.py on_wifi_click (latest project)", LATEST_PROJECT_QUERY, ()),
+    ("app.py on_wifi_click", WIFI_CLICK_QUERY, ("pid", "ssid")),
+    ("app.py read_wifi_data", APP_SSID_COUNTS_QUERY, ()),
+    ("db_utils_web.py get_projects", PROJECTS_QUERY, ()),
+    ("db_utils_web.py get_ssids", SSIDS_QUERY, ("pid",)),
+    ("db_utils_web.py get_ssid_counts", WEB_SSID_COUNTS_QUERY, ("pid",)),
+    ("db_utils_web.py get_macs_by_ssid", MACS_BY_SSID_QUERY, ("pid", "ssid")),
+    ("db_adapter.py fetch_ingest_as_analysis_df", INGEST_ANALYSIS_QUERY, ("pid",)),
+    ("ingest_client.py get_ingests_by_project", INGESTS_BY_PROJECT_QUERY, ("pid",)),
+    ("ingest_client.py get_ingests_by_mac", INGESTS_BY_MAC_QUERY, ("mac", "mac")),
+]
+
+
+def sample_params(cur):
+    """Realistic parameter values: latest project, its busiest SSID and MAC."""
+    cur.execute("SELECT MAX(projectID) FROM IngestDB")
+    pid = cur.fetchone()[0]
+    cur.execute("SELECT SSID, COUNT(*) c FROM IngestDB WHERE projectID = %s "
+                "GROUP BY SSID ORDER BY c DESC LIMIT 1", (pid,))
+    row = cur.fetchone()
+    ssid = row[0] if row else ""
+    cur.execute("SELECT srcMac FROM IngestDB WHERE projectID = %s AND SSID = %s LIMIT 1", (pid, ssid))
+    row = cur.fetchone()
+    mac = row[0] if row else ""
+    return {"pid": pid, "ssid": ssid, "mac": mac}
+
+
+def explain(cur, sql, params):
+    """EXPLAIN rows as dicts, with the partitions column where the server has it."""
+    try:
+        cur.execute("EXPLAIN PARTITIONS " + sql, params)  # MariaDB
+    except Error:
+        cur.execute("EXPLAIN " + sql, params)  # MySQL 8 always shows partitions
+    cols = [d[0] for d in cur.description]
+    return [dict(zip(cols, row)) for row in cur.fetchall()]
+
+
+def check(cur, name, sql, params, per_project=False):
+    """
+    EXPLAIN one query. Returns a list of problems (empty = uses indexes,
+    and for a per-project query, a single partition).
+    """
+    problems = []
+    for r in explain(cur, sql, params):
+        if r.get("table") not in ("IngestDB", "i", "i1", "i2", "ProjectSSIDStats", "ProjectMacStats"):
+            continue
+        if r.get("type") == "ALL" or not r.get("key"):
+            problems.append(f"{r.get('table')}: type={r.get('type')} key={r.get('key')} "
+                            f"rows={r.get('rows')} {r.get('Extra') or ''}".rstrip())
+        parts = r.get("partitions")
+        if per_project and parts and "," in parts:
+            problems.append(f"{r.get('table')}: not pruned, partitions={parts}")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="EXPLAIN the shipped IngestDB queries and fail on full table scans."
+    )
+    parser.add_argument("--host", default=DB_CONFIG["host"], help="MySQL host (default: localhost)")
+    parser.add_argument("--user", default=DB_CONFIG["user"], help="MySQL user (default: team404user)")
+    parser.add_argument("--password", default=DB_CONFIG["password"], help="MySQL password")
+    parser.add_argument("--database", default=DB_CONFIG["database"], help="database (default: team404)")
+    args = parser.parse_args()
+
+    try:
+        conn = mysql.connector.connect(host=args.host, user=args.user,
+                                       password=args.password, database=args.database)
+    except Error as e:
+        print(f"[!] Database connection error: {e}", file=sys.stderr)
+        sys.exit(2)
+
+    cur = conn.cursor()
+    cur.execute("SELECT MAX(version) FROM SchemaVersion")
+    print(f"[*] Schema version {cur.fetchone()[0]}")
+    cur.execute("SELECT COUNT(*) FROM IngestDB")
+    total = cur.fetchone()[0]
+    if total < 10000:
+        print(f"[!] IngestDB has only {total} rows; plans on small tables may not reflect production",
+              file=sys.stderr)
+    values = sample_params(cur)
+
+    failed = 0
+    for name, sql, names in QUERIES:
+        problems = check(cur, name, sql, tuple(values[n] for n in names), "pid" in names)
+        if problems:
+            failed += 1
+            print(f"[!] {name}")
+            for p in problems:
+                print(f"      {p}")
+        else:
+            print(f"[+] {name}")
+    conn.close()
+
+    print(f"[*] {len(QUERIES) - failed}/{len(QUERIES)} queries use an index")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,202 @@
+#!/etc/.venv/python3
+"""
+Drop or archive whole projects from IngestDB, one partition at a time
+(setup.sql schema version 3+: IngestDB is partitioned by projectID).
+
+Dropping a partition is a metadata operation: no row-by-row DELETE, no long
+lock on IngestDB. Archiving swaps the partition out into its own table
+(IngestArchive_<projectID>) with EXCHANGE PARTITION, so the rows can be
+dumped or kept without slowing down IngestDB. Both remove the project's
+rollup rows (ProjectSSIDStats / ProjectMacStats); drop also removes its
+ProjectDB row.
+
+Without --yes only the plan is printed.
+
+    python3 retention.py --list
+    python3 retention.py --older-than 90 --mode archive --yes
+    python3 retention.py --project 12 --mode drop --yes
+    python3 retention.py --split --yes     # give projects stuck in pmax their own partitions
+"""
+
+import argparse
+import sys
+from datetime import datetime, timedelta
+
+import mysql.connector
+from mysql.connector import Error
+
+# Database configuration
+DB_CONFIG = {
+    'host': 'localhost',
+    'user': 'team404user',
+    'password': 'pass',
+    'database': 'team404'
+}
+
+MODES = ("drop", "archive")
+
+
+def partitions(cur):
+    """[(name, upper bound or None for pmax, approx rows)] in boundary order."""
+    cur.execute("""
+        SELECT PARTITION_NAME, PARTITION_DESCRIPTION, TABLE_ROWS
+        FROM information_schema.PARTITIONS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'IngestDB'
+        AND PARTITION_NAME IS NOT NULL
+        ORDER BY PARTITION_ORDINAL_POSITION
+    """)
+    return [(name, None if desc == "MAXVALUE" else int(desc), rows)
+            for name, desc, rows in cur.fetchall()]
+
+
+def partition_of(parts, project_id):
+    """(name, lower, upper) of the partition holding project_id."""
+    lower = None
+    for name, upper, _rows in parts:
+        if upper is None or project_id < upper:
+            return name, lower, upper
+        lower = upper
+    return None, None, None
+
+
+def projects_in(cur, name):
+    cur.execute(f"SELECT DISTINCT projectID FROM IngestDB PARTITION ({name})")
+    return sorted(r[0] for r in cur.fetchall())
+
+
+def archive_table(cur, project_id):
+    """Name of the project's archive table and whether it already exists."""
+    name = f"IngestArchive_{int(project_id)}"
+    cur.execute("SELECT 1 FROM information_schema.TABLES "
+                "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s", (name,))
+    return name, cur.fetchone() is not None
+
+
+def create_archive_table(cur, name):
+    cur.execute(f"CREATE TABLE {name} LIKE IngestDB")
+    cur.execute(f"ALTER TABLE {name} REMOVE PARTITIONING")
+
+
+def list_partitions(cur):
+    cur.execute("SELECT ID, startTime, stopTime, projectType FROM ProjectDB")
+    projects = {r[0]: r[1:] for r in cur.fetchall()}
+    lower = None
+    for name, upper, rows in partitions(cur):
+        span = f"[{lower if lower is not None else '-inf'}, {upper if upper is not None else '+inf'})"
+        pids = projects_in(cur, name) if rows else []
+        info = ", ".join(
+            f"{pid} ({projects[pid][2]}, {projects[pid][0]} - {projects[pid][1] or 'running'})"
+            if pid in projects else f"{pid} (no ProjectDB row)"
+            for pid in pids) or "-"
+        print(f"{name:>8} {span:>16} ~{rows or 0:>10} rows  projects: {info}")
+        lower = upper
+
+
+def retire(conn, cur, project_id, mode, apply):
+    """Drop or archive one project's rows. Returns True if done (or planned)."""
+    parts = partitions(cur)
+    name, _lower, upper = partition_of(parts, project_id)
+    if name is None:
+        print("[!] IngestDB is not partitioned; run setup.sql first", file=sys.stderr)
+        return False
+    others = [p for p in projects_in(cur, name) if p != project_id]
+    archive, archive_exists = archive_table(cur, project_id)
+    if upper is None or others or (mode == "archive" and archive_exists):
+        # Shared partition (pmax or several projects), or an archive table
+        # from an earlier run that EXCHANGE would overwrite: row by row
+        print(f"[*] Project {project_id}: {mode} by DELETE from partition {name}")
+        if not apply:
+            return True
+        if mode == "archive":
+            if not archive_exists:
+                create_archive_table(cur, archive)
+            cur.execute(f"INSERT INTO {archive} SELECT * FROM IngestDB WHERE projectID = %s",
+                        (project_id,))
+        cur.execute("DELETE FROM IngestDB WHERE projectID = %s", (project_id,))
+    else:
+        print(f"[*] Project {project_id}: {mode} partition {name}")
+        if not apply:
+            return True
+        if mode == "archive":
+            create_archive_table(cur, archive)
+            cur.execute(f"ALTER TABLE IngestDB EXCHANGE PARTITION {name} WITH TABLE {archive}")
+        cur.execute(f"ALTER TABLE IngestDB DROP PARTITION {name}")
+    # Either way the project has no IngestDB rows left, so neither may its rollups
+    cur.execute("DELETE FROM ProjectSSIDStats WHERE projectID = %s", (project_id,))
+    cur.execute("DELETE FROM ProjectMacStats WHERE projectID = %s", (project_id,))
+    if mode == "drop":
+        cur.execute("DELETE FROM ProjectDB WHERE ID = %s", (project_id,))
+    conn.commit()
+    print(f"[+] Project {project_id} {'dropped' if mode == 'drop' else f'archived to {archive}'}")
+    return True
+
+
+def split_pmax(conn, cur, apply):
+    """Give every project still in pmax its own partition, lowest first."""
+    parts = partitions(cur)
+    if not parts or parts[-1][1] is not None:
+        print("[!] IngestDB has no pmax partition; run setup.sql first", file=sys.stderr)
+        return
+    for pid in projects_in(cur, "pmax"):
+        print(f"[*] Project {pid}: split out of pmax")
+        if apply:
+            cur.callproc("EnsureProjectPartition", (pid,))
+            conn.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Drop or archive old projects from IngestDB by whole partitions."
+    )
+    parser.add_argument("--host", default=DB_CONFIG["host"], help="MySQL host (default: localhost)")
+    parser.add_argument("--user", default=DB_CONFIG["user"], help="MySQL user (default: team404user)")
+    parser.add_argument("--password", default=DB_CONFIG["password"], help="MySQL password")
+    parser.add_argument("--database", default=DB_CONFIG["database"], help="database (default: team404)")
+    what = parser.add_mutually_exclusive_group(required=True)
+    what.add_argument("--list", action="store_true", help="show partitions and the projects in them")
+    what.add_argument("--project", type=int, action="append", help="project ID to retire (repeatable)")
+    what.add_argument("--older-than", type=int, metavar="DAYS",
+                      help="retire projects that stopped more than DAYS days ago")
+    what.add_argument("--split", action="store_true",
+                      help="move projects stuck in pmax into their own partitions")
+    parser.add_argument("--mode", choices=MODES, default="archive",
+                        help="drop the rows, or move them to IngestArchive_<ID> (default: archive)")
+    parser.add_argument("--yes", action="store_true", help="apply; without it only the plan is printed")
+    args = parser.parse_args()
+
+    try:
+        conn = mysql.connector.connect(host=args.host, user=args.user,
+                                       password=args.password, database=args.database)
+    except Error as e:
+        print(f"[!] Database connection error: {e}", file=sys.stderr)
+        sys.exit(2)
+    cur = conn.cursor()
+
+    try:
+        if args.list:
+            list_partitions(cur)
+        elif args.split:
+            split_pmax(conn, cur, args.yes)
+        else:
+            if args.project:
+                targets = args.project
+            else:
+                cutoff = datetime.now() - timedelta(days=args.older_than)
+                cur.execute("SELECT ID FROM ProjectDB WHERE stopTime IS NOT NULL AND stopTime < %s "
+                            "ORDER BY ID", (cutoff,))
+                targets = [r[0] for r in cur.fetchall()]
+            if not targets:
+                print("[*] Nothing to retire")
+            for pid in targets:
+                retire(conn, cur, pid, args.mode, args.yes)
+            if targets and not args.yes:
+                print("[*] Dry run; pass --yes to apply")
+    except Error as e:
+        print(f"[!] Database error: {e}", file=sys.stderr)
+        sys.exit(1)
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
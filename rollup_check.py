@@ -0,0 +1,133 @@
+#!/etc/.venv/python3
+"""
+Check the incrementally maintained rollups (ProjectSSIDStats,
+ProjectMacStats; setup.sql schema version 4+) against a rebuild from
+IngestDB.
+
+In one transaction holding the RollupState row (so no refresh runs in
+between) it reads the rollups, calls RollupsFromScratch() to rebuild them
+from every row the refreshes account for, reads them again and rolls back.
+Rows that differ are printed. With --repair the rebuild is committed
+instead.
+
+lastStrength / lastEncType / lastAuthMode depend on the order rows were
+folded in when two rows of a MAC tie on time, so differences there are
+listed but do not fail the check.
+
+    python3 rollup_check.py
+    python3 rollup_check.py --project 12 --show 50
+    python3 rollup_check.py --repair
+"""
+
+import argparse
+import sys
+
+import mysql.connector
+from mysql.connector import Error
+
+# Database configuration
+DB_CONFIG = {
+    'host': 'localhost',
+    'user': 'team404user',
+    'password': 'pass',
+    'database': 'team404'
+}
+
+# table -> key columns (the primary key)
+TABLES = {
+    "ProjectSSIDStats": ("projectID", "SSID"),
+    "ProjectMacStats": ("projectID", "SSID", "srcMac"),
+}
+
+ORDER_DEPENDENT = {"lastStrength", "lastEncType", "lastAuthMode"}
+
+
+def read_table(cur, table, keys, project):
+    """{key tuple: {column: value}} of one rollup table."""
+    where = " WHERE projectID = %s" if project is not None else ""
+    cur.execute(f"SELECT * FROM {table}{where}", (project,) if project is not None else ())
+    cols = [d[0] for d in cur.description]
+    rows = {}
+    for r in cur.fetchall():
+        row = dict(zip(cols, r))
+        rows[tuple(row[k] for k in keys)] = row
+    return rows
+
+
+def compare(incremental, rebuilt):
+    """(missing, extra, differing, order_only) lists of (key, detail)."""
+    missing = [(k, rebuilt[k]) for k in rebuilt.keys() - incremental.keys()]
+    extra = [(k, incremental[k]) for k in incremental.keys() - rebuilt.keys()]
+    differing, order_only = [], []
+    for k in incremental.keys() & rebuilt.keys():
+        diff = {c: (incremental[k][c], rebuilt[k][c])
+                for c in rebuilt[k] if incremental[k][c] != rebuilt[k][c]}
+        if not diff:
+            continue
+        (order_only if diff.keys() <= ORDER_DEPENDENT else differing).append((k, diff))
+    return missing, extra, differing, order_only
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compare the incremental IngestDB rollups with a rebuild from scratch."
+    )
+    parser.add_argument("--host", default=DB_CONFIG["host"], help="MySQL host (default: localhost)")
+    parser.add_argument("--user", default=DB_CONFIG["user"], help="MySQL user (default: team404user)")
+    parser.add_argument("--password", default=DB_CONFIG["password"], help="MySQL password")
+    parser.add_argument("--database", default=DB_CONFIG["database"], help="database (default: team404)")
+    parser.add_argument("--project", type=int, help="only compare this project's rows")
+    parser.add_argument("--show", type=int, default=10, help="differences printed per table (default: 10)")
+    parser.add_argument("--repair", action="store_true", help="commit the rebuilt rollups")
+    args = parser.parse_args()
+
+    try:
+        conn = mysql.connector.connect(host=args.host, user=args.user,
+                                       password=args.password, database=args.database)
+    except Error as e:
+        print(f"[!] Database connection error: {e}", file=sys.stderr)
+        sys.exit(2)
+    cur = conn.cursor()
+
+    failed = False
+    try:
+        conn.start_transaction(isolation_level="READ COMMITTED")
+        cur.execute("SELECT lastID FROM RollupState WHERE name = 'IngestDB' FOR UPDATE")
+        last_id = cur.fetchone()[0]
+        cur.execute("SELECT COUNT(*), COALESCE(SUM(hiID - loID + 1), 0) FROM RollupGaps")
+        gaps, gap_ids = cur.fetchone()
+        print(f"[*] Rollups cover IngestDB IDs <= {last_id}; {gaps} open gaps ({gap_ids} IDs)")
+
+        before = {t: read_table(cur, t, keys, args.project) for t, keys in TABLES.items()}
+        cur.callproc("RollupsFromScratch")
+        after = {t: read_table(cur, t, keys, args.project) for t, keys in TABLES.items()}
+
+        for table in TABLES:
+            missing, extra, differing, order_only = compare(before[table], after[table])
+            bad = len(missing) + len(extra) + len(differing)
+            failed = failed or bad > 0
+            print(f"[{'!' if bad else '+'}] {table}: {len(after[table])} rows, {len(missing)} missing, "
+                  f"{len(extra)} extra, {len(differing)} differ"
+                  + (f", {len(order_only)} differ only in last*" if order_only else ""))
+            for label, items in (("missing", missing), ("extra", extra),
+                                 ("differs", differing), ("last*", order_only)):
+                for key, detail in items[:args.show]:
+                    print(f"      {label} {key}: {detail}")
+
+        if args.repair:
+            conn.commit()
+            print("[+] Rebuilt rollups committed")
+        else:
+            conn.rollback()
+    except Error as e:
+        conn.rollback()
+        print(f"[!] Database error: {e}", file=sys.stderr)
+        sys.exit(2)
+    finally:
+        conn.close()
+
+    sys.exit(1 if failed and not args.repair else 0)
+
+
+if __name__ == "__main__":
+    main()
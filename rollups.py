@@ -0,0 +1,88 @@
+"""
+Read-side catch-up for the rollup tables (setup.sql ProjectSSIDStats /
+ProjectMacStats, maintained by RefreshRollups()).
+
+The bulk writers refresh the rollups after they commit: scan.py's writer
+and spool uploader, and ingest_client's *_many inserts. Rows from the
+single-row inserts (ingest_client.insert_*, databaseTemplates.insert_*)
+are folded in by the readers: the dashboard and the web UI call
+refresh_if_behind() before they read, and when any IngestDB rows are not
+folded in yet (more than TEAM404_ROLLUP_READ_LAG IDs past the high-water
+mark, default 0, or an open RollupGaps range) it starts one
+RefreshRollups() in a background thread on a pooled connection and
+returns at once. The read never waits for it and sees the rollups as they
+are; the next read, at most CHECK_INTERVAL later, sees the new rows.
+
+    rollups.refresh_if_behind(cur, DB_CONFIG, "web")
+"""
+
+import os
+import sys
+import threading
+import time
+
+from mysql.connector import Error
+
+import dbpool
+
+READ_LAG = int(os.getenv("TEAM404_ROLLUP_READ_LAG", "0"))  # < 0: readers never refresh
+CHECK_INTERVAL = 5.0  # seconds between lag probes in one process
+
+# IDs past the high-water mark, plus one per open gap (IDs a refresh saw
+# uncommitted, rescanned by the next one)
+LAG_QUERY = """
+    SELECT (SELECT MAX(ID) FROM IngestDB) - lastID
+           + (SELECT COUNT(*) FROM RollupGaps) AS behind
+    FROM RollupState
+    WHERE name = 'IngestDB'
+"""
+
+_running = threading.Lock()   # held by the background refresh
+_last_check = 0.0
+
+
+def lag(cur):
+    """IngestDB IDs above the rollups' high-water mark plus open gaps (0 if none)."""
+    cur.execute(LAG_QUERY)
+    row = cur.fetchone()
+    if not row:
+        return 0
+    behind = row["behind"] if isinstance(row, dict) else row[0]  # dictionary cursors too
+    return int(behind or 0)
+
+
+def _refresh(config, name):
+    try:
+        conn = dbpool.get_connection(config, name)
+        try:
+            cur = conn.cursor()
+            cur.callproc("RefreshRollups")
+            cur.close()
+        finally:
+            conn.close()
+    except Error as e:
+        print(f"[!] Background rollup refresh failed: {e}", file=sys.stderr)
+    finally:
+        _running.release()
+
+
+def refresh_if_behind(cur, config, name):
+    """
+    Probe the rollup lag with cur (at most every CHECK_INTERVAL seconds) and
+    start a background refresh if it is over READ_LAG. Returns True if one
+    was started. Never blocks on RefreshRollups().
+    """
+    global _last_check
+    now = time.monotonic()
+    if READ_LAG < 0 or now - _last_check < CHECK_INTERVAL or _running.locked():
+        return False
+    _last_check = now
+    try:
+        behind = lag(cur)
+    except Error:
+        return False  # no rollup tables yet (schema < 4): nothing to catch up
+    if behind <= READ_LAG or not _running.acquire(blocking=False):
+        return False
+    threading.Thread(target=_refresh, args=(config, name), daemon=True,
+                     name="rollup-refresh").start()
+    return True
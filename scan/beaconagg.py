@@ -0,0 +1,91 @@
+"""
+Beacon aggregation for scan.py (--beacon-window SECONDS).
+
+An AP beaconing at ~10 Hz writes ~36,000 near-identical IngestDB rows an
+hour. With aggregation on, beacons are grouped per (BSSID, SSID, channel)
+into windows of `window` seconds of capture time, and each window becomes
+one IngestDB row:
+
+  captureTime  first beacon in the window    lastSeen  last beacon
+  strength     average RSSI                  rssiMin / rssiMax
+  frameCount   beacons collapsed into it     gpsLat/gpsLong, encType,
+                                              authMode  from the last beacon
+
+Frame-level rows leave frameCount NULL (one frame each). Windows are closed
+by capture time, not wall-clock time, so a --pcap replay aggregates the same
+way as a live capture. Not thread-safe: use one aggregator per parsing thread.
+"""
+
+from datetime import datetime
+
+# Entry tuple positions (see scan.make_printer / INSERT_QUERY)
+CAPTURE_TIME, GPS_LAT, GPS_LON, STRENGTH = 1, 7, 8, 9
+SRC_MAC, SSID, CHANNEL = 2, 4, 18
+FRAME_COUNT, RSSI_MIN, RSSI_MAX, LAST_SEEN = 19, 20, 21, 22
+
+
+def _fmt(t):
+    return datetime.fromtimestamp(t).strftime("%Y-%m-%d %H:%M:%S")
+
+
+class BeaconAggregator:
+    def __init__(self, window, emit):
+        self.window = window
+        self.emit = emit
+        self._open = {}  # key -> [first_t, last_t, first_entry, last_entry, n, rssi_n, rssi_sum, min, max]
+        self._clock = 0.0
+        self._next_check = 0.0
+        self.beacons = 0
+        self.rows = 0
+
+    def add(self, entry, t):
+        """Fold one beacon entry, captured at epoch time t, into its window."""
+        self.beacons += 1
+        key = (entry[SRC_MAC], entry[SSID], entry[CHANNEL])
+        w = self._open.get(key)
+        if w is not None and t >= w[0] + self.window:
+            self._close(key, w)
+            w = None
+        rssi = entry[STRENGTH]
+        if w is None:
+            self._open[key] = [t, t, entry, entry, 1,
+                               0 if rssi is None else 1, rssi or 0, rssi, rssi]
+        else:
+            w[1] = max(w[1], t)
+            w[3] = entry
+            w[4] += 1
+            if rssi is not None:
+                w[5] += 1
+                w[6] += rssi
+                w[7] = rssi if w[7] is None else min(w[7], rssi)
+                w[8] = rssi if w[8] is None else max(w[8], rssi)
+
+        if t > self._clock:
+            self._clock = t
+        if self._clock >= self._next_check:
+            self.flush_due()
+            self._next_check = self._clock + 1.0
+
+    def flush_due(self):
+        """Emit windows that have ended, by the latest capture time seen."""
+        for key, w in list(self._open.items()):
+            if self._clock >= w[0] + self.window:
+                self._close(key, w)
+
+    def flush_all(self):
+        """Emit every open window (at shutdown)."""
+        for key, w in list(self._open.items()):
+            self._close(key, w)
+
+    def _close(self, key, w):
+        del self._open[key]
+        first_t, last_t, first, last, n, rssi_n, rssi_sum, rssi_min, rssi_max = w
+        row = list(last)
+        row[CAPTURE_TIME] = first[CAPTURE_TIME]
+        row[STRENGTH] = round(rssi_sum / rssi_n) if rssi_n else None
+        row[FRAME_COUNT] = n
+        row[RSSI_MIN] = rssi_min
+        row[RSSI_MAX] = rssi_max
+        row[LAST_SEEN] = _fmt(last_t)
+        self.rows += 1
+        self.emit(tuple(row))
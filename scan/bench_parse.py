@@ -0,0 +1,116 @@
+#!/etc/.venv/python3
+"""
+Microbenchmark: Scapy dissection vs the raw dot11raw parser.
+
+Both engines are fed the same RadioTap frames (a synthetic mix by default,
+or the frames of a pcap with --pcap) and must return identical fields.
+Prints frames/sec for each engine.
+
+    python3 bench_parse.py
+    python3 bench_parse.py --pcap capture.pcap --repeat 3
+"""
+
+import argparse
+import random
+import time
+
+from scapy.all import (RadioTap, Dot11, Dot11Beacon, Dot11ProbeReq, Dot11ProbeResp,
+                       Dot11Elt, Dot11QoS, LLC, SNAP, IP, TCP, UDP, RawPcapReader)
+
+import dot11raw
+from scan import dot11_fields
+
+RSN_PSK = bytes.fromhex("0100000fac040100000fac040100000fac020000")
+RSN_SAE = bytes.fromhex("0100000fac040100000fac040100000fac080000")
+WPA_PSK = bytes.fromhex("0050f20101000050f20201000050f20201000050f202")
+
+
+def synthetic_frames(n, seed=404):
+    """Build a beacon/probe/data/control mix roughly like a busy channel."""
+    rnd = random.Random(seed)
+
+    def mac():
+        return ":".join(f"{rnd.randrange(256):02x}" for _ in range(6))
+
+    aps = [(mac(), f"AP-{i}", rnd.choice([RSN_PSK, RSN_SAE, WPA_PSK, None])) for i in range(20)]
+    stas = [mac() for _ in range(50)]
+    frames = []
+    for _ in range(n):
+        rt = RadioTap(present="Flags+Rate+Channel+dBm_AntSignal", Flags=0, Rate=2,
+                      ChannelFrequency=2437, ChannelFlags=0xa0,
+                      dBm_AntSignal=rnd.randint(-95, -30))
+        bssid, ssid, sec = rnd.choice(aps)
+        kind = rnd.random()
+        if kind < 0.45:
+            cap = "ESS+privacy" if sec else "ESS"
+            pkt = rt / Dot11(type=0, subtype=8, addr1="ff:ff:ff:ff:ff:ff", addr2=bssid, addr3=bssid) \
+                / Dot11Beacon(cap=cap) / Dot11Elt(ID=0, info=ssid.encode()) \
+                / Dot11Elt(ID=1, info=b"\x82\x84\x8b\x96")
+            if sec:
+                pkt = pkt / Dot11Elt(ID=48 if sec is not WPA_PSK else 221, info=sec)
+        elif kind < 0.55:
+            pkt = rt / Dot11(type=0, subtype=4, addr1="ff:ff:ff:ff:ff:ff", addr2=rnd.choice(stas),
+                             addr3="ff:ff:ff:ff:ff:ff") / Dot11ProbeReq() / Dot11Elt(ID=0, info=b"")
+        elif kind < 0.65:
+            pkt = rt / Dot11(type=0, subtype=5, addr1=rnd.choice(stas), addr2=bssid, addr3=bssid) \
+                / Dot11ProbeResp(cap="ESS+privacy") / Dot11Elt(ID=0, info=ssid.encode()) \
+                / Dot11Elt(ID=48, info=RSN_PSK)
+        elif kind < 0.85:
+            l4 = TCP(sport=rnd.randrange(1024, 65535), dport=443) if rnd.random() < 0.7 \
+                else UDP(sport=5353, dport=5353)
+            pkt = rt / Dot11(type=2, subtype=8, FCfield=0x01, addr1=bssid, addr2=rnd.choice(stas),
+                             addr3=bssid) / Dot11QoS() / LLC() / SNAP() \
+                / IP(src=f"10.0.0.{rnd.randrange(1, 254)}", dst="142.250.1.1") / l4 / (b"x" * rnd.randrange(200))
+        elif kind < 0.95:
+            pkt = rt / Dot11(type=2, subtype=8, FCfield=0x42, addr1=rnd.choice(stas),
+                             addr2=bssid, addr3=bssid) / Dot11QoS() / (b"\x00" * rnd.randrange(50, 1400))
+        else:
+            pkt = rt / Dot11(type=1, subtype=rnd.choice([11, 12, 13]), addr1=rnd.choice(stas), addr2=bssid)
+        frames.append(bytes(pkt))
+    return frames
+
+
+def pcap_frames(path):
+    return [bytes(data) for data, _meta in RawPcapReader(path)]
+
+
+def run(name, fn, frames, repeat):
+    best = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        for f in frames:
+            fn(f)
+        dt = time.perf_counter() - t0
+        best = dt if best is None else min(best, dt)
+    rate = len(frames) / best if best else float("inf")
+    print(f"{name:<6} {len(frames):>8} frames  {best:8.3f} s  {rate:>12,.0f} frames/s")
+    return rate
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Compare Scapy and raw 802.11 parsing throughput.")
+    ap.add_argument("--pcap", help="RadioTap pcap to use instead of synthetic frames")
+    ap.add_argument("-n", "--frames", type=int, default=20000, help="synthetic frame count (default: 20000)")
+    ap.add_argument("--repeat", type=int, default=3, help="runs per engine, best is reported (default: 3)")
+    args = ap.parse_args()
+
+    frames = pcap_frames(args.pcap) if args.pcap else synthetic_frames(args.frames)
+
+    # Same output from both engines, or the comparison is meaningless
+    mismatches = 0
+    for f in frames:
+        a = dot11_fields(RadioTap(f))
+        b = dot11raw.parse_frame(f)
+        if a != b:
+            mismatches += 1
+            if mismatches <= 5:
+                print("mismatch:\n  scapy", a, "\n  raw  ", b)
+    print(f"[*] {len(frames)} frames, {mismatches} mismatches")
+
+    scapy_rate = run("scapy", lambda f: dot11_fields(RadioTap(f)), frames, args.repeat)
+    raw_rate = run("raw", dot11raw.parse_frame, frames, args.repeat)
+    print(f"[*] raw parser is {raw_rate / scapy_rate:.1f}x faster")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+#!/etc/.venv/python3
+"""
+Check scan.py's --channels parsing without a wireless interface: bands,
+lists, ranges and their mixes must give the expected hop list, and bad
+specs must be rejected.
+
+    python3 check_channels.py
+"""
+
+import sys
+
+from scan import CHANNELS_24, CHANNELS_5, parse_channels
+
+CASES = [
+    ("all", CHANNELS_24 + CHANNELS_5),
+    ("2.4ghz", CHANNELS_24),
+    ("5ghz", CHANNELS_5),
+    ("1,6,11", [1, 6, 11]),
+    ("1,5,9", [1, 5, 9]),            # 5 is a channel, not the 5 GHz band
+    ("5", [5]),
+    ("36-48", [36, 40, 44, 48]),
+    ("2.4ghz,36-48", CHANNELS_24 + [36, 40, 44, 48]),
+    ("6, 1,6", [6, 1]),              # de-duplicated, order kept
+    ("5GHz", CHANNELS_5),
+]
+
+BAD = ["", "2.4", "five", "1,x"]
+
+
+def main():
+    failed = 0
+    for spec, want in CASES:
+        try:
+            got = parse_channels(spec)
+        except ValueError as e:
+            got = e
+        if got != want:
+            failed += 1
+            print(f"[!] {spec!r}: got {got}, want {want}")
+    for spec in BAD:
+        try:
+            got = parse_channels(spec)
+        except ValueError:
+            continue
+        failed += 1
+        print(f"[!] {spec!r}: accepted as {got}")
+    print(f"[{'!' if failed else '+'}] channel parsing: {failed} problems")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
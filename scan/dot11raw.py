@@ -0,0 +1,232 @@
+"""
+Lightweight RadioTap / 802.11 parser for scan.py (--parser raw).
+
+Reads the handful of fields scan.py stores straight from the raw frame
+bytes with struct offsets instead of building a full Scapy packet, and
+returns them in the same order as scan.dot11_fields():
+
+    (src, dst, ssid, encType, authMode, strength, contentLength,
+     typeExternal, typeInternal, srcIP, dstIP, srcPort, dstPort, channel)
+
+The rules mirror the Scapy path (ssid_from, rssi_from, ip_ports,
+get_encryption_info) so both engines write identical rows. The one
+deliberate difference: the HT Control field of +HTC QoS data frames is
+skipped, so their IP/port fields are still found.
+"""
+
+import struct
+
+_u16 = struct.Struct("<H").unpack_from
+_u32 = struct.Struct("<I").unpack_from
+_be16 = struct.Struct(">H").unpack_from
+
+# RadioTap fields that come before dBm_AntSignal: bit -> (alignment, size)
+_RT_FIELDS = (
+    (8, 8),  # 0 TSFT
+    (1, 1),  # 1 Flags
+    (1, 1),  # 2 Rate
+    (2, 4),  # 3 Channel (freq u16, flags u16)
+    (2, 2),  # 4 FHSS
+    (1, 1),  # 5 dBm_AntSignal
+)
+_RT_FLAG_FCS = 0x10
+
+_FRAME_TYPES = {0: "management", 1: "control", 2: "data"}
+
+# Management subtypes that carry information elements -> fixed field length
+_MGMT_FIXED = {0: 4, 1: 6, 2: 10, 3: 6, 4: 0, 5: 12, 8: 12, 11: 6}
+# ... and the offset of the capability field inside those fixed fields
+_MGMT_CAP = {0: 0, 1: 0, 2: 0, 3: 0, 5: 10, 8: 10}
+_CAP_PRIVACY = 0x0010
+
+_FC_TODS_FROMDS = 0x03
+_FC_PROTECTED = 0x40
+_FC_ORDER = 0x80
+
+_LLC_SNAP = b"\xaa\xaa\x03"
+_ETH_IPV4 = 0x0800
+
+_MS_OUI = b"\x00\x50\xf2"
+
+
+def _mac(buf, off):
+    return buf[off:off + 6].hex(":")
+
+
+def freq_to_channel(freq):
+    """802.11 channel number for a centre frequency in MHz, or None."""
+    if not freq:
+        return None
+    if freq == 2484:
+        return 14
+    if 2407 < freq < 2484:
+        return (freq - 2407) // 5
+    if 5000 < freq < 5925:
+        return (freq - 5000) // 5
+    if 5950 < freq <= 7115:  # 6 GHz
+        return (freq - 5950) // 5
+    return None
+
+
+def parse_radiotap(buf):
+    """
+    Return (header_len, flags, rssi, freq) from a RadioTap header.
+    flags/rssi/freq are None when the field is not present.
+    """
+    rt_len = _u16(buf, 2)[0]
+    present = _u32(buf, 4)[0]
+    # Skip any extended presence bitmaps (bit 31 = another word follows)
+    off = 8
+    word = present
+    while word & 0x80000000 and off + 4 <= rt_len:
+        word = _u32(buf, off)[0]
+        off += 4
+
+    flags = rssi = freq = None
+    for bit, (align, size) in enumerate(_RT_FIELDS):
+        if not present & (1 << bit):
+            continue
+        if off % align:
+            off += align - off % align
+        if bit == 1:
+            flags = buf[off]
+        elif bit == 3:
+            freq = _u16(buf, off)[0]
+        elif bit == 5:
+            rssi = buf[off] - 256 if buf[off] > 127 else buf[off]
+        off += size
+    return rt_len, flags, rssi, freq
+
+
+def _elements(buf, off, end):
+    """Yield (id, start, stop) for each information element in buf[off:end]."""
+    while off < end:
+        eid = buf[off]
+        start = off + 2
+        stop = min(start + (buf[off + 1] if off + 1 < end else 0), end)
+        yield eid, start, stop
+        off = stop
+
+
+def _encryption(buf, ies, end, mgmt_body, subtype):
+    """Same decision table as scan.get_encryption_info()."""
+    cap_off = _MGMT_CAP.get(subtype)
+    if cap_off is None or mgmt_body + cap_off + 2 > end:
+        return "Public", None
+    if not _u16(buf, mgmt_body + cap_off)[0] & _CAP_PRIVACY:
+        return "Public", None
+
+    for eid, start, stop in _elements(buf, ies, end):
+        if eid == 48:  # RSN IE (WPA2/WPA3)
+            info = bytes(buf[start:stop])
+            if b"\x00\x0f\xac\x08" in info:  # SAE AKM
+                return "WPA3", "Enterprise"
+            elif b"\x00\x0f\xac\x02" in info:  # PSK
+                return "WPA2", "PSK"
+            elif b"\x00\x0f\xac\x01" in info:  # 802.1X
+                return "WPA2", "Enterprise"
+            return "WPA2", "PSK"
+        elif eid == 221:  # Vendor specific (WPA)
+            info = bytes(buf[start:stop])
+            # Scapy keeps the OUI in .info only for the Microsoft WPA IE
+            if not info.startswith(_MS_OUI + b"\x01"):
+                info = info[3:]
+            if _MS_OUI in info[:3]:
+                if b"\x00\x50\xf2\x02" in info:  # PSK
+                    return "WPA", "PSK"
+                elif b"\x00\x50\xf2\x01" in info:  # 802.1X
+                    return "WPA", "Enterprise"
+            return "WPA", "PSK"
+    # If privacy bit set but no WPA/WPA2, assume WEP (treat as Public for DB)
+    return "Public", None
+
+
+def _ipv4(buf, off, end):
+    """Return (srcIP, dstIP, srcPort, dstPort) for an IPv4 packet at buf[off:end]."""
+    if off + 20 > end:
+        return None, None, None, None
+    ihl = (buf[off] & 0x0F) * 4
+    total = _be16(buf, off + 2)[0]
+    frag = _be16(buf, off + 6)[0] & 0x1FFF
+    proto = buf[off + 9]
+    src = "%d.%d.%d.%d" % tuple(buf[off + 12:off + 16])
+    dst = "%d.%d.%d.%d" % tuple(buf[off + 16:off + 20])
+    sp = dp = None
+    l4 = off + ihl
+    if frag == 0 and proto in (6, 17) and l4 + 4 <= min(end, off + max(total, ihl)):
+        sp, dp = _be16(buf, l4)[0], _be16(buf, l4 + 2)[0]
+    return src, dst, sp, dp
+
+
+def parse_frame(buf):
+    """
+    Parse one RadioTap-framed 802.11 frame (bytes or memoryview).
+    Returns the 14 scan.py fields, or None if it is not a usable 802.11 frame.
+    """
+    length = len(buf)
+    if length < 8:
+        return None
+    try:
+        rt_len, rt_flags, rssi, freq = parse_radiotap(buf)
+    except (struct.error, IndexError):
+        return None
+    o = rt_len
+    end = length - 4 if rt_flags is not None and rt_flags & _RT_FLAG_FCS else length
+    if o + 10 > end:
+        return None
+
+    fc = buf[o]
+    fc_flags = buf[o + 1]
+    ftype = (fc >> 2) & 0x03
+    subtype = fc >> 4
+
+    dst = _mac(buf, o + 4)
+    src = None
+    if ftype not in (1, 3) or subtype in (4, 5, 6, 8, 9, 10, 11, 14, 15):
+        src = _mac(buf, o + 10) if o + 16 <= end else None
+
+    ssid = None
+    enc_type = auth_mode = None
+    ip_src = ip_dst = sp = dp = None
+
+    if ftype == 0 and not fc_flags & _FC_PROTECTED:
+        fixed = _MGMT_FIXED.get(subtype)
+        body = o + 24
+        if fixed is not None and body + fixed < end:
+            ies = body + fixed
+            for eid, start, stop in _elements(buf, ies, end):
+                if eid == 0:  # SSID element
+                    ssid = bytes(buf[start:stop]).decode("utf-8", errors="ignore") or None
+                    break
+            enc_type, auth_mode = _encryption(buf, ies, end, body, subtype)
+
+    elif ftype == 2:
+        hdr = 24
+        if fc_flags & _FC_TODS_FROMDS == _FC_TODS_FROMDS:
+            hdr += 6  # addr4
+        if subtype >= 8 and subtype != 13:
+            hdr += 2  # QoS control
+            if fc_flags & _FC_ORDER:
+                hdr += 4  # HT control
+        body = o + hdr
+        if (not fc_flags & _FC_PROTECTED and body + 8 <= end
+                and buf[body:body + 3] == _LLC_SNAP
+                and _be16(buf, body + 6)[0] == _ETH_IPV4):
+            ip_src, ip_dst, sp, dp = _ipv4(buf, body + 8, end)
+
+    return (
+        src,
+        dst,
+        ssid,
+        enc_type,
+        auth_mode,
+        rssi,
+        length,
+        _FRAME_TYPES.get(ftype, "unknown"),
+        str(subtype),
+        ip_src,
+        ip_dst,
+        sp,
+        dp,
+        freq_to_channel(freq),
+    )
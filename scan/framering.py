@@ -0,0 +1,115 @@
+"""
+Shared-memory frame ring for scan.py's multi-process pipeline (--pipeline).
+
+One capture process writes raw frames into fixed-size slots; any number
+of parser processes take them out in order. Only slot indices move through
+the semaphore/lock, the frame bytes stay in shared memory, and the capture
+side can receive straight into a slot (recv_into) without copying.
+
+Slot layout:  state (1 byte) | pad | ts, gps lat, gps lon (3 doubles) | length (u32) |
+              wire length (u32) | channel (u16) | pad | frame bytes
+  state: 0 = free, 1 = ready, 2 = being parsed
+  gps lat/lon are NaN when there is no fix.
+  length is what the slot holds; wire length is the frame's real size,
+  larger when it did not fit in FRAME_MAX bytes and was truncated.
+  channel is the one the interface was tuned to at capture time, 0 if unknown.
+"""
+
+import math
+import struct
+from multiprocessing import shared_memory
+
+_HDR = struct.Struct("<B7xdddIIH6x")
+SLOT_SIZE = 4096
+FRAME_MAX = SLOT_SIZE - _HDR.size
+
+FREE, READY, BUSY = 0, 1, 2
+
+
+class FrameRing:
+    def __init__(self, ctx, slots=4096):
+        self.slots = slots
+        self.shm = shared_memory.SharedMemory(create=True, size=slots * SLOT_SIZE)
+        self.buf = self.shm.buf
+        for i in range(slots):
+            self.buf[i * SLOT_SIZE] = FREE
+        self._ready = ctx.Semaphore(0)
+        self._tail_lock = ctx.Lock()
+        self._tail = ctx.RawValue("L", 0)
+        self.head = 0  # producer only
+        self.dropped = 0  # producer only
+        self.truncated = 0  # producer only
+
+    # ---- producer (capture process) ----
+
+    def slot_view(self):
+        """
+        Return a writable memoryview for the next frame, or None when the
+        ring is full (the caller drops the frame and counts it in `dropped`,
+        or waits).
+        """
+        off = self.head * SLOT_SIZE
+        if self.buf[off] != FREE:
+            return None
+        return self.buf[off + _HDR.size:off + SLOT_SIZE]
+
+    def commit(self, length, ts, lat=None, lon=None, channel=None):
+        """
+        Publish the frame written into slot_view(). length is the frame's
+        size on the wire; if it is over FRAME_MAX only the first FRAME_MAX
+        bytes were kept and the frame is counted in `truncated`.
+        channel is the channel the interface was tuned to, if known.
+        """
+        off = self.head * SLOT_SIZE
+        if length > FRAME_MAX:
+            self.truncated += 1
+        _HDR.pack_into(self.buf, off, READY, ts,
+                       math.nan if lat is None else lat,
+                       math.nan if lon is None else lon,
+                       min(length, FRAME_MAX), length, channel or 0)
+        self.head = (self.head + 1) % self.slots
+        self._ready.release()
+
+    def close_consumers(self, n):
+        """Wake n consumers with no frame behind them so they exit."""
+        for _ in range(n):
+            self._ready.release()
+
+    def used(self):
+        """Frames waiting for a parser (producer side, approximate)."""
+        return (self.head - self._tail.value) % self.slots
+
+    # ---- consumers (parser processes) ----
+
+    def get(self, timeout=None):
+        """
+        Block for the next frame and return (bytes, ts, lat, lon, wire
+        length, channel), None when the ring has been closed, or () if
+        timeout expires first. wire length is over len(bytes) for truncated
+        frames; channel is None when the capture side did not know it.
+        """
+        if not self._ready.acquire(timeout=timeout):
+            return ()
+        with self._tail_lock:
+            idx = self._tail.value
+            off = idx * SLOT_SIZE
+            if self.buf[off] != READY:
+                return None
+            self.buf[off] = BUSY
+            self._tail.value = (idx + 1) % self.slots
+        _state, ts, lat, lon, length, wire_len, channel = _HDR.unpack_from(self.buf, off)
+        data = bytes(self.buf[off + _HDR.size:off + _HDR.size + length])
+        self.buf[off] = FREE
+        return (data, ts,
+                None if math.isnan(lat) else lat,
+                None if math.isnan(lon) else lon,
+                wire_len, channel or None)
+
+    def close(self, unlink=False):
+        self.buf = None
+        try:
+            self.shm.close()
+        except BufferError:
+            pass  # a slot view is still alive; the mapping goes with the process
+        if unlink:
+            self.shm.unlink()
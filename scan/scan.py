@@ -2,22 +2,34 @@
 
 
 import argparse
+import glob
 import json
+import multiprocessing
 import os
+import signal
+import socket
 import subprocess
 import sys
 import threading
 import time
 from datetime import datetime
 from threading import Lock
-from queue import Queue
+from queue import Queue, Empty, Full
 
 # Scapy
-from scapy.all import sniff, RadioTap, Dot11, Dot11Elt, IP, TCP, UDP
+from scapy.all import sniff, RadioTap, Dot11, Dot11Elt, IP, TCP, UDP, RawPcapReader
+from scapy.error import Scapy_Exception
+
+# Raw 802.11 parser (--parser raw), shared-memory ring (--pipeline), local spool (--spool),
+# beacon aggregation (--beacon-window)
+import dot11raw
+from framering import FRAME_MAX, FrameRing
+from spool import Spool
+from beaconagg import BeaconAggregator
 
 # MySQL
 import mysql.connector
-from mysql.connector import Error
+from mysql.connector import Error, DataError, IntegrityError
 
 # Database configuration
 DB_CONFIG = {
@@ -27,8 +39,9 @@ DB_CONFIG = {
     'database': 'team404'
 }
 
-# Global queue for database writes
-db_queue = Queue()
+# Global queue for database writes (bounded, see configure_queue)
+DEFAULT_QUEUE_SIZE = 20000
+db_queue = Queue(maxsize=DEFAULT_QUEUE_SIZE)
 _gps_lat = None
 _gps_lon = None
 _gps_lock = Lock()
@@ -61,6 +74,15 @@ def rssi_from(pkt):
         pass
     return None
 
+def channel_from(pkt):
+    try:
+        rt = pkt.getlayer(RadioTap)
+        if rt and rt.fields.get("ChannelFrequency"):
+            return dot11raw.freq_to_channel(int(rt.fields["ChannelFrequency"]))
+    except Exception:
+        pass
+    return None
+
 def ssid_from(pkt):
     try:
         elt = pkt.getlayer(Dot11Elt, ID=0)  # SSID element
@@ -129,6 +151,179 @@ def get_encryption_info(pkt):
         pass
     return None, None
 
+# Channel hopping
+
+CHANNELS_24 = list(range(1, 14))
+CHANNELS_5 = [36, 40, 44, 48, 52, 56, 60, 64, 100, 104, 108, 112, 116, 120,
+              124, 128, 132, 136, 140, 144, 149, 153, 157, 161, 165]
+# Band names must not look like a channel number ("5" is channel 5)
+CHANNEL_BANDS = {"2.4ghz": CHANNELS_24, "5ghz": CHANNELS_5, "all": CHANNELS_24 + CHANNELS_5}
+
+# An AP beacons ~10 times a second, so one AP counts like 10 frames/s
+HOP_AP_WEIGHT = 10.0
+HOP_MIN_FACTOR = 0.5
+
+_current_channel = None  # channel the interface is tuned to (set by -c or the hopper)
+_hopping = False
+_hop_frames = 0
+_hop_bssids = set()
+_hop_dwell_total = {}  # channel -> seconds spent there
+_hop_lock = Lock()
+
+def parse_channels(spec):
+    """
+    Parse --channels: a band (2.4ghz, 5ghz, all) or a comma list of bands,
+    channels and ranges of valid channels, e.g. "1,6,11" or "2.4ghz,36-48".
+    Raises ValueError on bad input.
+    """
+    channels = []
+    for part in _split_names(spec):
+        if part in CHANNEL_BANDS:
+            channels.extend(CHANNEL_BANDS[part])
+        elif "-" in part:
+            lo, hi = (int(x) for x in part.split("-", 1))
+            channels.extend(c for c in CHANNEL_BANDS["all"] if lo <= c <= hi)
+        else:
+            channels.append(int(part))
+    channels = list(dict.fromkeys(channels))
+    if not channels:
+        raise ValueError(f"no channels in {spec!r}")
+    return channels
+
+def set_channel(iface, channel):
+    """Tune iface to channel; returns True on success."""
+    global _current_channel
+    ok = run_quiet(["iw", "dev", iface, "set", "channel", str(channel)]).returncode == 0
+    if ok:
+        _current_channel = channel
+    return ok
+
+def hop_count_frame(bssid=None):
+    """Credit a frame (and the AP, for beacons) to the channel being dwelt on."""
+    global _hop_frames
+    with _hop_lock:
+        _hop_frames += 1
+        if bssid:
+            _hop_bssids.add(bssid)
+
+def channel_hopper_thread(iface, channels, dwell=0.3, adaptive=True, max_factor=4.0):
+    """
+    Cycle iface through `channels`, dwelling `dwell` seconds on each. With
+    adaptive weighting the dwell on a channel is scaled by its score
+    (smoothed frames/s + HOP_AP_WEIGHT * APs seen) relative to the mean
+    score, between HOP_MIN_FACTOR and max_factor, so busy channels get more
+    time but every channel is still visited each round.
+    """
+    global _hopping, _hop_frames, _hop_bssids
+    rate = {ch: 0.0 for ch in channels}
+    aps = {ch: set() for ch in channels}
+    channels = list(channels)
+    _hopping = True
+
+    def dwell_for(ch):
+        if not adaptive:
+            return dwell
+        scores = [rate[c] + HOP_AP_WEIGHT * len(aps[c]) for c in channels]
+        mean = sum(scores) / len(scores)
+        if mean <= 0:
+            return dwell
+        score = rate[ch] + HOP_AP_WEIGHT * len(aps[ch])
+        return dwell * min(max_factor, max(HOP_MIN_FACTOR, score / mean))
+
+    while channels:
+        for ch in list(channels):
+            if not set_channel(iface, ch):
+                print(f"[!] Channel {ch} not supported on {iface}, removing it from the hop list",
+                      file=sys.stderr)
+                channels.remove(ch)
+                continue
+            with _hop_lock:
+                _hop_frames, _hop_bssids = 0, set()
+            start = time.monotonic()
+            time.sleep(dwell_for(ch))
+            with _hop_lock:
+                frames, bssids = _hop_frames, _hop_bssids
+                _hop_frames, _hop_bssids = 0, set()
+                elapsed = time.monotonic() - start
+                _hop_dwell_total[ch] = _hop_dwell_total.get(ch, 0.0) + elapsed
+            observed = frames / elapsed if elapsed > 0 else 0.0
+            rate[ch] = observed if rate[ch] == 0 else 0.7 * rate[ch] + 0.3 * observed
+            aps[ch] |= bssids
+    print(f"[!] No usable channels left on {iface}, channel hopping stopped", file=sys.stderr)
+
+def print_hopper_stats():
+    """Print the time spent on each channel."""
+    with _hop_lock:
+        totals = dict(_hop_dwell_total)
+    total = sum(totals.values())
+    if not total:
+        return
+    share = ", ".join(f"{ch}: {t:.1f}s ({100 * t / total:.0f}%)"
+                      for ch, t in sorted(totals.items(), key=lambda kv: kv[1], reverse=True))
+    print(f"[*] Channel dwell: {share}", file=sys.stderr)
+
+# Capture filter
+
+# 802.11 frame types/subtypes as libpcap names them (type -> subtypes)
+BPF_TYPES = {
+    "mgt": ("assoc-req", "assoc-resp", "reassoc-req", "reassoc-resp", "probe-req",
+            "probe-resp", "beacon", "atim", "disassoc", "auth", "deauth"),
+    "ctl": ("ps-poll", "rts", "cts", "ack", "cf-end", "cf-end-ack"),
+    "data": ("data", "data-cf-ack", "data-cf-poll", "data-cf-ack-poll", "null",
+             "cf-ack", "cf-poll", "cf-ack-poll", "qos-data", "qos-data-cf-ack",
+             "qos-data-cf-poll", "qos-data-cf-ack-poll", "qos", "qos-cf-poll",
+             "qos-cf-ack-poll"),
+}
+BPF_TYPE_ALIASES = {
+    "mgmt": "mgt", "mgt": "mgt", "management": "mgt",
+    "ctrl": "ctl", "ctl": "ctl", "control": "ctl",
+    "data": "data",
+}
+
+def _split_names(value):
+    return [v.strip().lower() for v in (value or "").split(",") if v.strip()]
+
+def build_bpf(types=None, subtypes=None, extra=None):
+    """
+    Build a libpcap filter expression from --types / --subtypes / --bpf.
+    A type listed without any of its subtypes matches the whole type;
+    subtypes narrow their own type only. --bpf is ANDed onto the result.
+    Returns None when nothing was requested (capture everything).
+    """
+    wanted = []
+    for name in _split_names(types):
+        if name not in BPF_TYPE_ALIASES:
+            raise ValueError(f"Unknown frame type '{name}' (use mgmt, ctrl, data)")
+        if BPF_TYPE_ALIASES[name] not in wanted:
+            wanted.append(BPF_TYPE_ALIASES[name])
+
+    by_type = {}
+    for name in _split_names(subtypes):
+        owner = next((t for t, subs in BPF_TYPES.items() if name in subs), None)
+        if owner is None:
+            raise ValueError(f"Unknown frame subtype '{name}'")
+        by_type.setdefault(owner, []).append(name)
+        if owner not in wanted:
+            wanted.append(owner)
+
+    clauses = []
+    for t in wanted:
+        if t in by_type:
+            clauses += [f"type {t} subtype {st}" for st in by_type[t]]
+        else:
+            clauses.append(f"type {t}")
+
+    parts = []
+    if clauses:
+        parts.append(" or ".join(clauses))
+    if extra:
+        parts.append(extra)
+    if not parts:
+        return None
+    if len(parts) == 1:
+        return parts[0]
+    return " and ".join(f"({p})" for p in parts)
+
 # GPS 
 
 def gps_thread():
@@ -193,10 +388,10 @@ def gps_thread():
                     _gps_lon = None
             time.sleep(1.0)
 
-def create_project(connection):
+def create_project(connection, start_time=None):
     """
     Create a new project in ProjectDB with projectType='sniff_internal'.
-    Returns the new project ID.
+    start_time defaults to now (datetime). Returns the new project ID.
     """
     try:
         cursor = connection.cursor()
@@ -204,27 +399,41 @@ def create_project(connection):
         INSERT INTO ProjectDB (startTime, projectType)
         VALUES (%s, 'sniff_internal')
         """
-        start_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        start_time = (start_time or datetime.now()).strftime("%Y-%m-%d %H:%M:%S")
         cursor.execute(insert_query, (start_time,))
         connection.commit()
         project_id = cursor.lastrowid
         cursor.close()
         print(f"[+] Created new project with ID: {project_id}")
+        ensure_project_partition(connection, project_id)
         return project_id
     except Error as e:
         print(f"[!] Failed to create project: {e}", file=sys.stderr)
         sys.exit(1)
 
-def update_project_stop_time(connection, project_id):
+def ensure_project_partition(connection, project_id):
     """
-    Update the stopTime for a project when capture ends.
+    Give the project its own IngestDB partition (setup.sql
+    EnsureProjectPartition), so its queries and retention touch only it.
+    """
+    try:
+        cursor = connection.cursor()
+        cursor.callproc("EnsureProjectPartition", (project_id,))
+        cursor.close()
+    except Error as e:
+        print(f"[!] No IngestDB partition for project {project_id}, rows go to pmax: {e}",
+              file=sys.stderr)
+
+def update_project_stop_time(connection, project_id, stop_time=None):
+    """
+    Update the stopTime for a project when capture ends (default: now).
     """
     try:
         cursor = connection.cursor()
         update_query = """
         UPDATE ProjectDB SET stopTime = %s WHERE ID = %s
         """
-        stop_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        stop_time = (stop_time or datetime.now()).strftime("%Y-%m-%d %H:%M:%S")
         cursor.execute(update_query, (stop_time, project_id))
         connection.commit()
         cursor.close()
@@ -232,53 +441,497 @@ def update_project_stop_time(connection, project_id):
     except Error as e:
         print(f"[!] Failed to update project stop time: {e}", file=sys.stderr)
 
+# Capture queue
+
+OVERLOAD_POLICIES = ("block", "drop-oldest", "drop-newest", "sample")
+# "writer-gone" counts frames discarded because the writer had exited
+DROP_COUNTERS = OVERLOAD_POLICIES + ("writer-gone",)
+WRITER_POLL_S = 0.5  # how often a blocked put checks that the writer is still running
+
+_overload_policy = "block"
+_sample_n = 10
+_sample_seen = 0
+# Frames affected by the overload policy, indexed like DROP_COUNTERS.
+# "block" counts frames that had to wait for room; every other slot counts
+# frames that were discarded. share_drop_counters() moves them to shared
+# memory for --pipeline, where the parser processes apply the policy.
+_dropped = [0] * len(DROP_COUNTERS)
+_dropped_lock = Lock()
+# Set when db_writer_thread returns, so nothing waits for room any more
+_writer_done = threading.Event()
+
+def configure_queue(maxsize, policy="block", sample_n=10):
+    """
+    Replace db_queue with a bounded queue and select what enqueue_entry()
+    does when it fills up. Call before any threads are started.
+    """
+    global db_queue, _overload_policy, _sample_n
+    if policy not in OVERLOAD_POLICIES:
+        raise ValueError(f"Unknown overload policy: {policy}")
+    db_queue = Queue(maxsize=max(1, maxsize))
+    _overload_policy = policy
+    _sample_n = max(1, sample_n)
+
+def share_drop_counters(ctx):
+    """
+    Keep the overload counters and the writer-exited flag in shared memory.
+    Call before forking.
+    """
+    global _dropped, _dropped_lock, _writer_done
+    _dropped = ctx.Array("Q", len(DROP_COUNTERS), lock=False)
+    _dropped_lock = ctx.Lock()
+    _writer_done = ctx.Event()
+
+def _count_drop(policy, n=1):
+    with _dropped_lock:
+        _dropped[DROP_COUNTERS.index(policy)] += n
+
+def put_while_writer_runs(item, q=None, alive=None):
+    """
+    q.put(item) (default db_queue) that gives up once the writer has exited,
+    instead of waiting forever for room it will never make. alive, if given,
+    is also polled (Thread/Process.is_alive, for a writer that died without
+    setting _writer_done). Returns True if item was queued.
+    """
+    q = db_queue if q is None else q
+    while not _writer_done.is_set() and (alive is None or alive()):
+        try:
+            q.put(item, timeout=WRITER_POLL_S)
+            return True
+        except Full:
+            pass
+    return False
+
+def enqueue_entry(entry):
+    """
+    Queue an entry for the DB writer according to the overload policy:
+      block       - wait for room (capture slows down, nothing is lost)
+      drop-oldest - discard the oldest queued entry to make room
+      drop-newest - discard this entry
+      sample      - once the queue is half full keep only 1-in-N entries
+    Returns True if the entry was queued.
+    """
+    global _sample_seen
+    if _overload_policy == "sample" and db_queue.qsize() >= queue_maxsize() // 2:
+        _sample_seen += 1
+        if _sample_seen % _sample_n:
+            _count_drop("sample")
+            return False
+    return _put(entry)
+
+def enqueue_chunk(chunk):
+    """
+    enqueue_entry() for a --pipeline parser process, whose db_queue is the
+    writer's queue of entry lists: sample thins the chunk to 1-in-N entries,
+    the other policies act on whole chunks. Counters count entries.
+    """
+    global _sample_seen
+    if _overload_policy == "sample" and db_queue.qsize() >= queue_maxsize() // 2:
+        kept = []
+        for entry in chunk:
+            _sample_seen += 1
+            if _sample_seen % _sample_n == 0:
+                kept.append(entry)
+        _count_drop("sample", len(chunk) - len(kept))
+        if not kept:
+            return False
+        chunk = kept
+    return _put(chunk, chunked=True)
+
+def _put(item, chunked=False):
+    """Queue item on db_queue under the overload policy (after sampling)."""
+    size = len if chunked else (lambda _item: 1)
+    if _overload_policy == "block":
+        try:
+            db_queue.put_nowait(item)
+        except Full:
+            _count_drop("block", size(item))
+            if not put_while_writer_runs(item):
+                _count_drop("writer-gone", size(item))
+                return False
+        return True
+
+    try:
+        db_queue.put_nowait(item)
+        return True
+    except Full:
+        pass
+
+    if _overload_policy == "drop-oldest":
+        try:
+            # a timed get: a multiprocessing.Queue can look empty while a
+            # put is still in its feeder thread
+            oldest = db_queue.get(timeout=0.1)
+            if oldest is None:  # never discard the poison pill
+                db_queue.put_nowait(oldest)
+                _count_drop("drop-oldest", size(item))
+                return False
+            db_queue.put_nowait(item)
+            _count_drop("drop-oldest", size(oldest))
+            return True
+        except (Empty, Full):
+            pass
+    _count_drop(_overload_policy, size(item))
+    return False
+
+def dropped_stats():
+    """Return a snapshot of the per-policy overload counters."""
+    with _dropped_lock:
+        return dict(zip(DROP_COUNTERS, _dropped))
+
 # Database writer thread
 
-def db_writer_thread(project_id):
+INSERT_QUERY = """
+INSERT INTO IngestDB 
+(projectID, captureTime, srcMac, dstMac, SSID, encType, authMode, 
+ gpsLat, gpsLong, strength, contentLength, typeExternal, typeInternal,
+ srcIP, dstIP, srcPort, dstPort, sniffType, channel,
+ frameCount, rssiMin, rssiMax, lastSeen)
+VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s,
+        %s, %s, %s, %s)
+"""
+
+# Writer counters, read by print_writer_stats() / the stats thread
+_writer_stats = {
+    "batches": 0,
+    "rows": 0,
+    "failed_rows": 0,
+    "last_batch": 0,
+    "max_batch": 0,
+    "last_flush_ms": 0.0,
+    "max_flush_ms": 0.0,
+    "total_flush_ms": 0.0,
+    "max_backlog": 0,
+}
+_writer_lock = Lock()
+
+def writer_stats():
+    """
+    Return a snapshot of the writer counters plus the current queue backlog.
+    """
+    with _writer_lock:
+        stats = dict(_writer_stats)
+    stats["backlog"] = db_queue.qsize()
+    stats["avg_batch"] = stats["rows"] / stats["batches"] if stats["batches"] else 0.0
+    stats["avg_flush_ms"] = stats["total_flush_ms"] / stats["batches"] if stats["batches"] else 0.0
+    return stats
+
+def queue_maxsize(q=None):
+    """maxsize of db_queue (queue.Queue or, in the pipeline processes, multiprocessing.Queue)."""
+    q = db_queue if q is None else q
+    return getattr(q, "maxsize", getattr(q, "_maxsize", 0))
+
+def print_writer_stats():
+    s = writer_stats()
+    print(f"[*] Writer: {s['rows']} rows in {s['batches']} batches "
+          f"(avg {s['avg_batch']:.1f}, last {s['last_batch']}, max {s['max_batch']}) | "
+          f"flush avg {s['avg_flush_ms']:.1f} ms, last {s['last_flush_ms']:.1f} ms, max {s['max_flush_ms']:.1f} ms | "
+          f"backlog {s['backlog']}/{queue_maxsize()} (max {s['max_backlog']}) | failed {s['failed_rows']}",
+          file=sys.stderr, flush=True)
+    d = dropped_stats()
+    print(f"[*] Queue policy {_overload_policy}: "
+          + ", ".join(f"{k} {v}" for k, v in d.items() if v or k == _overload_policy),
+          file=sys.stderr, flush=True)
+
+def stats_thread(interval):
+    """
+    Print the writer counters every `interval` seconds.
+    """
+    while True:
+        time.sleep(interval)
+        print_writer_stats()
+
+# Rollups (setup.sql RefreshRollups): folded in after flushes, at most every
+# _rollup_interval seconds, so the UI reads ProjectSSIDStats/ProjectMacStats
+_rollup_interval = 5.0
+_rollup_last = 0.0
+
+def configure_rollups(interval):
+    global _rollup_interval
+    _rollup_interval = interval
+
+def refresh_rollups(connection, force=False):
+    """Fold newly written IngestDB rows into the per-project rollup tables."""
+    global _rollup_last
+    if _rollup_interval <= 0:
+        return
+    now = time.monotonic()
+    if not force and now - _rollup_last < _rollup_interval:
+        return
+    _rollup_last = now
+    try:
+        cursor = connection.cursor()
+        cursor.callproc("RefreshRollups")
+        cursor.close()
+    except Error as e:
+        print(f"[!] Rollup refresh failed: {e}", file=sys.stderr)
+
+def flush_batch(connection, cursor, batch):
+    """
+    Write one batch with a single multi-row INSERT and one commit.
+    Returns the (possibly new) cursor.
+    """
+    t0 = time.monotonic()
+    try:
+        cursor.executemany(INSERT_QUERY, batch)
+        connection.commit()
+        ok = True
+    except Error as e:
+        ok = False
+        print(f"[!] Database error ({len(batch)} rows lost): {e}", file=sys.stderr)
+        try:
+            connection.rollback()
+        except Error:
+            pass
+        # Try to reconnect
+        try:
+            if not connection.is_connected():
+                connection.reconnect()
+                cursor = connection.cursor()
+        except Error:
+            pass
+    _record_flush(ok, len(batch), (time.monotonic() - t0) * 1000.0)
+    return cursor
+
+def spool_batch(spool, batch):
+    """
+    Append one batch to the local spool (--spool); the uploader thread
+    takes it to the database from there.
+    """
+    t0 = time.monotonic()
+    try:
+        spool.append(batch)
+        ok = True
+    except OSError as e:
+        ok = False
+        print(f"[!] Spool write error ({len(batch)} rows lost): {e}", file=sys.stderr)
+    _record_flush(ok, len(batch), (time.monotonic() - t0) * 1000.0)
+
+def _record_flush(ok, rows, flush_ms):
+    backlog = db_queue.qsize()
+    with _writer_lock:
+        if ok:
+            _writer_stats["batches"] += 1
+            _writer_stats["rows"] += rows
+            _writer_stats["last_batch"] = rows
+            _writer_stats["max_batch"] = max(_writer_stats["max_batch"], rows)
+            _writer_stats["last_flush_ms"] = flush_ms
+            _writer_stats["max_flush_ms"] = max(_writer_stats["max_flush_ms"], flush_ms)
+            _writer_stats["total_flush_ms"] += flush_ms
+        else:
+            _writer_stats["failed_rows"] += rows
+        _writer_stats["max_backlog"] = max(_writer_stats["max_backlog"], backlog)
+
+def queue_batches(batch_rows, batch_ms):
+    """
+    Drain db_queue and yield batches until the poison pill. A batch is
+    yielded when it reaches batch_rows entries or when its oldest entry
+    has waited batch_ms milliseconds, whichever comes first.
+    """
+    batch = []
+    deadline = 0.0
+    running = True
+    while running:
+        # Block indefinitely while idle; otherwise only until the batch is due
+        timeout = max(0.0, deadline - time.monotonic()) if batch else None
+        try:
+            entry = db_queue.get(timeout=timeout)
+        except Empty:
+            entry = ()
+        if entry is None:  # Poison pill to stop thread
+            running = False
+        elif entry:
+            if not batch:
+                deadline = time.monotonic() + batch_ms / 1000.0
+            if isinstance(entry, list):  # chunk from a parser process
+                batch.extend(entry)
+            else:
+                batch.append(entry)
+
+        if batch and (not running or len(batch) >= batch_rows
+                      or time.monotonic() >= deadline):
+            yield batch
+            batch = []
+
+def db_writer_thread(project_id, batch_rows=500, batch_ms=250, spool=None):
     """
-    Continuously pull entries from db_queue and write to MySQL.
+    Continuously drain db_queue and write to MySQL in batches, or append
+    the batches to `spool` when one is given (see spool_uploader_thread).
+    On return (poison pill, or the database was unreachable) _writer_done
+    is set so the producers stop waiting for room in db_queue.
     """
+    try:
+        _db_writer(project_id, batch_rows, batch_ms, spool)
+    finally:
+        _writer_done.set()
+
+def _db_writer(project_id, batch_rows, batch_ms, spool):
+    if spool is not None:
+        for batch in queue_batches(batch_rows, batch_ms):
+            spool_batch(spool, batch)
+        spool.close()
+        return
+
     connection = None
+    cursor = None
     try:
         connection = mysql.connector.connect(**DB_CONFIG)
         if connection.is_connected():
             print("[*] Connected to MySQL database")
             cursor = connection.cursor()
-            
-            insert_query = """
-            INSERT INTO IngestDB 
-            (projectID, captureTime, srcMac, dstMac, SSID, encType, authMode, 
-             gpsLat, gpsLong, strength, contentLength, typeExternal, typeInternal,
-             srcIP, dstIP, srcPort, dstPort, sniffType)
-            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-            """
-            
-            while True:
-                entry = db_queue.get()
-                if entry is None:  # Poison pill to stop thread
-                    break
-                    
-                try:
-                    cursor.execute(insert_query, entry)
-                    connection.commit()
-                except Error as e:
-                    print(f"[!] Database error: {e}", file=sys.stderr)
-                    # Try to reconnect
-                    try:
-                        if not connection.is_connected():
-                            connection.reconnect()
-                            cursor = connection.cursor()
-                    except:
-                        pass
-                        
+            for batch in queue_batches(batch_rows, batch_ms):
+                cursor = flush_batch(connection, cursor, batch)
+                refresh_rollups(connection)
+            refresh_rollups(connection, force=True)
+
     except Error as e:
         print(f"[!] Failed to connect to database: {e}", file=sys.stderr)
     finally:
         if connection and connection.is_connected():
-            cursor.close()
+            if cursor is not None:
+                cursor.close()
             connection.close()
             print("[*] Database connection closed")
 
+# Spool uploader (--spool)
+
+_uploader_stats = {
+    "rows": 0,
+    "batches": 0,
+    "failed_rows": 0,
+    "retries": 0,
+    "position": None,
+}
+_uploader_lock = Lock()
+
+def _insert_rows_individually(connection, cursor, rows):
+    """
+    Fallback when a bulk INSERT is rejected for bad data: insert row by row
+    and skip the rows the database refuses. Returns the number skipped.
+    """
+    failed = 0
+    for row in rows:
+        try:
+            cursor.execute(INSERT_QUERY, row)
+        except (IntegrityError, DataError) as e:
+            failed += 1
+            print(f"[!] Spool row rejected, skipped: {e}", file=sys.stderr)
+    connection.commit()
+    return failed
+
+def spool_uploader_thread(spool, stop, batch_rows=500, idle_ms=250, drain_s=10.0):
+    """
+    Upload spooled entries to IngestDB in order, batch_rows at a time, and
+    checkpoint after every commit. While the database is unreachable the
+    entries stay in the spool and the connection is retried with backoff.
+    After `stop` is set, keeps draining for up to drain_s seconds; anything
+    left is uploaded on the next start.
+    """
+    connection = None
+    cursor = None
+    pos = spool.load_checkpoint()
+    backoff = 1.0
+    stop_at = None
+    with _uploader_lock:
+        _uploader_stats["position"] = pos
+    while True:
+        if stop.is_set() and stop_at is None:
+            stop_at = time.monotonic() + drain_s
+        if stop_at is not None and time.monotonic() >= stop_at:
+            break
+
+        skipped = spool.skipped_bytes
+        entries, nxt = spool.read(pos, batch_rows)
+        if spool.skipped_bytes != skipped:
+            print(f"[!] Spool: skipped {spool.skipped_bytes - skipped} corrupt bytes "
+                  f"in segment {pos[0]} after offset {pos[1]}", file=sys.stderr)
+        if not entries:
+            if nxt != pos:  # moved past a finished segment
+                pos = nxt
+                spool.save_checkpoint(pos)
+                spool.purge(pos)
+            if stop_at is not None:
+                break  # fully drained
+            stop.wait(idle_ms / 1000.0)
+            continue
+
+        if connection is None or not connection.is_connected():
+            try:
+                connection = mysql.connector.connect(**DB_CONFIG)
+                cursor = connection.cursor()
+                print("[*] Spool uploader connected to MySQL database")
+                backoff = 1.0
+            except Error as e:
+                print(f"[!] Spool uploader: database unavailable ({e}), retrying in {backoff:.0f}s",
+                      file=sys.stderr)
+                connection = None
+                stop.wait(backoff)
+                backoff = min(30.0, backoff * 2)
+                continue
+
+        failed = 0
+        try:
+            try:
+                cursor.executemany(INSERT_QUERY, entries)
+                connection.commit()
+            except (IntegrityError, DataError):
+                connection.rollback()
+                failed = _insert_rows_individually(connection, cursor, entries)
+        except Error as e:
+            print(f"[!] Spool upload failed, will retry ({len(entries)} rows kept): {e}",
+                  file=sys.stderr)
+            try:
+                connection.close()
+            except Error:
+                pass
+            connection = None
+            with _uploader_lock:
+                _uploader_stats["retries"] += 1
+            stop.wait(backoff)
+            backoff = min(30.0, backoff * 2)
+            continue
+
+        pos = nxt
+        spool.save_checkpoint(pos)
+        spool.purge(pos)
+        refresh_rollups(connection)
+        with _uploader_lock:
+            _uploader_stats["batches"] += 1
+            _uploader_stats["rows"] += len(entries) - failed
+            _uploader_stats["failed_rows"] += failed
+            _uploader_stats["position"] = pos
+
+    if connection is not None and connection.is_connected():
+        refresh_rollups(connection, force=True)
+        cursor.close()
+        connection.close()
+
+def start_spool(spool_dir, segment_mb=16, batch_rows=500, batch_ms=250, drain_s=10.0):
+    """
+    Open the spool and start its uploader. Returns (spool, stop_event, thread)
+    for db_writer_thread(spool=...) and stop_spool().
+    """
+    spool = Spool(spool_dir, max(1, segment_mb) * 1024 * 1024)
+    stop = threading.Event()
+    uploader = threading.Thread(target=spool_uploader_thread,
+                                args=(spool, stop, batch_rows, batch_ms, drain_s),
+                                daemon=True)
+    uploader.start()
+    return spool, stop, uploader
+
+def stop_spool(spool, stop, uploader, drain_s=10.0):
+    """Let the uploader drain (bounded by drain_s) and report what is left."""
+    stop.set()
+    uploader.join(timeout=drain_s + 5)
+    with _uploader_lock:
+        u = dict(_uploader_stats)
+    pending = spool.pending_bytes(spool.load_checkpoint())
+    print(f"[*] Spool: {u['rows']} rows uploaded in {u['batches']} batches | "
+          f"rejected {u['failed_rows']} | retries {u['retries']} | "
+          f"corrupt {spool.skipped_bytes} bytes skipped | "
+          f"{pending / 1024:.0f} KiB still spooled in {spool.dir}",
+          file=sys.stderr, flush=True)
+
 # Packet processing
 
 def csvq(s):
@@ -289,31 +942,124 @@ def csvq(s):
         s = '"' + s.replace('"', '""') + '"'
     return s
 
-def make_printer(sniff_type_value, project_id):
+# Console output
+
+CONSOLE_MODES = ("off", "sampled", "summary", "full")
+CSV_HEADER = [
+    "captureTime", "srcMac", "dstMac", "SSID", "encType", "authMode",
+    "gpsLat", "gpsLong", "strength", "contentLength", "typeExternal", "typeInternal",
+    "srcIP", "dstIP", "srcPort", "dstPort", "sniffType", "channel",
+    "frameCount", "rssiMin", "rssiMax", "lastSeen"
+]
+
+# Per-interval counters for --console summary (swapped out by the summary thread)
+_console_frames = 0
+_console_ssids = {}
+_console_lock = Lock()
+
+def console_summary_thread(interval=1.0, top_n=5):
+    """
+    Print aggregate frames/sec, queue depth and per-SSID counts every
+    `interval` seconds, so the capture thread never touches stdout.
+    """
+    global _console_frames, _console_ssids
+    last = time.monotonic()
+    while True:
+        time.sleep(interval)
+        with _console_lock:
+            frames, ssids = _console_frames, _console_ssids
+            _console_frames, _console_ssids = 0, {}
+        now = time.monotonic()
+        rate = frames / (now - last) if now > last else 0.0
+        last = now
+        top = sorted(ssids.items(), key=lambda kv: kv[1], reverse=True)[:top_n]
+        more = len(ssids) - len(top)
+        ssid_txt = ", ".join(f"{csvq(k)} {v}" for k, v in top) or "-"
+        if more > 0:
+            ssid_txt += f" (+{more} more)"
+        dropped = sum(v for k, v in dropped_stats().items() if k != "block")
+        print(f"[{datetime.now().strftime('%H:%M:%S')}] {rate:.0f} frames/s | "
+              f"queue {db_queue.qsize()}/{queue_maxsize()} | dropped {dropped} | "
+              f"SSIDs: {ssid_txt}", flush=True)
+
+def dot11_fields(pkt):
+    """
+    Scapy parsing engine: return the per-frame fields
+    (src, dst, ssid, encType, authMode, strength, contentLength,
+     typeExternal, typeInternal, srcIP, dstIP, srcPort, dstPort, channel)
+    or None if the packet has no 802.11 layer.
+    dot11raw.parse_frame() returns the same tuple from raw bytes.
+    """
+    if not pkt.haslayer(Dot11):
+        return None
+    src = getattr(pkt, "addr2", None)
+    dst = getattr(pkt, "addr1", None)
+    ssid = ssid_from(pkt)
+    rssi = rssi_from(pkt)
+    length = len(pkt) if pkt else 0
+    ext = {0: "management", 1: "control", 2: "data"}.get(getattr(pkt, "type", None), "unknown")
+    itn = str(getattr(pkt, "subtype", ""))
+    ip_src, ip_dst, sp, dp = ip_ports(pkt)
+
+    # Extract encryption info
+    enc_type, auth_mode = get_encryption_info(pkt)
+
+    return (src, dst, ssid, enc_type, auth_mode, rssi, length, ext, itn,
+            ip_src, ip_dst, sp, dp, channel_from(pkt))
+
+PARSERS = ("scapy", "raw")
+
+def make_printer(sniff_type_value, project_id, console="summary", console_every=100,
+                 parser="scapy", emit=None, beacon_window=0):
     """
     Return a function for scapy.sniff(prn=...) that queues entries for database insertion
-    and prints CSV to console.
+    and reports them on the console according to `console`:
+      off     - nothing per frame
+      sampled - CSV line for every `console_every`-th frame
+      summary - count frames/SSIDs for console_summary_thread()
+      full    - CSV line for every frame
+    With parser="raw" the function takes raw RadioTap frame bytes (see
+    raw_sniff) and parses them with dot11raw instead of Scapy.
+    Entries go to enqueue_entry() unless another `emit` callable is given.
+    The returned prn(pkt, ts=None, gps=None, wire_len=None, tuned=None)
+    optionally takes the capture time (epoch seconds) and a (lat, lon) fix
+    instead of now / the GPS thread, the frame's real length when pkt was
+    truncated, and the channel the interface was tuned to at capture time
+    (used when the frame has no RadioTap channel) instead of _current_channel.
+    With beacon_window > 0, beacons go through prn.aggregator (see
+    beaconagg.py) instead; call prn.aggregator.flush_all() when done.
     """
-    def prn(pkt):
-        if not pkt.haslayer(Dot11):
+    console_every = max(1, console_every)
+    parse = dot11raw.parse_frame if parser == "raw" else dot11_fields
+    emit = emit or enqueue_entry
+    aggregator = BeaconAggregator(beacon_window, emit) if beacon_window > 0 else None
+    seen = 0
+
+    def prn(pkt, ts=None, gps=None, wire_len=None, tuned=None):
+        global _console_frames
+        nonlocal seen
+        fields = parse(pkt)
+        if fields is None:
             return
-            
-        ts = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        src = getattr(pkt, "addr2", None)
-        dst = getattr(pkt, "addr1", None)
-        ssid = ssid_from(pkt)
-        rssi = rssi_from(pkt)
-        length = len(pkt) if pkt else 0
-        ext = {0: "management", 1: "control", 2: "data"}.get(getattr(pkt, "type", None), "unknown")
-        itn = str(getattr(pkt, "subtype", ""))
-        ip_src, ip_dst, sp, dp = ip_ports(pkt)
-        
-        # Extract encryption info
-        enc_type, auth_mode = get_encryption_info(pkt)
 
-        with _gps_lock:
-            glat = _gps_lat if _gps_lat is not None else None
-            glon = _gps_lon if _gps_lon is not None else None
+        t = ts if ts is not None else time.time()
+        ts = datetime.fromtimestamp(t).strftime("%Y-%m-%d %H:%M:%S")
+        (src, dst, ssid, enc_type, auth_mode, rssi, length, ext, itn,
+         ip_src, ip_dst, sp, dp, channel) = fields
+        if wire_len is not None:
+            length = wire_len
+        if channel is None:
+            # No RadioTap channel field: use the channel we are tuned to
+            channel = tuned if tuned is not None else _current_channel
+        if _hopping:
+            hop_count_frame(src if ext == "management" and itn == "8" else None)
+
+        if gps is not None:
+            glat, glon = gps
+        else:
+            with _gps_lock:
+                glat = _gps_lat if _gps_lat is not None else None
+                glon = _gps_lon if _gps_lon is not None else None
 
         if not ssid:
             ssid = "(hidden)"
@@ -336,30 +1082,323 @@ def make_printer(sniff_type_value, project_id):
             ip_dst,          # dstIP
             sp,              # srcPort
             dp,              # dstPort
-            sniff_type_value # sniffType
+            sniff_type_value,# sniffType
+            channel,         # channel
+            None,            # frameCount  (set on aggregated beacon rows)
+            None,            # rssiMin
+            None,            # rssiMax
+            None             # lastSeen
         )
         
         # Queue for database insertion
-        db_queue.put(entry)
-        
-        # Print to console as CSV
-        csv_row = [
-            ts, src, dst, ssid, enc_type, auth_mode,
-            glat, glon, rssi, length, ext, itn,
-            ip_src, ip_dst, sp, dp, sniff_type_value
-        ]
-        print(",".join(csvq(x) for x in csv_row), flush=True)
-        print(db_queue.qsize())
+        if aggregator is not None and ext == "management" and itn == "8":
+            aggregator.add(entry, t)
+        else:
+            emit(entry)
+
+        if console == "summary":
+            with _console_lock:
+                _console_frames += 1
+                _console_ssids[ssid] = _console_ssids.get(ssid, 0) + 1
+        elif console == "full" or (console == "sampled" and seen % console_every == 0):
+            # Print to console as CSV (entry minus projectID)
+            print(",".join(csvq(x) for x in entry[1:]), flush=True)
+        seen += 1
+
+    prn.aggregator = aggregator
 
     return prn
 
+# Raw capture
+
+ETH_P_ALL = 0x0003
+PACKET_OUTGOING = 4
+
+def open_capture_socket(iface, bpf=None):
+    """
+    Open an AF_PACKET socket on iface with the BPF filter attached the
+    same way scapy.sniff(filter=...) does it.
+    """
+    sock = socket.socket(socket.AF_PACKET, socket.SOCK_RAW, socket.htons(ETH_P_ALL))
+    try:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4 * 1024 * 1024)
+        if bpf:
+            from scapy.arch.linux import attach_filter
+            attach_filter(sock, bpf, iface)
+        sock.bind((iface, ETH_P_ALL))
+    except OSError:
+        sock.close()
+        raise
+    return sock
+
+def raw_sniff(iface, prn, bpf=None):
+    """
+    Minimal replacement for scapy.sniff() used with --parser raw: read
+    frames from an AF_PACKET socket and hand the raw bytes to prn without
+    any Scapy dissection. Runs until KeyboardInterrupt.
+    """
+    sock = open_capture_socket(iface, bpf)
+    try:
+        while True:
+            data, addr = sock.recvfrom(65535)
+            if addr[2] == PACKET_OUTGOING:
+                continue
+            prn(data)
+    finally:
+        sock.close()
+
+# Multi-process pipeline (--pipeline)
+#
+#   capture process --(shared-memory FrameRing)--> N parser processes
+#                   --(chunks of entries, multiprocessing.Queue)--> writer process
+
+PARSER_CHUNK_ROWS = 256
+PARSER_CHUNK_MS = 100
+
+_pipeline_captured = 0
+
+def default_workers():
+    """Leave one core for capture and one for the writer; parse on the rest."""
+    return max(1, (os.cpu_count() or 1) - 2)
+
+def _ignore_sigint():
+    # Ctrl+C reaches the whole process group; only the capture process
+    # handles it and then shuts the children down in order.
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+def parser_worker(ring, out_q, project_id, sniff_type_value, console, console_every,
+                  beacon_window=0):
+    """
+    Parser process: take raw frames from the ring, build entry tuples with
+    the raw parser and pass them to the writer in chunks, under the
+    --overload policy (enqueue_chunk).
+    """
+    global db_queue
+    _ignore_sigint()
+    db_queue = out_q
+    chunk = []
+    prn = make_printer(sniff_type_value, project_id,
+                       console if console in ("sampled", "full") else "off",
+                       console_every, parser="raw", emit=chunk.append,
+                       beacon_window=beacon_window)
+    deadline = time.monotonic() + PARSER_CHUNK_MS / 1000.0
+    while True:
+        item = ring.get(timeout=PARSER_CHUNK_MS / 1000.0)
+        if item is None:
+            break
+        if item:
+            data, ts, lat, lon, wire_len, tuned = item
+            prn(data, ts, (lat, lon), wire_len, tuned)
+        if chunk and (len(chunk) >= PARSER_CHUNK_ROWS or time.monotonic() >= deadline):
+            enqueue_chunk(chunk[:])
+            chunk.clear()
+        if not chunk:
+            deadline = time.monotonic() + PARSER_CHUNK_MS / 1000.0
+    if prn.aggregator is not None:
+        prn.aggregator.flush_all()
+    if chunk:
+        enqueue_chunk(chunk[:])
+
+def writer_process(out_q, project_id, batch_rows, batch_ms, spool_opts=None):
+    """
+    Writer process: the batched db_writer_thread, fed by the parser
+    processes. spool_opts are start_spool() arguments when --spool is used.
+    """
+    global db_queue
+    _ignore_sigint()
+    db_queue = out_q
+    spooling = start_spool(*spool_opts) if spool_opts else None
+    db_writer_thread(project_id, batch_rows, batch_ms, spooling[0] if spooling else None)
+    print_writer_stats()
+    if spooling:
+        stop_spool(*spooling, spool_opts[-1])
+
+def start_pipeline(project_id, sniff_type_value, workers, batch_rows, batch_ms,
+                   queue_size, ring_slots, console="summary", console_every=100,
+                   spool_opts=None, beacon_window=0):
+    """
+    Fork the writer and parser processes. Call before starting any threads.
+    Returns (ring, out_q, writer, parsers) for pipeline_capture/stop_pipeline.
+    """
+    ctx = multiprocessing.get_context("fork")
+    ring = FrameRing(ctx, ring_slots)
+    share_drop_counters(ctx)
+    out_q = ctx.Queue(maxsize=max(1, queue_size // PARSER_CHUNK_ROWS))
+    writer = ctx.Process(target=writer_process, name="scan-writer",
+                         args=(out_q, project_id, batch_rows, batch_ms, spool_opts), daemon=True)
+    writer.start()
+    parsers = []
+    for i in range(workers):
+        p = ctx.Process(target=parser_worker, name=f"scan-parser-{i}",
+                        args=(ring, out_q, project_id, sniff_type_value, console, console_every,
+                              beacon_window),
+                        daemon=True)
+        p.start()
+        parsers.append(p)
+    return ring, out_q, writer, parsers
+
+def _beacon_bssid(buf, n):
+    """Transmitter address bytes of a RadioTap-framed beacon in buf[:n], else None."""
+    if n < 4:
+        return None
+    o = buf[2] | buf[3] << 8  # RadioTap it_len
+    if n < o + 16 or buf[o] != 0x80:  # frame control: management, subtype 8
+        return None
+    return bytes(buf[o + 10:o + 16])
+
+def pipeline_capture(iface, ring, bpf=None):
+    """
+    Capture process: receive frames straight into ring slots, stamped with
+    capture time, the current GPS fix and the channel the hopper (a thread
+    of this process) is on. Nothing is parsed here beyond spotting beacons
+    for the hopper's AP count. Frames
+    longer than a slot (A-MSDU/VHT aggregates) keep their first FRAME_MAX
+    bytes and their real length; MSG_TRUNC makes recvfrom_into report it.
+    """
+    global _pipeline_captured
+    sock = open_capture_socket(iface, bpf)
+    try:
+        while True:
+            view = ring.slot_view()
+            if view is None:
+                sock.recv(65535)  # ring full: drop
+                ring.dropped += 1
+                continue
+            n, addr = sock.recvfrom_into(view, 0, socket.MSG_TRUNC)
+            if addr[2] == PACKET_OUTGOING:
+                continue
+            with _gps_lock:
+                glat, glon = _gps_lat, _gps_lon
+            ring.commit(n, time.time(), glat, glon, _current_channel)
+            if _hopping:
+                hop_count_frame(_beacon_bssid(view, min(n, len(view))))
+            _pipeline_captured += 1
+    finally:
+        sock.close()
+
+def pipeline_summary_thread(ring, out_q, interval=1.0):
+    """--console summary for the pipeline: capture rate, ring and writer queue depth."""
+    last_n, last_t = 0, time.monotonic()
+    while True:
+        time.sleep(interval)
+        n, now = _pipeline_captured, time.monotonic()
+        rate = (n - last_n) / (now - last_t) if now > last_t else 0.0
+        last_n, last_t = n, now
+        dropped = sum(v for k, v in dropped_stats().items() if k != "block")
+        print(f"[{datetime.now().strftime('%H:%M:%S')}] {rate:.0f} frames/s | "
+              f"ring {ring.used()}/{ring.slots} | ring drops {ring.dropped} | "
+              f"truncated {ring.truncated} | "
+              f"writer queue {out_q.qsize()} chunks | dropped {dropped}", flush=True)
+
+def stop_pipeline(ring, out_q, writer, parsers, writer_timeout=15):
+    """Drain the ring, then the writer, then release the shared memory."""
+    ring.close_consumers(len(parsers))
+    for p in parsers:
+        p.join(timeout=10)
+    put_while_writer_runs(None, out_q, writer.is_alive)
+    writer.join(timeout=writer_timeout)
+    print(f"[*] Pipeline: {_pipeline_captured} frames captured, {ring.dropped} dropped (ring full), "
+          f"{ring.truncated} truncated to {FRAME_MAX} bytes")
+    ring.close(unlink=True)
+
+# Offline replay (--pcap)
+
+PCAP_SUFFIXES = (".pcap", ".pcapng", ".cap")
+DLT_IEEE802_11_RADIO = 127  # RadioTap, what a monitor-mode interface captures
+NO_GPS = (None, None)
+
+def expand_pcaps(specs):
+    """
+    Turn --pcap arguments (files, directories, globs) into a sorted,
+    de-duplicated list of capture files.
+    """
+    paths = []
+    for spec in specs:
+        if os.path.isdir(spec):
+            paths.extend(sorted(os.path.join(spec, f) for f in os.listdir(spec)
+                                if f.lower().endswith(PCAP_SUFFIXES)))
+        elif os.path.isfile(spec):
+            paths.append(spec)
+        else:
+            paths.extend(sorted(p for p in glob.glob(spec) if os.path.isfile(p)))
+    return list(dict.fromkeys(paths))
+
+def pcap_frames(path):
+    """
+    Yield (frame bytes, capture time) for every RadioTap frame in a pcap or
+    pcapng file. Frames with another link type are skipped.
+    """
+    with RawPcapReader(path) as reader:
+        for data, meta in reader:
+            if hasattr(meta, "tshigh"):  # pcapng
+                if meta.linktype != DLT_IEEE802_11_RADIO:
+                    continue
+                ts = ((meta.tshigh << 32) | meta.tslow) / meta.tsresol
+            else:
+                if reader.linktype != DLT_IEEE802_11_RADIO:
+                    print(f"[!] {path}: link type {reader.linktype} is not RadioTap, skipped",
+                          file=sys.stderr)
+                    return
+                ts = meta.sec + meta.usec / (1e9 if reader.nano else 1e6)
+            yield data, ts
+
+def first_pcap_time(paths):
+    """Capture time of the first frame in paths, or None."""
+    for path in paths:
+        try:
+            for _data, ts in pcap_frames(path):
+                return datetime.fromtimestamp(ts)
+        except (OSError, Scapy_Exception):
+            continue
+    return None
+
+def replay_pcaps(paths, handle, pace="max", speed=1.0):
+    """
+    Feed every frame in `paths` to handle(data, ts), in file order.
+    pace="max" goes as fast as the handler allows; pace="realtime" sleeps
+    to reproduce the original gaps between frames (divided by `speed`).
+    Returns (frames, first_ts, last_ts).
+    """
+    frames = 0
+    first = last = None
+    base_ts = base_wall = None
+    for path in paths:
+        print(f"[*] Replaying {path}")
+        try:
+            for data, ts in pcap_frames(path):
+                if pace == "realtime":
+                    if base_ts is None or ts < last:  # start, or a file that goes back in time
+                        base_ts, base_wall = ts, time.monotonic()
+                    delay = (ts - base_ts) / speed - (time.monotonic() - base_wall)
+                    if delay > 0:
+                        time.sleep(delay)
+                handle(data, ts)
+                frames += 1
+                if first is None:
+                    first = ts
+                last = ts
+        except (OSError, Scapy_Exception) as e:
+            print(f"[!] Cannot read {path}: {e}", file=sys.stderr)
+    return frames, first, last
+
+def ring_feeder(ring):
+    """
+    Replay handler for --pipeline: copy frames into the ring, waiting for a
+    free slot instead of dropping so a replay is reproducible.
+    """
+    def handle(data, ts):
+        global _pipeline_captured
+        while (view := ring.slot_view()) is None:
+            time.sleep(0.0005)
+        n = min(len(data), len(view))
+        view[:n] = data[:n]
+        ring.commit(len(data), ts)
+        _pipeline_captured += 1
+    return handle
+
 # main
 
 def main():
-    if os.geteuid() != 0:
-        print("Run with sudo.")
-        sys.exit(1)
-
     parser = argparse.ArgumentParser(
         description="Sniff all WiFi traffic and write to MySQL database (with GPS)."
     )
@@ -368,7 +1407,15 @@ def main():
     parser.add_argument("-p", "--project", type=int, default=None,
                         help="Project ID (optional - will create new project if not specified)")
     parser.add_argument("-c", "--channel", type=int, default=None,
-                        help="set specific channel (optional, omit to scan all channels)")
+                        help="set specific channel (optional, omit to hop over --channels)")
+    parser.add_argument("--channels", default="all",
+                        help="channels to hop over: 2.4ghz, 5ghz, all or a list like 1,6,11 or 36-48 (default: all)")
+    parser.add_argument("--dwell", type=float, default=0.3,
+                        help="base dwell time per channel in seconds (default: 0.3)")
+    parser.add_argument("--hop-weighting", choices=("adaptive", "fixed"), default="adaptive",
+                        help="scale dwell by observed frames/APs per channel, or use a fixed dwell (default: adaptive)")
+    parser.add_argument("--no-hop", action="store_true",
+                        help="without -c, stay on the driver's current channel instead of hopping")
     parser.add_argument("--host", default="localhost",
                         help="MySQL host (default: localhost)")
     parser.add_argument("--user", default="root",
@@ -380,19 +1427,84 @@ def main():
                        help="set sniffType to 'internal'")
     group.add_argument("-e", "--external", action="store_true",
                        help="set sniffType to 'external'")
+    parser.add_argument("--batch-rows", type=int, default=500,
+                        help="flush the DB writer after this many rows (default: 500)")
+    parser.add_argument("--batch-ms", type=int, default=250,
+                        help="flush the DB writer after this many milliseconds (default: 250)")
+    parser.add_argument("--stats-interval", type=float, default=0,
+                        help="print writer counters every N seconds (default: 0 = only on exit)")
+    parser.add_argument("--queue-size", type=int, default=DEFAULT_QUEUE_SIZE,
+                        help=f"max entries waiting for the DB writer (default: {DEFAULT_QUEUE_SIZE})")
+    parser.add_argument("--overload", choices=OVERLOAD_POLICIES, default="block",
+                        help="what to do when the queue is full (default: block)")
+    parser.add_argument("--sample-n", type=int, default=10,
+                        help="with --overload sample, keep 1 in N frames while the queue is over half full (default: 10)")
+    parser.add_argument("--bpf", default=None,
+                        help="extra kernel BPF/libpcap filter expression, ANDed with --types/--subtypes")
+    parser.add_argument("--types", default=None,
+                        help="comma-separated frame types to capture: mgmt,ctrl,data (default: all)")
+    parser.add_argument("--subtypes", default=None,
+                        help="comma-separated frame subtypes, e.g. beacon,probe-resp (narrows their type)")
+    parser.add_argument("--parser", choices=PARSERS, default="scapy",
+                        help="frame parsing engine: full Scapy dissection or the raw byte parser (default: scapy)")
+    parser.add_argument("--console", choices=CONSOLE_MODES, default="summary",
+                        help="console output: off, sampled CSV, 1s summary or full CSV (default: summary)")
+    parser.add_argument("--console-every", type=int, default=100,
+                        help="with --console sampled, print every Nth frame (default: 100)")
+    parser.add_argument("--pipeline", action="store_true",
+                        help="capture, parse and write in separate processes (always uses the raw parser)")
+    parser.add_argument("--workers", type=int, default=default_workers(),
+                        help=f"with --pipeline, number of parser processes (default: {default_workers()})")
+    parser.add_argument("--ring-slots", type=int, default=4096,
+                        help="with --pipeline, frames the shared-memory capture ring can hold (default: 4096)")
+    parser.add_argument("--pcap", action="append", default=None, metavar="PATH",
+                        help="replay RadioTap pcap/pcapng files instead of capturing live: a file, directory or glob (repeatable)")
+    parser.add_argument("--pace", choices=("max", "realtime"), default="max",
+                        help="with --pcap, replay as fast as possible or with the original timing (default: max)")
+    parser.add_argument("--speed", type=float, default=1.0,
+                        help="with --pace realtime, speed-up factor (default: 1.0)")
+    parser.add_argument("--beacon-window", type=float, default=0,
+                        help="collapse beacons per (BSSID, SSID, channel) into one row per N seconds (default: 0 = off)")
+    parser.add_argument("--rollup-interval", type=float, default=5.0,
+                        help="refresh the per-project SSID/MAC rollups every N seconds of writing (default: 5, 0 = off)")
+    parser.add_argument("--spool", default=None, metavar="DIR",
+                        help="write rows to a local spool in DIR first and upload them in the background")
+    parser.add_argument("--spool-segment-mb", type=int, default=16,
+                        help="with --spool, start a new segment file after this many MB (default: 16)")
+    parser.add_argument("--spool-drain", type=float, default=10.0,
+                        help="with --spool, seconds to keep uploading after Ctrl+C (default: 10)")
     args = parser.parse_args()
 
+    if os.geteuid() != 0 and not args.pcap:
+        print("Run with sudo.")
+        sys.exit(1)
+
     iface = args.iface
     project_id = args.project
     sniff_type_value = "internal" if (args.internal or not args.external) else "external"
+    configure_queue(args.queue_size, args.overload, args.sample_n)
+    configure_rollups(args.rollup_interval)
+    try:
+        bpf = build_bpf(args.types, args.subtypes, args.bpf)
+        hop_channels = parse_channels(args.channels)
+    except ValueError as e:
+        parser.error(str(e))
+    pcaps = None
+    if args.pcap:
+        pcaps = expand_pcaps(args.pcap)
+        if not pcaps:
+            parser.error("--pcap: no capture files found")
+        if args.speed <= 0:
+            parser.error("--speed must be positive")
+    created_project = project_id is None
 
     # Create or use existing project
     try:
         temp_conn = mysql.connector.connect(**DB_CONFIG)
         if temp_conn.is_connected():
             if project_id is None:
-                # Create new project
-                project_id = create_project(temp_conn)
+                # Create new project (a replayed one starts at its first frame)
+                project_id = create_project(temp_conn, first_pcap_time(pcaps) if pcaps else None)
             else:
                 print(f"[*] Using existing project ID: {project_id}")
             temp_conn.close()
@@ -401,58 +1513,151 @@ def main():
             sys.exit(1)
     except Error as e:
         print(f"[!] Database connection error: {e}", file=sys.stderr)
-        sys.exit(1)
+        if not (args.spool and project_id is not None):
+            if args.spool:
+                print("[!] Pass -p PROJECT to capture into the spool while the database is down",
+                      file=sys.stderr)
+            sys.exit(1)
+        print(f"[*] Capturing into the spool for project {project_id}; rows are uploaded once the database is back")
+    spool_opts = None
+    if args.spool:
+        spool_opts = (args.spool, args.spool_segment_mb, args.batch_rows, args.batch_ms, args.spool_drain)
 
-    # Set monitor mode
-    print(f"[*] Setting {iface} to monitor mode...")
-    set_monitor(iface)
-    
-    # Set channel if specified
-    if args.channel:
-        print(f"[*] Setting channel to {args.channel}")
-        run_quiet(["iw", "dev", iface, "set", "channel", str(args.channel)])
-        time.sleep(0.2)
-    else:
-        print("[*] Scanning all channels (no specific channel set)")
+    if not pcaps:
+        # Set monitor mode
+        print(f"[*] Setting {iface} to monitor mode...")
+        set_monitor(iface)
 
-    # Start GPS thread
-    print("[*] Starting GPS thread...")
-    threading.Thread(target=gps_thread, daemon=True).start()
+        # Set channel if specified
+        if args.channel:
+            print(f"[*] Setting channel to {args.channel}")
+            set_channel(iface, args.channel)
+            time.sleep(0.2)
+        elif args.no_hop:
+            print("[*] Staying on the current channel (no specific channel set)")
+
+    # Fork the pipeline processes before any threads are running
+    pipeline = None
+    if args.pipeline:
+        workers = max(1, args.workers)
+        print(f"[*] Starting pipeline: {workers} parser process(es) + writer process...")
+        pipeline = start_pipeline(project_id, sniff_type_value, workers,
+                                  args.batch_rows, args.batch_ms, args.queue_size,
+                                  max(2, args.ring_slots), args.console, args.console_every,
+                                  spool_opts, args.beacon_window)
+
+    # Start GPS thread (replayed frames carry no position)
+    if not pcaps:
+        print("[*] Starting GPS thread...")
+        threading.Thread(target=gps_thread, daemon=True).start()
+
+    # Start channel hopper
+    if not pcaps and not args.channel and not args.no_hop:
+        print(f"[*] Hopping over {len(hop_channels)} channels "
+              f"({args.hop_weighting} dwell, base {args.dwell}s)...")
+        threading.Thread(target=channel_hopper_thread,
+                         args=(iface, hop_channels, args.dwell, args.hop_weighting == "adaptive"),
+                         daemon=True).start()
 
     # Start database writer thread
-    print("[*] Starting database writer thread...")
-    db_thread = threading.Thread(target=db_writer_thread, args=(project_id,), daemon=True)
-    db_thread.start()
-
-    # Print CSV header
-    header = [
-        "captureTime", "srcMac", "dstMac", "SSID", "encType", "authMode",
-        "gpsLat", "gpsLong", "strength", "contentLength", "typeExternal", "typeInternal",
-        "srcIP", "dstIP", "srcPort", "dstPort", "sniffType"
-    ]
-    print(",".join(header), flush=True)
-
-    # Live sniff with Scapy (until Ctrl+C)
-    print(f"[*] Starting capture on {iface} for project {project_id}... (Press Ctrl+C to stop)")
+    db_thread = None
+    spooling = None
+    if pipeline is None:
+        if spool_opts:
+            print(f"[*] Spooling to {args.spool}, starting uploader...")
+            spooling = start_spool(*spool_opts)
+        print("[*] Starting database writer thread...")
+        db_thread = threading.Thread(target=db_writer_thread,
+                                     args=(project_id, args.batch_rows, args.batch_ms,
+                                           spooling[0] if spooling else None),
+                                     daemon=True)
+        db_thread.start()
+        if args.stats_interval > 0:
+            threading.Thread(target=stats_thread, args=(args.stats_interval,), daemon=True).start()
+
+    # Console output
+    if args.console == "summary":
+        if pipeline is not None:
+            threading.Thread(target=pipeline_summary_thread, args=(pipeline[0], pipeline[1]),
+                             daemon=True).start()
+        else:
+            threading.Thread(target=console_summary_thread, daemon=True).start()
+    elif args.console in ("sampled", "full"):
+        # Print CSV header
+        print(",".join(CSV_HEADER), flush=True)
+
+    prn = None if pipeline is not None else make_printer(sniff_type_value, project_id, args.console,
+                                                         args.console_every, args.parser,
+                                                         beacon_window=args.beacon_window)
+    if args.beacon_window > 0:
+        print(f"[*] Aggregating beacons into {args.beacon_window:g}s windows per (BSSID, SSID, channel)")
+    stop_time = None
     try:
-        sniff(iface=iface, prn=make_printer(sniff_type_value, project_id), store=False)
-    except KeyboardInterrupt:
-        print("\n[*] Stopping capture...")
-        # Send poison pill to stop db thread
-        db_queue.put(None)
-        db_thread.join(timeout=5)
-        
-        # Update project stop time
         try:
-            temp_conn = mysql.connector.connect(**DB_CONFIG)
-            if temp_conn.is_connected():
-                update_project_stop_time(temp_conn, project_id)
-                temp_conn.close()
-        except Error as e:
-            print(f"[!] Failed to update project stop time: {e}", file=sys.stderr)
+            if pcaps:
+                # Offline replay through the same printer / pipeline (until done or Ctrl+C)
+                if bpf:
+                    print("[!] --types/--subtypes/--bpf are ignored with --pcap", file=sys.stderr)
+                print(f"[*] Replaying {len(pcaps)} capture file(s) for project {project_id} "
+                      f"({args.pace} pace)... (Press Ctrl+C to stop)")
+                if pipeline is not None:
+                    handle = ring_feeder(pipeline[0])
+                elif args.parser == "raw":
+                    handle = lambda data, ts: prn(data, ts, NO_GPS)
+                else:
+                    handle = lambda data, ts: prn(RadioTap(data), ts, NO_GPS)
+                t0 = time.monotonic()
+                frames, first_ts, last_ts = replay_pcaps(pcaps, handle, args.pace, args.speed)
+                elapsed = time.monotonic() - t0
+                print(f"[*] Replayed {frames} frames in {elapsed:.2f}s "
+                      f"({frames / elapsed if elapsed > 0 else 0:,.0f} frames/s)")
+                if created_project and last_ts is not None:
+                    stop_time = datetime.fromtimestamp(last_ts)
+            else:
+                # Live sniff (until Ctrl+C)
+                if bpf:
+                    print(f"[*] Kernel capture filter: {bpf}")
+                print(f"[*] Starting capture on {iface} for project {project_id}... (Press Ctrl+C to stop)")
+                # The filter is compiled to BPF and attached to the capture socket, so
+                # unwanted frames are dropped in the kernel before reaching Python
+                if pipeline is not None:
+                    pipeline_capture(iface, pipeline[0], bpf)
+                elif args.parser == "raw":
+                    raw_sniff(iface, prn, bpf)
+                else:
+                    sniff(iface=iface, prn=prn, filter=bpf, store=False)
+        except KeyboardInterrupt:
+            print("\n[*] Stopping capture...")
+
+        print_hopper_stats()
+        if prn is not None and prn.aggregator is not None:
+            agg = prn.aggregator
+            agg.flush_all()
+            print(f"[*] Beacon aggregation: {agg.beacons} beacons -> {agg.rows} rows")
+        if pipeline is not None:
+            # Parsers drain the ring, then the writer process flushes and reports
+            stop_pipeline(*pipeline, writer_timeout=15 + (args.spool_drain if spool_opts else 0))
+        else:
+            # Send poison pill to stop db thread; a replay waits for every row
+            put_while_writer_runs(None, alive=db_thread.is_alive)
+            db_thread.join(timeout=None if pcaps or spooling else 5)
+            print_writer_stats()
+            if spooling:
+                stop_spool(*spooling, args.spool_drain)
+
+        # Update project stop time (a replay into an existing project leaves it alone)
+        if not pcaps or stop_time is not None:
+            try:
+                temp_conn = mysql.connector.connect(**DB_CONFIG)
+                if temp_conn.is_connected():
+                    update_project_stop_time(temp_conn, project_id, stop_time)
+                    temp_conn.close()
+            except Error as e:
+                print(f"[!] Failed to update project stop time: {e}", file=sys.stderr)
     finally:
         # Leave managed for convenience
-        set_managed(iface)
+        if not pcaps:
+            set_managed(iface)
         print("[*] Done.")
 
 if __name__ == "__main__":
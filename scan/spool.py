@@ -0,0 +1,190 @@
+"""
+Append-only local spool for scan.py (--spool DIR).
+
+The DB writer appends every batch of IngestDB entries here before anything
+touches MySQL; a separate uploader reads them back in order and inserts
+them, so capture keeps going while the database is slow or down and rows
+survive a restart.
+
+Layout of DIR:
+  seg-000000000001.spool ...  segment files, each a run of records
+                                length (u32 LE) | crc32 (u32 LE) | JSON array (one entry)
+  checkpoint                  {"segment": n, "offset": bytes} of the first record
+                              not yet uploaded, replaced atomically
+
+A new segment is started at every open and whenever the current one passes
+segment_bytes; segments before the checkpoint are deleted. Delivery is
+at-least-once: rows committed just before a crash, whose checkpoint was not
+yet written, are uploaded again on the next start. A corrupt record in a
+finished segment is skipped up to the next intact record; the bytes lost
+are counted in Spool.skipped_bytes.
+"""
+
+import json
+import os
+import struct
+import zlib
+
+_REC = struct.Struct("<II")
+_PREFIX, _SUFFIX = "seg-", ".spool"
+CHECKPOINT = "checkpoint"
+READ_CHUNK = 4 * 1024 * 1024
+
+
+def _next_record(data, i):
+    """Offset of the first intact record in data after offset i, or len(data)."""
+    k = data.find(b"[", i + 1 + _REC.size)  # every payload is a JSON array
+    while k != -1:
+        j = k - _REC.size
+        length, crc = _REC.unpack_from(data, j)
+        if k + length <= len(data) and zlib.crc32(data[k:k + length]) == crc:
+            return j
+        k = data.find(b"[", k + 1)
+    return len(data)
+
+
+class Spool:
+    def __init__(self, directory, segment_bytes=16 * 1024 * 1024, fsync=True):
+        os.makedirs(directory, exist_ok=True)
+        self.dir = directory
+        self.segment_bytes = segment_bytes
+        self.fsync = fsync
+        segs = self.segments()
+        # Never append to an old segment: it may end in a torn record
+        self._next_seq = (segs[-1] + 1) if segs else 1
+        self._fh = None
+        self.skipped_bytes = 0  # uploader side: corrupt bytes skipped by read()
+
+    def _path(self, seq):
+        return os.path.join(self.dir, f"{_PREFIX}{seq:012d}{_SUFFIX}")
+
+    def segments(self):
+        """Sequence numbers of the segment files on disk, oldest first."""
+        seqs = []
+        for name in os.listdir(self.dir):
+            if name.startswith(_PREFIX) and name.endswith(_SUFFIX):
+                try:
+                    seqs.append(int(name[len(_PREFIX):-len(_SUFFIX)]))
+                except ValueError:
+                    pass
+        return sorted(seqs)
+
+    # ---- writer side ----
+
+    def _rotate(self):
+        if self._fh is not None:
+            self._fh.close()
+        self._fh = open(self._path(self._next_seq), "ab")
+        self._next_seq += 1
+
+    def append(self, entries):
+        """Append entries (tuples/lists of JSON-able values) as one write."""
+        if self._fh is None or self._fh.tell() >= self.segment_bytes:
+            self._rotate()
+        parts = []
+        for entry in entries:
+            payload = json.dumps(entry, separators=(",", ":")).encode()
+            parts.append(_REC.pack(len(payload), zlib.crc32(payload)))
+            parts.append(payload)
+        self._fh.write(b"".join(parts))
+        self._fh.flush()
+        if self.fsync:
+            os.fsync(self._fh.fileno())
+
+    def close(self):
+        if self._fh is not None:
+            self._fh.close()
+            self._fh = None
+
+    # ---- uploader side ----
+
+    def load_checkpoint(self):
+        """(segment, offset) to resume uploading from."""
+        try:
+            with open(os.path.join(self.dir, CHECKPOINT)) as f:
+                cp = json.load(f)
+            return int(cp["segment"]), int(cp["offset"])
+        except (OSError, ValueError, KeyError, TypeError):
+            segs = self.segments()
+            return (segs[0] if segs else 1), 0
+
+    def save_checkpoint(self, pos):
+        path = os.path.join(self.dir, CHECKPOINT)
+        tmp = path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump({"segment": pos[0], "offset": pos[1]}, f)
+            f.flush()
+            if self.fsync:
+                os.fsync(f.fileno())
+        os.replace(tmp, path)
+
+    def purge(self, pos):
+        """Delete segments that lie entirely before pos."""
+        for seq in self.segments():
+            if seq >= pos[0]:
+                break
+            try:
+                os.remove(self._path(seq))
+            except OSError:
+                pass
+
+    def read(self, pos, max_records):
+        """
+        Return (entries, next_pos) for up to max_records complete records
+        starting at pos. Moves on to the next segment once the current one
+        is exhausted and a newer one exists. In such an older segment
+        nothing is being written any more, so a torn or corrupt record is
+        skipped up to the next intact one and counted in skipped_bytes.
+        """
+        seq, off = pos
+        while True:
+            newer = [s for s in self.segments() if s > seq]
+            try:
+                with open(self._path(seq), "rb") as f:
+                    f.seek(off)
+                    data = f.read(READ_CHUNK)
+            except FileNotFoundError:
+                if not newer:
+                    return [], (seq, off)
+                seq, off = newer[0], 0
+                continue
+
+            entries = []
+            i = 0
+            whole = False
+            while len(entries) < max_records and i + _REC.size <= len(data):
+                length, crc = _REC.unpack_from(data, i)
+                start = i + _REC.size
+                payload = data[start:start + length]
+                if len(payload) < length or zlib.crc32(payload) != crc:
+                    if entries or not newer:
+                        break  # still being written, or torn; resync on the next call
+                    if not whole:
+                        with open(self._path(seq), "rb") as f:
+                            f.seek(off)
+                            data = f.read()
+                        whole = True
+                    j = _next_record(data, i)
+                    self.skipped_bytes += j - i
+                    i = j
+                    continue
+                entries.append(json.loads(payload))
+                i = start + length
+            if entries or not newer:
+                return entries, (seq, off + i)
+            # Nothing more here and a newer segment exists: this one is done
+            self.skipped_bytes += len(data) - i  # a torn header at the very end
+            seq, off = newer[0], 0
+
+    def pending_bytes(self, pos):
+        """Spooled bytes not yet uploaded."""
+        total = 0
+        for seq in self.segments():
+            if seq < pos[0]:
+                continue
+            try:
+                size = os.path.getsize(self._path(seq))
+            except OSError:
+                continue
+            total += size - (pos[1] if seq == pos[0] else 0)
+        return max(0, total)
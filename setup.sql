@@ -11,7 +11,7 @@ FLUSH PRIVILEGES;
 
 
 -- Create ProjectDB table
-CREATE TABLE ProjectDB (
+CREATE TABLE IF NOT EXISTS ProjectDB (
     ID INT PRIMARY KEY AUTO_INCREMENT,
     startTime DATETIME NOT NULL,
     stopTime DATETIME,
@@ -19,8 +19,12 @@ CREATE TABLE ProjectDB (
 );
 
 -- Create IngestDB table
-CREATE TABLE IngestDB (
-    ID INT PRIMARY KEY AUTO_INCREMENT,
+-- Partitioned by project: one RANGE partition per project, added by
+-- EnsureProjectPartition() when the project is created. Partitioned InnoDB
+-- tables cannot have foreign keys, so projectID is not enforced against
+-- ProjectDB, and the primary key has to include projectID.
+CREATE TABLE IF NOT EXISTS IngestDB (
+    ID INT AUTO_INCREMENT,
     projectID INT NOT NULL,
     captureTime DATETIME NOT NULL,
     srcMac VARCHAR(17) NOT NULL,  -- MAC address format: XX:XX:XX:XX:XX:XX
@@ -28,8 +32,8 @@ CREATE TABLE IngestDB (
     SSID VARCHAR(255),
     encType VARCHAR(10) CHECK (encType IN ('Public', 'WPA', 'WPA2', 'WPA3')),
     authMode VARCHAR(20) CHECK (authMode IN ('PSK', 'Enterprise')),
-    gpsLat INT,
-    gpsLong INT,
+    gpsLat DOUBLE,
+    gpsLong DOUBLE,
     strength INT,
     contentLength INT,  -- Length in Bytes
     typeExternal VARCHAR(50),  -- DataFrame / RST / CST / Broadcast (maybe more)
@@ -39,7 +43,350 @@ CREATE TABLE IngestDB (
     srcPort INT CHECK (srcPort >= 0 AND srcPort <= 65535),
     dstPort INT CHECK (dstPort >= 0 AND dstPort <= 65535),
     sniffType VARCHAR(10) CHECK (sniffType IN ('internal', 'external')),
-    
-    -- Foreign key constraint
-    CONSTRAINT fk_project FOREIGN KEY (projectID) REFERENCES ProjectDB(ID)
-);
\ No newline at end of file
+    channel SMALLINT,  -- 802.11 channel the frame was captured on
+    frameCount INT,  -- Beacons collapsed into this row by scan.py --beacon-window (NULL = one frame)
+    rssiMin INT,
+    rssiMax INT,
+    lastSeen DATETIME,  -- Last beacon in the window (captureTime is the first)
+
+    PRIMARY KEY (ID, projectID),
+
+    -- Indexes for the dashboard / report queries (see explain_check.py)
+    INDEX idx_project_ssid_mac_time (projectID, SSID, srcMac, captureTime),
+    INDEX idx_project_time (projectID, captureTime),
+    INDEX idx_ssid_time (SSID, captureTime),
+    INDEX idx_time (captureTime),
+    INDEX idx_src_mac (srcMac),
+    INDEX idx_dst_mac (dstMac)
+)
+PARTITION BY RANGE (projectID) (
+    PARTITION pmax VALUES LESS THAN MAXVALUE
+);
+
+-- Columns added after the first release (for databases created before them)
+ALTER TABLE IngestDB ADD COLUMN IF NOT EXISTS channel SMALLINT AFTER sniffType;
+ALTER TABLE IngestDB ADD COLUMN IF NOT EXISTS frameCount INT AFTER channel;
+ALTER TABLE IngestDB ADD COLUMN IF NOT EXISTS rssiMin INT AFTER frameCount;
+ALTER TABLE IngestDB ADD COLUMN IF NOT EXISTS rssiMax INT AFTER rssiMin;
+ALTER TABLE IngestDB ADD COLUMN IF NOT EXISTS lastSeen DATETIME AFTER rssiMax;
+
+-- Schema migrations
+-- Each version is applied once and recorded in SchemaVersion, so this file
+-- is safe to run on every boot. Version 1 is everything above.
+CREATE TABLE IF NOT EXISTS SchemaVersion (
+    version INT PRIMARY KEY,
+    appliedAt DATETIME NOT NULL,
+    description VARCHAR(255)
+);
+
+INSERT IGNORE INTO SchemaVersion VALUES (1, NOW(), 'baseline, channel and beacon aggregation columns');
+
+DELIMITER //
+
+-- 2: indexes matching the dashboard/report access paths; GPS as DOUBLE
+--    (INT truncated coordinates to whole degrees)
+BEGIN NOT ATOMIC
+    IF NOT EXISTS (SELECT 1 FROM SchemaVersion WHERE version = 2) THEN
+        ALTER TABLE IngestDB
+            MODIFY gpsLat DOUBLE,
+            MODIFY gpsLong DOUBLE;
+        CREATE INDEX IF NOT EXISTS idx_project_ssid_mac_time ON IngestDB (projectID, SSID, srcMac, captureTime);
+        CREATE INDEX IF NOT EXISTS idx_project_time ON IngestDB (projectID, captureTime);
+        CREATE INDEX IF NOT EXISTS idx_ssid_time ON IngestDB (SSID, captureTime);
+        CREATE INDEX IF NOT EXISTS idx_time ON IngestDB (captureTime);
+        CREATE INDEX IF NOT EXISTS idx_src_mac ON IngestDB (srcMac);
+        CREATE INDEX IF NOT EXISTS idx_dst_mac ON IngestDB (dstMac);
+        INSERT INTO SchemaVersion VALUES (2, NOW(), 'IngestDB query indexes, DOUBLE gpsLat/gpsLong');
+    END IF;
+END //
+
+-- 3: partition IngestDB by projectID, one partition per existing project
+BEGIN NOT ATOMIC
+    IF NOT EXISTS (SELECT 1 FROM SchemaVersion WHERE version = 3) THEN
+        IF NOT EXISTS (SELECT 1 FROM information_schema.PARTITIONS
+                       WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'IngestDB'
+                       AND PARTITION_NAME IS NOT NULL) THEN
+            IF EXISTS (SELECT 1 FROM information_schema.TABLE_CONSTRAINTS
+                       WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'IngestDB'
+                       AND CONSTRAINT_NAME = 'fk_project') THEN
+                ALTER TABLE IngestDB DROP FOREIGN KEY fk_project;
+            END IF;
+            ALTER TABLE IngestDB DROP PRIMARY KEY, ADD PRIMARY KEY (ID, projectID);
+
+            SET SESSION group_concat_max_len = 1048576;
+            SELECT GROUP_CONCAT(CONCAT('PARTITION p', pid, ' VALUES LESS THAN (', pid + 1, ')')
+                                ORDER BY pid SEPARATOR ', ')
+              INTO @parts
+              FROM (SELECT ID AS pid FROM ProjectDB
+                    UNION SELECT DISTINCT projectID FROM IngestDB) ids;
+            SET @sql = CONCAT('ALTER TABLE IngestDB PARTITION BY RANGE (projectID) (',
+                              IFNULL(CONCAT(@parts, ', '), ''),
+                              'PARTITION pmax VALUES LESS THAN MAXVALUE)');
+            PREPARE stmt FROM @sql;
+            EXECUTE stmt;
+            DEALLOCATE PREPARE stmt;
+        END IF;
+        INSERT INTO SchemaVersion VALUES (3, NOW(), 'IngestDB partitioned by projectID');
+    END IF;
+END //
+
+-- Give a new project its own IngestDB partition by splitting it off pmax.
+-- Called right after the ProjectDB insert (scan.py, ingest_client.py);
+-- a project below the highest boundary stays where it is.
+CREATE OR REPLACE PROCEDURE EnsureProjectPartition(IN pid INT)
+BEGIN
+    DECLARE top INT;
+    SELECT MAX(CAST(PARTITION_DESCRIPTION AS UNSIGNED)) INTO top
+      FROM information_schema.PARTITIONS
+     WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'IngestDB'
+       AND PARTITION_NAME <> 'pmax';
+    IF EXISTS (SELECT 1 FROM information_schema.PARTITIONS
+               WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'IngestDB'
+               AND PARTITION_NAME = 'pmax')
+       AND (top IS NULL OR pid >= top) THEN
+        SET @sql = CONCAT('ALTER TABLE IngestDB REORGANIZE PARTITION pmax INTO (',
+                          'PARTITION p', pid, ' VALUES LESS THAN (', pid + 1, '), ',
+                          'PARTITION pmax VALUES LESS THAN MAXVALUE)');
+        PREPARE stmt FROM @sql;
+        EXECUTE stmt;
+        DEALLOCATE PREPARE stmt;
+    END IF;
+END //
+
+-- 4: per-project SSID / MAC rollups, maintained from IngestDB by RefreshRollups()
+--    frames count aggregated beacon rows (scan.py --beacon-window) by frameCount;
+--    a NULL SSID is stored as ''.
+CREATE TABLE IF NOT EXISTS ProjectSSIDStats (
+    projectID INT NOT NULL,
+    SSID VARCHAR(255) NOT NULL,
+    frames BIGINT NOT NULL,
+    strengthSum BIGINT NOT NULL DEFAULT 0,  -- avg = strengthSum / strengthN
+    strengthN BIGINT NOT NULL DEFAULT 0,
+    minStrength INT,
+    maxStrength INT,
+    firstSeen DATETIME,
+    lastSeen DATETIME,
+    lastEncType VARCHAR(10),
+    lastAuthMode VARCHAR(20),
+    PRIMARY KEY (projectID, SSID),
+    INDEX idx_project_frames (projectID, frames)
+) //
+
+CREATE TABLE IF NOT EXISTS ProjectMacStats (
+    projectID INT NOT NULL,
+    SSID VARCHAR(255) NOT NULL,
+    srcMac VARCHAR(17) NOT NULL,
+    frames BIGINT NOT NULL,
+    strengthSum BIGINT NOT NULL DEFAULT 0,
+    strengthN BIGINT NOT NULL DEFAULT 0,
+    minStrength INT,
+    maxStrength INT,
+    lastStrength INT,
+    firstSeen DATETIME,
+    lastSeen DATETIME,
+    encTypes SET('Public', 'WPA', 'WPA2', 'WPA3'),  -- every value seen
+    authModes SET('PSK', 'Enterprise'),
+    lastEncType VARCHAR(10),
+    lastAuthMode VARCHAR(20),
+    PRIMARY KEY (projectID, SSID, srcMac)
+) //
+
+-- High-water mark: IngestDB rows with ID <= lastID are in the rollups,
+-- except those in RollupGaps
+CREATE TABLE IF NOT EXISTS RollupState (
+    name VARCHAR(32) PRIMARY KEY,
+    lastID BIGINT NOT NULL
+) //
+
+INSERT IGNORE INTO RollupState VALUES ('IngestDB', 0) //
+
+-- ID ranges at or below lastID that had no visible rows when the rollups
+-- were refreshed. AUTO_INCREMENT hands out IDs at insert time, not commit
+-- time, so another writer (the scan.py spool uploader, ingest_client bulk
+-- inserts, a second scanner) can still be about to commit rows there. Every
+-- refresh re-scans the gaps and folds in whatever has appeared; a gap older
+-- than an hour is given up on (rolled back inserts and IDs reserved but not
+-- used by INSERT ... SELECT / LOAD DATA never fill).
+CREATE TABLE IF NOT EXISTS RollupGaps (
+    loID BIGINT PRIMARY KEY,
+    hiID BIGINT NOT NULL,
+    seenAt DATETIME NOT NULL
+) //
+
+-- Fold the IngestDB rows listed in the temporary table RollupScan (ID,
+-- projectID; sentinel rows are skipped) into the rollups. No transaction
+-- handling of its own: RefreshRollups() and RollupsFromScratch() call it.
+-- Assignments that compare against lastSeen come before lastSeen itself:
+-- ON DUPLICATE KEY UPDATE applies them left to right.
+CREATE OR REPLACE PROCEDURE FoldRollupScan()
+BEGIN
+    INSERT INTO ProjectSSIDStats
+        (projectID, SSID, frames, strengthSum, strengthN, minStrength, maxStrength,
+         firstSeen, lastSeen, lastEncType, lastAuthMode)
+    SELECT projectID, SSID,
+           SUM(n), COALESCE(SUM(strength * n), 0), SUM(IF(strength IS NULL, 0, n)),
+           MIN(COALESCE(rssiMin, strength)), MAX(COALESCE(rssiMax, strength)),
+           MIN(captureTime), MAX(COALESCE(lastSeen, captureTime)),
+           MAX(IF(rn = 1, encType, NULL)), MAX(IF(rn = 1, authMode, NULL))
+    FROM (
+        SELECT i.projectID, COALESCE(i.SSID, '') AS SSID, COALESCE(i.frameCount, 1) AS n,
+               i.strength, i.rssiMin, i.rssiMax, i.captureTime, i.lastSeen, i.encType, i.authMode,
+               ROW_NUMBER() OVER (PARTITION BY i.projectID, COALESCE(i.SSID, '')
+                                  ORDER BY i.captureTime DESC, i.ID DESC) AS rn
+        FROM RollupScan s
+        JOIN IngestDB i ON i.ID = s.ID AND i.projectID = s.projectID
+        WHERE NOT s.sentinel
+    ) new_rows
+    GROUP BY projectID, SSID
+    ON DUPLICATE KEY UPDATE
+        lastEncType = IF(VALUES(lastSeen) >= lastSeen, VALUES(lastEncType), lastEncType),
+        lastAuthMode = IF(VALUES(lastSeen) >= lastSeen, VALUES(lastAuthMode), lastAuthMode),
+        frames = frames + VALUES(frames),
+        strengthSum = strengthSum + VALUES(strengthSum),
+        strengthN = strengthN + VALUES(strengthN),
+        minStrength = LEAST(COALESCE(minStrength, VALUES(minStrength)), COALESCE(VALUES(minStrength), minStrength)),
+        maxStrength = GREATEST(COALESCE(maxStrength, VALUES(maxStrength)), COALESCE(VALUES(maxStrength), maxStrength)),
+        firstSeen = LEAST(firstSeen, VALUES(firstSeen)),
+        lastSeen = GREATEST(lastSeen, VALUES(lastSeen));
+
+    INSERT INTO ProjectMacStats
+        (projectID, SSID, srcMac, frames, strengthSum, strengthN, minStrength, maxStrength,
+         lastStrength, firstSeen, lastSeen, encTypes, authModes, lastEncType, lastAuthMode)
+    SELECT projectID, SSID, srcMac,
+           SUM(n), COALESCE(SUM(strength * n), 0), SUM(IF(strength IS NULL, 0, n)),
+           MIN(COALESCE(rssiMin, strength)), MAX(COALESCE(rssiMax, strength)),
+           MAX(IF(rn = 1, strength, NULL)),
+           MIN(captureTime), MAX(COALESCE(lastSeen, captureTime)),
+           BIT_OR(CASE encType WHEN 'Public' THEN 1 WHEN 'WPA' THEN 2
+                               WHEN 'WPA2' THEN 4 WHEN 'WPA3' THEN 8 ELSE 0 END),
+           BIT_OR(CASE authMode WHEN 'PSK' THEN 1 WHEN 'Enterprise' THEN 2 ELSE 0 END),
+           MAX(IF(rn = 1, encType, NULL)), MAX(IF(rn = 1, authMode, NULL))
+    FROM (
+        SELECT i.projectID, COALESCE(i.SSID, '') AS SSID, i.srcMac, COALESCE(i.frameCount, 1) AS n,
+               i.strength, i.rssiMin, i.rssiMax, i.captureTime, i.lastSeen, i.encType, i.authMode,
+               ROW_NUMBER() OVER (PARTITION BY i.projectID, COALESCE(i.SSID, ''), i.srcMac
+                                  ORDER BY i.captureTime DESC, i.ID DESC) AS rn
+        FROM RollupScan s
+        JOIN IngestDB i ON i.ID = s.ID AND i.projectID = s.projectID
+        WHERE NOT s.sentinel
+    ) new_rows
+    GROUP BY projectID, SSID, srcMac
+    ON DUPLICATE KEY UPDATE
+        lastStrength = IF(VALUES(lastSeen) >= lastSeen, VALUES(lastStrength), lastStrength),
+        lastEncType = IF(VALUES(lastSeen) >= lastSeen, VALUES(lastEncType), lastEncType),
+        lastAuthMode = IF(VALUES(lastSeen) >= lastSeen, VALUES(lastAuthMode), lastAuthMode),
+        frames = frames + VALUES(frames),
+        strengthSum = strengthSum + VALUES(strengthSum),
+        strengthN = strengthN + VALUES(strengthN),
+        minStrength = LEAST(COALESCE(minStrength, VALUES(minStrength)), COALESCE(VALUES(minStrength), minStrength)),
+        maxStrength = GREATEST(COALESCE(maxStrength, VALUES(maxStrength)), COALESCE(VALUES(maxStrength), maxStrength)),
+        encTypes = encTypes | VALUES(encTypes),
+        authModes = authModes | VALUES(authModes),
+        firstSeen = LEAST(firstSeen, VALUES(firstSeen)),
+        lastSeen = GREATEST(lastSeen, VALUES(lastSeen));
+END //
+
+-- Fold IngestDB rows added since the last call, and rows that have since
+-- appeared in RollupGaps, into the rollups. The RollupState row is locked
+-- for the whole transaction, so concurrent callers (scan.py writer, spool
+-- uploader) run one after the other. READ COMMITTED: reading IngestDB takes
+-- no locks, so a refresh never waits for a writer's open transaction; the
+-- IDs it did not see are left in RollupGaps. The rows read are listed in
+-- RollupScan first and folded from there, so what is folded and what is
+-- recorded as missing always agree.
+CREATE OR REPLACE PROCEDURE RefreshRollups()
+BEGIN
+    DECLARE lo BIGINT;
+    DECLARE hi BIGINT;
+    DECLARE gap_timeout INT DEFAULT 3600;  -- seconds a gap is re-scanned
+    DECLARE EXIT HANDLER FOR SQLEXCEPTION
+    BEGIN
+        ROLLBACK;
+        DROP TEMPORARY TABLE IF EXISTS RollupScan, RollupNewGaps;
+        RESIGNAL;
+    END;
+
+    -- one row per ID read, plus a sentinel just outside each end of each
+    -- range, so the gaps are the jumps between consecutive IDs
+    CREATE OR REPLACE TEMPORARY TABLE RollupScan (
+        rangeLo BIGINT NOT NULL,
+        ID BIGINT NOT NULL,
+        projectID INT NOT NULL,
+        sentinel BOOLEAN NOT NULL,
+        seenAt DATETIME NOT NULL,
+        PRIMARY KEY (rangeLo, ID, projectID)
+    );
+
+    SET TRANSACTION ISOLATION LEVEL READ COMMITTED;
+    START TRANSACTION;
+    SELECT lastID INTO lo FROM RollupState WHERE name = 'IngestDB' FOR UPDATE;
+    SELECT MAX(ID) INTO hi FROM IngestDB;
+
+    DELETE FROM RollupGaps WHERE seenAt < NOW() - INTERVAL gap_timeout SECOND;
+    IF hi > lo THEN
+        INSERT INTO RollupGaps VALUES (lo + 1, hi, NOW());   -- the new IDs are one more range to scan
+    END IF;
+
+    IF EXISTS (SELECT 1 FROM RollupGaps) THEN
+        INSERT INTO RollupScan
+        SELECT g.loID, i.ID, i.projectID, FALSE, g.seenAt
+        FROM RollupGaps g
+        JOIN IngestDB i ON i.ID BETWEEN g.loID AND g.hiID;
+        INSERT INTO RollupScan SELECT loID, loID - 1, 0, TRUE, seenAt FROM RollupGaps;
+        INSERT INTO RollupScan SELECT loID, hiID + 1, 0, TRUE, seenAt FROM RollupGaps;
+
+        CALL FoldRollupScan();
+
+        -- whatever is still missing in a range is a gap; a split gap keeps its age
+        CREATE OR REPLACE TEMPORARY TABLE RollupNewGaps AS
+        SELECT prevID + 1 AS loID, ID - 1 AS hiID, seenAt
+        FROM (
+            SELECT ID, seenAt, LAG(ID) OVER (PARTITION BY rangeLo ORDER BY ID) AS prevID
+            FROM RollupScan
+        ) runs
+        WHERE ID - prevID > 1;
+        DELETE FROM RollupGaps;
+        INSERT INTO RollupGaps SELECT loID, hiID, seenAt FROM RollupNewGaps;
+        DROP TEMPORARY TABLE RollupNewGaps;
+
+        IF hi > lo THEN
+            UPDATE RollupState SET lastID = hi WHERE name = 'IngestDB';
+        END IF;
+    END IF;
+    COMMIT;
+    DROP TEMPORARY TABLE RollupScan;
+END //
+
+-- Empty the rollups and fold in, from scratch, every IngestDB row the
+-- incremental refreshes account for (ID <= lastID, not in RollupGaps).
+-- Runs inside the caller's transaction, which should hold the RollupState
+-- row (SELECT ... FOR UPDATE): rollup_check.py compares the result with the
+-- incremental rollups and rolls back, or commits it with --repair.
+CREATE OR REPLACE PROCEDURE RollupsFromScratch()
+BEGIN
+    CREATE OR REPLACE TEMPORARY TABLE RollupScan (
+        rangeLo BIGINT NOT NULL,
+        ID BIGINT NOT NULL,
+        projectID INT NOT NULL,
+        sentinel BOOLEAN NOT NULL,
+        seenAt DATETIME NOT NULL,
+        PRIMARY KEY (rangeLo, ID, projectID)
+    );
+    INSERT INTO RollupScan
+    SELECT 0, i.ID, i.projectID, FALSE, NOW()
+    FROM IngestDB i
+    WHERE i.ID <= (SELECT lastID FROM RollupState WHERE name = 'IngestDB')
+      AND NOT EXISTS (SELECT 1 FROM RollupGaps g WHERE i.ID BETWEEN g.loID AND g.hiID);
+
+    DELETE FROM ProjectSSIDStats;
+    DELETE FROM ProjectMacStats;
+    CALL FoldRollupScan();
+    DROP TEMPORARY TABLE RollupScan;
+END //
+
+INSERT IGNORE INTO SchemaVersion VALUES (4, NOW(), 'ProjectSSIDStats / ProjectMacStats rollups') //
+
+DELIMITER ;
+
+-- Catch the rollups up with anything written while nothing was refreshing them
+CALL RefreshRollups();
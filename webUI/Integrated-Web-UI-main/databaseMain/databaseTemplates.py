@@ -1,7 +1,17 @@
+import os
+import sys
 import mysql.connector
 from datetime import datetime
 from pathlib import Path
 
+# Shared connection pool and rollup modules (dbpool.py, rollups.py at the
+# repository root); appended so they never shadow this UI's own modules
+_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..'))
+if _ROOT not in sys.path:
+    sys.path.append(_ROOT)
+import dbpool
+import rollups
+
 # Database configuration
 DB_CONFIG = {
     'host': 'localhost',
@@ -15,8 +25,23 @@ DB_CONFIG = {
 
 
 def get_connection():
-    """Return a new database connection."""
-    return mysql.connector.connect(**DB_CONFIG)
+    """Return a pooled database connection; close() hands it back."""
+    return dbpool.get_connection(DB_CONFIG, "web")
+
+
+def check_pool():
+    """Round trip on a pooled connection, in ms (dbpool.check); raises if the DB is down."""
+    return dbpool.check(DB_CONFIG, "web")
+
+
+def pool_stats():
+    """Checkout/wait counters of this process's connection pools (dbpool.stats)."""
+    return dbpool.stats()
+
+
+def refresh_rollups_if_behind(cur):
+    """Start a background RefreshRollups() if the rollups lag behind IngestDB (rollups.py)."""
+    return rollups.refresh_if_behind(cur, DB_CONFIG, "web")
 
 
 # ---------------- ProjectDB Functions ---------------- #
@@ -37,6 +62,11 @@ def create_project(start_time: str, project_type: str):
 
     conn.commit()
     project_id = cur.lastrowid
+    try:
+        # Own IngestDB partition for the project (setup.sql); pmax otherwise
+        cur.callproc("EnsureProjectPartition", (project_id,))
+    except mysql.connector.Error:
+        pass
     conn.close()
     return project_id
 
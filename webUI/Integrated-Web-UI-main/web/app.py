@@ -2,10 +2,10 @@
 
 # Integrated-Web-UI-main/web/app.py
 from pathlib import Path
-from flask import Flask, render_template, request, send_file, redirect, url_for, flash
+from flask import Flask, render_template, request, send_file, redirect, url_for, flash, jsonify
 
 # Aldous’ DB helpers (already in this repo)
-from db_utils_web import get_projects, get_ssids, get_macs_by_ssid
+from db_utils_web import get_projects, get_ssids, get_macs_by_ssid, check_pool, pool_stats
 
 # Your professional PDF builder wrapper
 from gen_report import generate_wifi_pdf
@@ -47,6 +47,15 @@ def download():
         flash(f"Report failed: {e}", "danger")
         return redirect(url_for("index"))
 
+@app.route("/health")
+def health():
+    # DB round trip through the pool, plus pool checkout/wait counters
+    try:
+        ping_ms = check_pool()
+    except Exception as e:
+        return jsonify(ok=False, error=str(e), pools=pool_stats()), 503
+    return jsonify(ok=True, ping_ms=ping_ms, pools=pool_stats())
+
 @app.route("/heatmap")
 def heatmap():
     # if Aldous’ page is a template
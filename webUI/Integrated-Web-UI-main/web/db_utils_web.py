@@ -1,16 +1,56 @@
 import sys
 import os
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
-from databaseMain.databaseTemplates import get_connection
+from databaseMain.databaseTemplates import (get_connection, refresh_rollups_if_behind,
+                                           check_pool, pool_stats)
 
 
 # Database Functions
 
+# The per-project SSID/MAC views read the rollup tables (setup.sql
+# ProjectSSIDStats / ProjectMacStats) instead of re-aggregating IngestDB.
+# The bulk writers keep them current; refresh_rollups_if_behind() starts a
+# background catch-up (at most every few seconds) when rows are missing, e.g.
+# after single-row inserts, and never delays the read.
+
+# One EXISTS probe per project, each pruned to that project's partition
+PROJECTS_QUERY = """
+    SELECT ID FROM ProjectDB p
+    WHERE EXISTS (SELECT 1 FROM IngestDB i WHERE i.projectID = p.ID)
+    ORDER BY ID
+"""
+
+SSIDS_QUERY = "SELECT NULLIF(SSID, '') FROM ProjectSSIDStats WHERE projectID = %s"
+
+SSID_COUNTS_QUERY = """
+    SELECT NULLIF(SSID, '') AS SSID, frames
+    FROM ProjectSSIDStats
+    WHERE projectID = %s
+    ORDER BY frames DESC
+"""
+
+MACS_BY_SSID_QUERY = """
+    SELECT
+        COALESCE(NULLIF(srcMac, ''), 'unknown') AS mac,
+        frames,
+        firstSeen AS first_seen,
+        lastSeen AS last_seen,
+        minStrength AS min_rssi,
+        ROUND(strengthSum / NULLIF(strengthN, 0), 1) AS avg_rssi,
+        maxStrength AS max_rssi,
+        NULLIF(encTypes, '') AS enc_types,
+        NULLIF(authModes, '') AS auth_modes
+    FROM ProjectMacStats
+    WHERE projectID = %s AND SSID = COALESCE(%s, '')
+    ORDER BY frames DESC
+"""
+
+
 def get_projects():
    conn=get_connection()
    cur = conn.cursor()
 
-   cur.execute("SELECT DISTINCT(projectID) FROM IngestDB")
+   cur.execute(PROJECTS_QUERY)
    projects = [row[0] for row in cur.fetchall()]
    conn.close()
    return projects
@@ -20,9 +60,8 @@ def get_ssids(pid):
    conn=get_connection()
    cur = conn.cursor()
 
-   cur.execute("SELECT DISTINCT(SSID) FROM IngestDB WHERE projectID = %s",
-        (pid,)
-    )
+   refresh_rollups_if_behind(cur)
+   cur.execute(SSIDS_QUERY, (pid,))
    ssids = [row[0] for row in cur.fetchall()]
    conn.close()
    return ssids
@@ -30,13 +69,8 @@ def get_ssids(pid):
 def get_ssid_counts(pid):
     conn = get_connection()
     cur = conn.cursor()
-    cur.execute("""
-        SELECT SSID, COUNT(*) AS frames
-        FROM IngestDB
-        WHERE projectID = %s
-        GROUP BY SSID
-        ORDER BY frames DESC
-    """, (pid,))
+    refresh_rollups_if_behind(cur)
+    cur.execute(SSID_COUNTS_QUERY, (pid,))
     ssids = cur.fetchall() 
     conn.close()
     return ssids
@@ -45,22 +79,8 @@ def get_macs_by_ssid(pid, ssid):
     conn = get_connection()
     cur = conn.cursor(dictionary=True)
 
-    cur.execute("""
-        SELECT 
-            COALESCE(NULLIF(srcMac, ''), 'unknown') AS mac,
-            COUNT(*) AS frames,
-            MIN(captureTime) AS first_seen,
-            MAX(captureTime) AS last_seen,
-            MIN(strength) AS min_rssi,
-            ROUND(AVG(strength),1) AS avg_rssi,
-            MAX(strength) AS max_rssi,
-            GROUP_CONCAT(DISTINCT encType) AS enc_types,
-            GROUP_CONCAT(DISTINCT authMode) AS auth_modes
-        FROM IngestDB
-        WHERE projectID = %s AND SSID = %s
-        GROUP BY srcMac
-        ORDER BY frames DESC
-    """, (pid, ssid))
+    refresh_rollups_if_behind(cur)
+    cur.execute(MACS_BY_SSID_QUERY, (pid, ssid))
     macs = cur.fetchall()
     conn.close()
     return macs
\ No newline at end of file
@@ -1,9 +1,10 @@
 # Integrated-Web-UI-main/web/gen_report.py
 from __future__ import annotations
 
+import hashlib
 import sys
+import threading
 from pathlib import Path
-from datetime import datetime
 
 # --- locate sibling repo "wifi-intel-main" so we can import your reporting code
 WEB_DIR = Path(__file__).resolve().parent
@@ -17,8 +18,11 @@ from report.db_adapter import (
     connect_db,
     fetch_project_metadata,
     fetch_ingest_as_analysis_df,
+    fetch_project_high_water,
+    iter_ingest_analysis_chunks,
     latest_project_id,
 )
+from report.wifi_analysis import analyze_chunks
 from reportlab.lib.pagesizes import A4, landscape
 
 # DB creds (same as Harry)
@@ -32,6 +36,57 @@ DB_USER = os.getenv("TEAM404_DB_USER", "team404user")
 DB_PASS = os.getenv("TEAM404_DB_PASS", "pass")
 DB_NAME = os.getenv("TEAM404_DB_NAME", "team404")
 
+# Rows per chunk when streaming the project into the report (0 = load it whole)
+REPORT_CHUNK_ROWS = int(os.getenv("TEAM404_REPORT_CHUNK_ROWS", "50000"))
+
+# Generated PDFs are cached in static/reports, named after a hash of
+# (project, filters, data high-water mark, REPORT_VERSION). The high-water
+# mark is the project's highest IngestDB ID plus its stopTime: rows can still
+# arrive after a project is closed (spool uploads on the next scan.py run,
+# ingest_client backfills), so a report is rebuilt whenever the data, the
+# project state or the report code changed.
+# Bump REPORT_VERSION whenever the PDF layout or analysis changes.
+REPORT_VERSION = "0.1.0"
+REPORTS_DIR = WEB_DIR / "static" / "reports"
+REPORT_CACHE_MB = float(os.getenv("TEAM404_REPORT_CACHE_MB", "500"))  # LRU bound on the PDFs kept
+
+_build_locks: dict[str, threading.Lock] = {}
+_build_locks_lock = threading.Lock()
+
+
+def _report_path(conn, pid: int, project_meta: dict, ssid_filter: str, mac_mask_mode: str) -> Path:
+    """Cache path of the report for this project state and these options."""
+    # one probe of the project's partition; stopTime changes the PDF header
+    high_water = (fetch_project_high_water(conn, pid), project_meta.get("stopTime"))
+    key = "|".join(map(str, (pid, ssid_filter, mac_mask_mode, *high_water, REPORT_VERSION)))
+    digest = hashlib.sha1(key.encode()).hexdigest()[:16]
+    return REPORTS_DIR / f"{pid}-sniff_external-{digest}.pdf"
+
+
+def _build_lock(path: Path) -> threading.Lock:
+    # one build per report at a time; a second click waits and gets the cached file
+    with _build_locks_lock:
+        return _build_locks.setdefault(path.name, threading.Lock())
+
+
+def _evict_reports(keep: Path):
+    """Delete least recently served reports until the rest fit in REPORT_CACHE_MB."""
+    budget = REPORT_CACHE_MB * 2**20
+    pdfs = []
+    for p in REPORTS_DIR.glob("*-sniff_external-*.pdf"):
+        try:
+            st = p.stat()
+        except FileNotFoundError:
+            continue  # evicted by another request meanwhile
+        pdfs.append((st.st_mtime, st.st_size, p))
+    pdfs.sort(key=lambda t: t[0], reverse=True)
+    used = 0
+    for _mtime, size, p in pdfs:
+        used += size
+        if used > budget and p != keep:
+            p.unlink(missing_ok=True)
+            with _build_locks_lock:
+                _build_locks.pop(p.name, None)
 
 
 def generate_wifi_pdf(
@@ -39,10 +94,19 @@ def generate_wifi_pdf(
     ssid_filter: str = "",
     mac_mask_mode: str = "none",     # accepted but not used yet; kept for future-proofing
 ) -> Path:
-    """Generate the professional Wi-Fi PDF and return the file path."""
+    """
+    Return the path of the professional Wi-Fi PDF, building it only if no
+    cached report matches the project's current data.
+    """
     # connect
     conn = connect_db(DB_HOST, DB_USER, DB_PASS, DB_NAME)
+    try:
+        return _generate_wifi_pdf(conn, project_id, ssid_filter, mac_mask_mode)
+    finally:
+        conn.close()
+
 
+def _generate_wifi_pdf(conn, project_id, ssid_filter: str, mac_mask_mode: str) -> Path:
     # resolve project id
     if str(project_id).lower() in {"latest", "last"}:
         pid = latest_project_id(conn)
@@ -51,21 +115,37 @@ def generate_wifi_pdf(
     else:
         pid = int(project_id)
 
-    # fetch data + metadata
+    # cached report for this project state?
     project_meta = fetch_project_metadata(conn, pid)
-    df = fetch_ingest_as_analysis_df(conn, pid)
+    REPORTS_DIR.mkdir(parents=True, exist_ok=True)
+    out_pdf = _report_path(conn, pid, project_meta, ssid_filter, mac_mask_mode)
+    with _build_lock(out_pdf):
+        if out_pdf.exists():
+            os.utime(out_pdf)   # most recently used
+        else:
+            _build_report(conn, pid, project_meta, ssid_filter, out_pdf)
+    _evict_reports(keep=out_pdf)
+    return out_pdf
 
-    # optional SSID filter if present
-    if ssid_filter:
-        ssid_col = "SSID" if "SSID" in df.columns else ("ssid" if "ssid" in df.columns else None)
-        if ssid_col:
-            df = df[df[ssid_col] == ssid_filter].copy()
 
-    # write into /static/reports so Flask can serve it
-    out_dir = WEB_DIR / "static" / "reports"
-    out_dir.mkdir(parents=True, exist_ok=True)
-    stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
-    out_pdf = out_dir / f"{pid}-sniff_external-{stamp}.pdf"
+def _build_report(conn, pid: int, project_meta: dict, ssid_filter: str, out_pdf: Path):
+    # fetch data
+    analysis = None
+    if REPORT_CHUNK_ROWS > 0:
+        # stream the rows through mergeable aggregates; never hold the whole project
+        chunks = iter_ingest_analysis_chunks(conn, pid, REPORT_CHUNK_ROWS)
+        if ssid_filter:
+            chunks = (c[c["ssid"] == ssid_filter] for c in chunks)
+        analysis = analyze_chunks(chunks)
+        df = None
+    else:
+        df = fetch_ingest_as_analysis_df(conn, pid)
+
+        # optional SSID filter if present
+        if ssid_filter:
+            ssid_col = "SSID" if "SSID" in df.columns else ("ssid" if "ssid" in df.columns else None)
+            if ssid_col:
+                df = df[df[ssid_col] == ssid_filter].copy()
 
     # include the logo if available
     logo_guess = WIFI / "assets" / "y404_logo.png"
@@ -77,7 +157,7 @@ def generate_wifi_pdf(
         "project": f"DB Run (Project {pid})",
         "subtitle": "Prototype",
         "filter_ssid": ssid_filter,
-        "app_version": "0.1.0",
+        "app_version": REPORT_VERSION,
         "project_meta": project_meta,
         "data_file_name": "(database)",
         "capture_mode": "monitor",
@@ -89,6 +169,11 @@ def generate_wifi_pdf(
         "pagesize": landscape(A4),   # DB reports look better landscape
     }
 
-    # build the PDF using your reporting code
-    build_pdf(df, out_pdf, meta, source="db")
-    return out_pdf
+    # build the PDF using your reporting code; written to a temp name and
+    # renamed, so a half-built file is never served from the cache
+    tmp_pdf = out_pdf.with_name(f".{out_pdf.name}.{os.getpid()}.tmp")
+    try:
+        build_pdf(df, tmp_pdf, meta, source="db", analysis=analysis)
+        os.replace(tmp_pdf, out_pdf)
+    finally:
+        tmp_pdf.unlink(missing_ok=True)
@@ -5,8 +5,23 @@
 from datetime import datetime
 from pathlib import Path
 import os
+import sys
+import tempfile
 import mysql.connector
 
+try:
+    from pandas import isna as _isna   # NaN, NaT and pd.NA (nullable Int16/UInt16/...)
+except ImportError:  # pandas is only needed for DataFrame input
+    def _isna(v):
+        return v != v
+
+# Shared connection pool module (dbpool.py at the repository root); appended
+# so it never shadows this package's own modules
+_ROOT = str(Path(__file__).resolve().parents[3])
+if _ROOT not in sys.path:
+    sys.path.append(_ROOT)
+import dbpool
+
 DB_CONFIG = {
     "host": os.getenv("TEAM404_DB_HOST", "127.0.0.1"),   # set to Kali IP when needed
     "port": int(os.getenv("TEAM404_DB_PORT", "3306")),
@@ -17,7 +32,8 @@ DB_CONFIG = {
 }
 
 def get_connection():
-    return mysql.connector.connect(**DB_CONFIG)
+    # Pooled; conn.close() returns it (TEAM404_DB_POOL_SIZE / _TIMEOUT, see dbpool.py)
+    return dbpool.get_connection(DB_CONFIG, "ingest")
 
 # ---------------- ProjectDB ---------------- #
 
@@ -32,6 +48,11 @@ def create_project(start_time: str, project_type: str):
     """, (start_time, project_type))
     conn.commit()
     pid = cur.lastrowid
+    try:
+        # Own IngestDB partition for the project (setup.sql); pmax otherwise
+        cur.callproc("EnsureProjectPartition", (pid,))
+    except mysql.connector.Error:
+        pass
     cur.close(); conn.close()
     return pid
 
@@ -112,13 +133,13 @@ def insert_heatmap(
     capture_time: str,
     src_mac: str,
     ssid: str = None,
-    gps_lat: float = None,   # schema stores INT; we cast below
+    gps_lat: float = None,   # gpsLat/gpsLong are DOUBLE (setup.sql schema version 2)
     gps_long: float = None,
     strength: int = None,
 ):
     conn = get_connection(); cur = conn.cursor()
-    lat = int(gps_lat) if gps_lat is not None else None
-    lng = int(gps_long) if gps_long is not None else None
+    lat = float(gps_lat) if gps_lat is not None else None
+    lng = float(gps_long) if gps_long is not None else None
     cur.execute("""
         INSERT INTO IngestDB (
             projectID, captureTime, srcMac, SSID, gpsLat, gpsLong, strength
@@ -129,16 +150,197 @@ def insert_heatmap(
     cur.close(); conn.close()
     return iid
 
+# ---------------- Bulk inserts ---------------- #
+# Batch variants of the insert_* functions above for seeding and backfills.
+# `records` is an iterable of dicts keyed by the single-row keyword names
+# (capture_time, src_mac, ...), of tuples in that argument order (after
+# project_id; missing trailing fields are None), or a pandas DataFrame with
+# those column names. Rows go in chunk_size at a time, one commit per chunk,
+# either as multi-row INSERTs (method="executemany") or through a temporary
+# TSV file and LOAD DATA LOCAL INFILE (method="load", needs local_infile=ON
+# on the server; a chunk that loads with warnings is rolled back and raises
+# DataError). Each returns (first_id, last_id) of the inserted rows, or
+# (None, None) if there were none. IDs within a chunk are consecutive; if
+# another writer inserts between chunks its rows fall inside the range too,
+# so filter on projectID as well. The rollup tables are refreshed once at
+# the end.
+
+BULK_CHUNK = 5000
+LOAD_DIR = os.path.join(tempfile.gettempdir(), "team404-load")
+
+# (keyword, IngestDB column, default)
+_EXTERNAL_FIELDS = (
+    ("capture_time", "captureTime", None), ("src_mac", "srcMac", None),
+    ("dst_mac", "dstMac", None), ("ssid", "SSID", None),
+    ("enc_type", "encType", None), ("auth_mode", "authMode", None),
+    ("strength", "strength", None), ("content_length", "contentLength", None),
+    ("type_external", "typeExternal", None),
+)
+_INTERNAL_FIELDS = _EXTERNAL_FIELDS[:-1] + (
+    ("type_internal", "typeInternal", None), ("src_ip", "srcIP", None),
+    ("dst_ip", "dstIP", None), ("src_port", "srcPort", None),
+    ("dst_port", "dstPort", None), ("sniff_type", "sniffType", "internal"),
+)
+_HEATMAP_FIELDS = (
+    ("capture_time", "captureTime", None), ("src_mac", "srcMac", None),
+    ("ssid", "SSID", None), ("gps_lat", "gpsLat", None),
+    ("gps_long", "gpsLong", None), ("strength", "strength", None),
+)
+
+
+def _clean(v):
+    """pandas/numpy scalars to plain Python; NaN/NaT/pd.NA to None."""
+    if v is None or _isna(v) is True:   # isna of a list/array is not a bool: keep it
+        return None
+    if hasattr(v, "to_pydatetime"):
+        v = v.to_pydatetime()
+    elif hasattr(v, "item") and not isinstance(v, (str, bytes)):
+        v = v.item()
+    return v
+
+
+def _bulk_rows(records, fields):
+    """Yield value tuples in `fields` order from dicts, tuples or a DataFrame."""
+    names = [f[0] for f in fields]
+    defaults = [f[2] for f in fields]
+    if hasattr(records, "itertuples"):  # DataFrame
+        records = records.reindex(columns=names).itertuples(index=False, name=None)
+    for rec in records:
+        if isinstance(rec, dict):
+            row = [rec.get(n, d) for n, d in zip(names, defaults)]
+        else:
+            if len(rec) > len(names):
+                raise ValueError(f"record has {len(rec)} fields, expected at most {len(names)}")
+            row = list(rec) + defaults[len(rec):]
+        row = [_clean(v) for v in row]
+        yield tuple(d if v is None else v for v, d in zip(row, defaults))
+
+
+def _chunks(rows, size):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _tsv(v):
+    """One LOAD DATA field (default FIELDS/LINES options)."""
+    if v is None:
+        return "\\N"
+    if isinstance(v, bool):
+        v = int(v)
+    return (str(v).replace("\\", "\\\\").replace("\t", "\\t")
+            .replace("\n", "\\n").replace("\r", "\\r"))
+
+
+def _check_load(conn, cur, expected, first, last):
+    """
+    LOAD DATA LOCAL turns row errors into warnings: bad rows are skipped,
+    bad values truncated or set to defaults. Roll the chunk back and raise
+    unless every row went in as written, so (first_id, last_id) only names
+    rows that exist.
+    """
+    loaded = cur.rowcount
+    cur.execute("SHOW WARNINGS LIMIT 5")
+    warnings = cur.fetchall()
+    if loaded == expected and not warnings:
+        return
+    conn.rollback()
+    done = f"IDs {first}..{last} committed before it" if first is not None else "nothing committed"
+    raise mysql.connector.DataError(
+        f"LOAD DATA loaded {loaded} of {expected} rows with warnings "
+        f"{[f'{level} {code}: {msg}' for level, code, msg in warnings]}; chunk rolled back ({done})")
+
+
+def _refresh_rollups(cur):
+    # Fold the committed rows into the rollup tables (setup.sql RefreshRollups)
+    try:
+        cur.callproc("RefreshRollups")
+    except mysql.connector.Error as e:
+        print(f"[!] Rollup refresh failed: {e}", file=sys.stderr)
+
+
+def _bulk_insert(project_id, records, fields, fixed, chunk_size, method):
+    """Insert records in chunks; returns (first_id, last_id)."""
+    if method not in ("executemany", "load"):
+        raise ValueError("method must be 'executemany' or 'load'")
+    columns = [f[1] for f in fields]
+    fixed_cols = ["projectID"] + list(fixed)
+    fixed_vals = [project_id] + list(fixed.values())
+    first = last = None
+
+    if method == "load":
+        os.makedirs(LOAD_DIR, exist_ok=True)
+        conn = dbpool.get_connection({**DB_CONFIG, "allow_local_infile_in_path": LOAD_DIR},
+                                     "ingest-load")
+        sql = (f"LOAD DATA LOCAL INFILE %s INTO TABLE IngestDB ({', '.join(columns)}) "
+               f"SET {', '.join(f'{c} = %s' for c in fixed_cols)}")
+    else:
+        conn = get_connection()
+        sql = (f"INSERT INTO IngestDB ({', '.join(fixed_cols + columns)}) "
+               f"VALUES ({', '.join(['%s'] * (len(fixed_cols) + len(columns)))})")
+    cur = conn.cursor()
+    try:
+        for chunk in _chunks(_bulk_rows(records, fields), chunk_size):
+            if method == "load":
+                fd, path = tempfile.mkstemp(suffix=".tsv", dir=LOAD_DIR)
+                try:
+                    with os.fdopen(fd, "w", encoding="utf-8", newline="") as f:
+                        f.writelines("\t".join(_tsv(v) for v in row) + "\n" for row in chunk)
+                    cur.execute(sql, [path] + fixed_vals)
+                finally:
+                    os.remove(path)
+                _check_load(conn, cur, len(chunk), first, last)
+                cur.execute("SELECT LAST_INSERT_ID()")
+                start = cur.fetchone()[0]
+            else:
+                cur.executemany(sql, [tuple(fixed_vals) + row for row in chunk])
+                start = cur.lastrowid
+            conn.commit()
+            # A multi-row INSERT / LOAD DATA reports the first ID it generated
+            if first is None:
+                first = start
+            last = start + len(chunk) - 1
+    finally:
+        if first is not None:
+            _refresh_rollups(cur)
+        cur.close(); conn.close()
+    return first, last
+
+
+def insert_sniff_external_many(project_id: int, records, chunk_size: int = BULK_CHUNK,
+                               method: str = "executemany"):
+    """Batch insert_sniff_external. Returns (first_id, last_id)."""
+    return _bulk_insert(project_id, records, _EXTERNAL_FIELDS, {"sniffType": "external"},
+                        chunk_size, method)
+
+def insert_sniff_internal_many(project_id: int, records, chunk_size: int = BULK_CHUNK,
+                               method: str = "executemany"):
+    """Batch insert_sniff_internal. Returns (first_id, last_id)."""
+    return _bulk_insert(project_id, records, _INTERNAL_FIELDS, {}, chunk_size, method)
+
+def insert_heatmap_many(project_id: int, records, chunk_size: int = BULK_CHUNK,
+                        method: str = "executemany"):
+    """Batch insert_heatmap. Returns (first_id, last_id)."""
+    return _bulk_insert(project_id, records, _HEATMAP_FIELDS, {}, chunk_size, method)
+
+INGESTS_BY_PROJECT_QUERY = "SELECT * FROM IngestDB WHERE projectID=%s"
+INGESTS_BY_MAC_QUERY = "SELECT * FROM IngestDB WHERE srcMac=%s OR dstMac=%s"
+
 def get_ingests_by_project(project_id: int):
     conn = get_connection(); cur = conn.cursor()
-    cur.execute("SELECT * FROM IngestDB WHERE projectID=%s", (project_id,))
+    cur.execute(INGESTS_BY_PROJECT_QUERY, (project_id,))
     rows = cur.fetchall()
     cur.close(); conn.close()
     return rows
 
 def get_ingests_by_mac(mac: str):
     conn = get_connection(); cur = conn.cursor()
-    cur.execute("SELECT * FROM IngestDB WHERE srcMac=%s OR dstMac=%s", (mac, mac))
+    cur.execute(INGESTS_BY_MAC_QUERY, (mac, mac))
     rows = cur.fetchall()
     cur.close(); conn.close()
     return rows
@@ -2,6 +2,8 @@
 import mysql.connector as mc
 import pandas as pd
 
+from report.df_schema import compact_dtypes
+
 def connect_db(host, user, password, database, port=3306):
     """Open a MariaDB/MySQL connection."""
     # 127.0.0.1 is safer than 'localhost' on Windows
@@ -30,12 +32,8 @@ def fetch_project_metadata(conn, project_id: int) -> dict:
         raise ValueError(f"Project {project_id} not found")
     return row
 
-def fetch_ingest_as_analysis_df(conn, project_id: int) -> pd.DataFrame:
-    """
-    Return a DataFrame shaped for your report/analysis code.
-    We keep column names your report already understands.
-    """
-    q = """
+# Columns in the names the report/analysis code understands
+INGEST_ANALYSIS_QUERY = """
     SELECT
       ID,
       projectID,
@@ -60,12 +58,12 @@ def fetch_ingest_as_analysis_df(conn, project_id: int) -> pd.DataFrame:
     WHERE projectID = %s
     ORDER BY captureTime
     """
-    df = pd.read_sql(q, conn, params=[project_id])
 
+def _add_analysis_columns(df: pd.DataFrame) -> pd.DataFrame:
     # Add timestamp_ms column expected by parts of the analysis
     if "captureTime" in df.columns:
         ts = pd.to_datetime(df["captureTime"], errors="coerce")
-        df["timestamp_ms"] = (ts.astype("int64") // 1_000_000)  # ns->ms
+        df["timestamp_ms"] = ts.astype("datetime64[ms]").astype("int64")
 
     # Optional columns some sections check for:
     if "frame_type" not in df.columns:
@@ -75,6 +73,52 @@ def fetch_ingest_as_analysis_df(conn, project_id: int) -> pd.DataFrame:
 
     return df
 
+def fetch_ingest_as_analysis_df(conn, project_id: int, compact: bool = True, report=None) -> pd.DataFrame:
+    """
+    Return a DataFrame shaped for your report/analysis code.
+    We keep column names your report already understands.
+    compact: convert to the df_schema dtypes (categorical strings, small
+    nullable ints); report: callable that gets the bytes-per-row summary.
+    """
+    df = _add_analysis_columns(pd.read_sql(INGEST_ANALYSIS_QUERY, conn, params=[project_id]))
+    return compact_dtypes(df, report=report) if compact else df
+
+def iter_ingest_analysis_chunks(conn, project_id: int, chunksize: int = 50_000, report=None):
+    """
+    Yield the project's rows as typed DataFrames of up to chunksize rows, in
+    captureTime order (same columns as fetch_ingest_as_analysis_df).
+
+    Rows are streamed with an unbuffered cursor, so the server sends them as
+    they are fetched and at most one chunk is held in memory. The connection
+    is busy until the generator is exhausted or closed. report gets the
+    bytes-per-row summary of the first chunk.
+    """
+    cur = conn.cursor(buffered=False)
+    try:
+        cur.execute(INGEST_ANALYSIS_QUERY, (project_id,))
+        columns = [d[0] for d in cur.description]
+        while True:
+            rows = cur.fetchmany(chunksize)
+            if not rows:
+                break
+            df = _add_analysis_columns(pd.DataFrame.from_records(rows, columns=columns))
+            yield compact_dtypes(df, report=report)
+            report = None
+    finally:
+        # Stopped early: drain the rest so the connection can be reused
+        conn.consume_results()
+        cur.close()
+
+def fetch_project_high_water(conn, project_id: int) -> int | None:
+    """Highest IngestDB ID of the project (None if it has no rows); grows with every insert."""
+    # Backward walk of the primary key (ID, projectID) in the project's
+    # partition, stopping at the first row; MAX(ID) would read the whole index
+    cur = conn.cursor()
+    cur.execute("SELECT ID FROM IngestDB WHERE projectID = %s ORDER BY ID DESC LIMIT 1", (project_id,))
+    row = cur.fetchone()
+    cur.close()
+    return row[0] if row else None
+
 # (handy for you while testing)
 def latest_project_id(conn) -> int | None:
     cur = conn.cursor()
@@ -0,0 +1,74 @@
+# report/df_schema.py
+# Compact dtypes for the analysis DataFrames (db_adapter loaders).
+#
+# Straight out of the DB every text column is a Python object string (~60+
+# bytes per value) and nullable ints come back as float64/object. Here:
+#   - MACs, SSIDs, IPs, frame types -> categorical (int8/int16 codes + one copy
+#     of each distinct string)
+#   - enc_type / auth_mode / sniff_type -> categorical with the fixed value
+#     sets of the IngestDB CHECK constraints, so chunks share categories
+#   - strength -> Int16, ports -> UInt16, lengths -> Int32 (nullable: NULL stays NA)
+#   - captureTime -> datetime64
+# Categorical columns group with observed=True in wifi_analysis.
+import pandas as pd
+
+ENC_TYPES = pd.CategoricalDtype(["Public", "WPA", "WPA2", "WPA3"])
+AUTH_MODES = pd.CategoricalDtype(["PSK", "Enterprise"])
+SNIFF_TYPES = pd.CategoricalDtype(["internal", "external"])
+
+ANALYSIS_DTYPES = {
+    "ID": "int64",
+    "projectID": "int32",
+    "src_mac": "category",
+    "dst_mac": "category",
+    "ssid": "category",
+    "enc_type": ENC_TYPES,
+    "auth_mode": AUTH_MODES,
+    "gps_lat": "float64",
+    "gps_long": "float64",
+    "strength": "Int16",
+    "frame_len": "Int32",
+    "type_external": "category",
+    "type_internal": "category",
+    "src_ip": "category",
+    "dst_ip": "category",
+    "src_port": "UInt16",
+    "dst_port": "UInt16",
+    "sniff_type": SNIFF_TYPES,
+    # all-NULL placeholders (db_adapter): an empty categorical is 1 byte/row
+    "frame_type": "category",
+    "subtype": "category",
+}
+
+
+def bytes_per_row(df: pd.DataFrame) -> float:
+    """Memory per row, counting the strings behind object columns."""
+    if len(df) == 0:
+        return 0.0
+    return float(df.memory_usage(index=False, deep=True).sum()) / len(df)
+
+
+def compact_dtypes(df: pd.DataFrame, dtypes: dict | None = None, report=None) -> pd.DataFrame:
+    """
+    Return df with the columns in dtypes (default ANALYSIS_DTYPES) converted.
+    If report is a callable (e.g. print) it gets a one-line bytes-per-row
+    before/after summary.
+    """
+    dtypes = ANALYSIS_DTYPES if dtypes is None else dtypes
+    before = bytes_per_row(df) if report else 0.0
+    if "captureTime" in df.columns and not pd.api.types.is_datetime64_any_dtype(df["captureTime"]):
+        df["captureTime"] = pd.to_datetime(df["captureTime"], errors="coerce")
+    for col, dtype in dtypes.items():
+        if col not in df.columns:
+            continue
+        s = df[col]
+        if str(dtype) in ("Int16", "Int32", "UInt16"):
+            # float64/object from the driver; to_numeric first so "12" and 12.0 both convert
+            s = pd.to_numeric(s, errors="coerce")
+        df[col] = s.astype(dtype)
+    if report:
+        after = bytes_per_row(df)
+        saved = (1 - after / before) * 100 if before else 0.0
+        report(f"[dtypes] {len(df)} rows: {before:.0f} -> {after:.0f} bytes/row ({saved:.0f}% smaller, "
+               f"{after * 5_000_000 / 2**20:.0f} MiB per 5M rows)")
+    return df
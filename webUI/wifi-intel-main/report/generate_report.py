@@ -2,8 +2,14 @@
 # report/generate_report.py
 
 import argparse
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
 from datetime import datetime
+import hashlib
+import os
 from pathlib import Path
+import time
 import pandas as pd
 
 # ---- ReportLab imports ----
@@ -20,7 +26,7 @@ matplotlib.use("Agg")  # headless-friendly backend
 import matplotlib.pyplot as plt
 
 # Shared analysis helpers (centralised in wifi_analysis.py)
-from report.wifi_analysis import mac_summary_enhanced, per_frame_view
+from report.wifi_analysis import mac_summary_enhanced, per_frame_view, analyze_chunks, EncAuthAgg
 
 # Optional DB imports (CSV-only environments still work)
 try:
@@ -28,12 +34,14 @@ try:
         connect_db,
         fetch_project_metadata,
         fetch_ingest_as_analysis_df,
+        iter_ingest_analysis_chunks,
         latest_project_id,
     )
 except Exception:
     connect_db = None
     fetch_project_metadata = None
     fetch_ingest_as_analysis_df = None
+    iter_ingest_analysis_chunks = None
     latest_project_id = None
 
 # Analysis helpers (sections render only if needed columns exist)
@@ -46,6 +54,7 @@ try:
         infer_aps,
         talkers,
         mac_pairs,
+        traffic_matrix,
         rts_cts_stats,
         ap_client_links,
     )
@@ -134,11 +143,221 @@ def _dbm_color(v):
     return colors.HexColor("#EF4444")      # red (weak)
 
 
+# -----------------------
+# Analysis context
+# -----------------------
+class ReportContext:
+    """
+    What the PDF sections and charts compute from the report data, built once
+    per report. Each item is computed on first use and cached, so a summary
+    that feeds both a chart and a table is computed once. With analysis (a
+    wifi_analysis.ChunkedAnalysis) the items come from its aggregates and df
+    is None.
+
+    timings holds seconds per computed item and per timed() block, each
+    excluding the items computed inside it; log_timings() prints them.
+    """
+
+    def __init__(self, df: pd.DataFrame | None, analysis=None):
+        self.df = df
+        self.analysis = analysis
+        self.timings = {}
+        self._cache = {}
+        self._inner = 0.0  # time spent in nested items, subtracted from the enclosing one
+        self.has_csv_schema = analysis is None and all(
+            c in df.columns for c in ["timestamp", "ssid", "bssid", "channel", "rssi"])
+        self.source = "csv" if self.has_csv_schema else "db"
+
+    def _get(self, name, compute):
+        if name not in self._cache:
+            with self.timed(name):
+                self._cache[name] = compute()
+        return self._cache[name]
+
+    @contextmanager
+    def timed(self, name):
+        outer, self._inner = self._inner, 0.0
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - t0
+            self.timings[name] = self.timings.get(name, 0.0) + elapsed - self._inner
+            self._inner = outer + elapsed
+
+    def log_timings(self, log=print):
+        total = sum(self.timings.values())
+        parts = " • ".join(f"{k} {v * 1000:.0f} ms" for k, v in self.timings.items())
+        log(f"[timing] {parts} (total {total:.2f}s)")
+
+    # --- parsed columns ---
+    @property
+    def timestamps(self) -> pd.Series | None:
+        """Frame times as datetime64 (None without a time column)."""
+        def compute():
+            if "timestamp_ms" in self.df.columns:
+                return pd.to_datetime(self.df["timestamp_ms"], unit="ms", errors="coerce")
+            tcol = _first_present(self.df, ["timestamp", "time"])
+            return pd.to_datetime(self.df[tcol], errors="coerce") if tcol else None
+        return self._get("timestamps", compute)
+
+    @property
+    def analysis_df(self) -> pd.DataFrame:
+        """df with the timestamp_ms column the wifi_analysis sections expect."""
+        def compute():
+            if "timestamp_ms" in self.df.columns or self.timestamps is None:
+                return self.df
+            return self.df.assign(timestamp_ms=self.timestamps.astype("datetime64[ms]").astype("int64"))
+        return self._get("analysis_df", compute)
+
+    # --- summaries ---
+    @property
+    def time_window(self) -> tuple:
+        """(first, last) frame time as Timestamps or None."""
+        def compute():
+            if self.analysis is not None:
+                tw = self.analysis.time_window
+                return (None if tw.lo is None else pd.to_datetime(tw.lo, unit="ms"),
+                        None if tw.hi is None else pd.to_datetime(tw.hi, unit="ms"))
+            ts = self.timestamps
+            return (None, None) if ts is None else (ts.min(), ts.max())
+        return self._get("time_window", compute)
+
+    @property
+    def total_frames(self) -> int:
+        return self.analysis.frames if self.analysis is not None else int(self.df.shape[0])
+
+    @property
+    def mac_summary(self) -> pd.DataFrame:
+        """Observed MACs table: summarize_bssid_table (CSV) or mac_summary_enhanced (DB)."""
+        def compute():
+            if self.analysis is not None:
+                return self.analysis.mac_summary.result()
+            if self.has_csv_schema:
+                return summarize_bssid_table(self.df)
+            return mac_summary_enhanced(self.df)
+        return self._get("mac_summary", compute)
+
+    @property
+    def unique_macs(self) -> int | None:
+        def compute():
+            if self.analysis is not None:
+                return self.mac_summary["bssid"].nunique()
+            mac_col = _first_present(self.df, ["bssid"] if self.has_csv_schema else
+                                     ["src_mac", "srcMac", "dst_mac", "dstMac", "bssid"])
+            return self.df[mac_col].nunique() if mac_col else None
+        return self._get("unique_macs", compute)
+
+    @property
+    def traffic(self):
+        """Per-MAC and per-pair frame/byte counts (wifi_analysis.TrafficMatrix) or None."""
+        def compute():
+            if self.analysis is not None:
+                return self.analysis.traffic.result()
+            if HAVE_ANALYSIS and not self.has_csv_schema and "src_mac" in self.df.columns:
+                return traffic_matrix(self.df)
+            return None
+        return self._get("traffic", compute)
+
+    @property
+    def frame_size(self) -> dict | None:
+        def compute():
+            if self.analysis is not None:
+                return self.analysis.frame_size.result()
+            return frame_size_stats(self.df) if "frame_len" in self.df.columns else None
+        return self._get("frame_size", compute)
+
+    @property
+    def interarrival(self) -> dict | None:
+        def compute():
+            if self.analysis is not None:
+                return self.analysis.interarrival.result()
+            df = self.analysis_df
+            return interarrival_stats(df) if "timestamp_ms" in df.columns else None
+        return self._get("interarrival", compute)
+
+    @property
+    def rts_cts(self) -> dict | None:
+        def compute():
+            if self.analysis is not None:
+                return self.analysis.rts_cts.result()
+            df = self.analysis_df
+            return rts_cts_stats(df) if set(["frame_type", "subtype"]).issubset(df.columns) else None
+        return self._get("rts_cts", compute)
+
+    @property
+    def ap_links(self) -> pd.DataFrame | None:
+        def compute():
+            if self.analysis is not None:
+                return None
+            df = self.analysis_df
+            if not set(["frame_type", "subtype", "bssid"]).issubset(df.columns):
+                return None
+            return ap_client_links(df, infer_aps(df))
+        return self._get("ap_links", compute)
+
+    @property
+    def per_frame(self) -> pd.DataFrame:
+        def compute():
+            if self.analysis is not None:
+                return self.analysis.per_frame.result()
+            return per_frame_view(self.df, limit=25)
+        return self._get("per_frame", compute)
+
+    # --- chart inputs ---
+    @property
+    def frames_per_minute(self) -> pd.Series | None:
+        def compute():
+            if self.analysis is not None:
+                return self.analysis.per_minute.result()
+            ts = self.timestamps
+            if ts is None or ts.dropna().empty:
+                return None
+            return ts.dt.floor("min").value_counts().sort_index()
+        return self._get("frames_per_minute", compute)
+
+    @property
+    def rssi_by_ssid(self) -> pd.DataFrame | None:
+        """Rows with ssid, min/avg/max_rssi and frames for the RSSI chart."""
+        def compute():
+            if self.has_csv_schema:
+                return self.df.groupby("ssid", dropna=False).agg(
+                    frames=("ssid", "size"),
+                    min_rssi=("rssi", "min"),
+                    avg_rssi=("rssi", "mean"),
+                    max_rssi=("rssi", "max"),
+                ).reset_index()
+            # DB: the per-MAC summary already has SSID + RSSI stats
+            summ = self.mac_summary
+            return summ if not summ.empty and "ssid" in summ.columns else None
+        return self._get("rssi_by_ssid", compute)
+
+    @property
+    def enc_auth(self) -> pd.DataFrame | None:
+        """Frame counts per (encType, authMode) for the stacked bar chart."""
+        def compute():
+            if self.analysis is not None:
+                return self.analysis.enc_auth.result()
+            if self.has_csv_schema:
+                return None
+            return EncAuthAgg().update(self.df).result()
+        return self._get("enc_auth", compute)
+
+
 # -----------------------
 # Charts
 # -----------------------
+# Each chart is split in two: a _prep_* step (in the report process) that
+# reduces the ReportContext input to exactly the data plotted, or None when
+# there is nothing to draw, and a _draw_* step that renders that data to one
+# PNG. The PNG is named after a hash of the plotted data, so a report for an
+# unchanged project finds every chart already on disk; the misses are drawn
+# in a process pool, one figure per task (pyplot is not thread-safe).
 PALETTE = ["#0072B2","#E69F00","#009E73","#D55E00","#CC79A7","#56B4E9","#F0E442","#6A737B"]
 MIN_FRAMES_FOR_CHART = 5  # filter tiny n for RSSI chart
+CHART_STYLE_VERSION = 1   # bump when a _draw_* function changes, so cached PNGs are redrawn
+CHART_WORKERS = int(os.getenv("TEAM404_REPORT_CHART_WORKERS", "4"))  # 0/1 = draw in this process
+CHART_CACHE_MAX = int(os.getenv("TEAM404_REPORT_CHART_CACHE_MAX", "200"))  # PNGs kept in the chart dir
 
 plt.rcParams.update({
     "figure.dpi": 140, "savefig.dpi": 140,
@@ -146,32 +365,39 @@ plt.rcParams.update({
     "axes.grid": True, "grid.alpha": 0.25, "figure.autolayout": True
 })
 
-def _chart_frames_over_time(df: pd.DataFrame, outdir: Path, ts_col: str) -> str | None:
-    ts = pd.to_datetime(df[ts_col], errors="coerce")
-    if ts.dropna().empty:
-        return None
-    per_min = ts.dt.floor("min").value_counts().sort_index()
-    if per_min.empty or len(per_min) < 2:
+def _save(fig, path: str) -> str:
+    # write-then-rename: a concurrent report never picks up a half-written PNG
+    tmp = f"{path}.{os.getpid()}.tmp.png"
+    fig.tight_layout(); fig.savefig(tmp); plt.close(fig)
+    os.replace(tmp, path)
+    return path
+
+def _prep_frames_per_min(per_min: pd.Series | None) -> pd.Series | None:
+    if per_min is None or len(per_min) < 2:
         return None  # need at least two time buckets to show a meaningful trend
+    return per_min
+
+def _draw_frames_per_min(per_min: pd.Series, path: str) -> str:
     fig, ax = plt.subplots(figsize=(7,3))
     ax.plot(per_min.index, per_min.values, linewidth=1.6)
     ax.set_xlabel("Time"); ax.set_ylabel("Frames/min")
     ax.set_title("Traffic volume over time")
-    path = outdir / "frames_over_time.png"
-    plt.tight_layout(); plt.savefig(path); plt.close()
-    return str(path)
+    return _save(fig, path)
 
-def _chart_rssi_by_ssid(summary_df: pd.DataFrame, outdir: Path) -> str | None:
+def _prep_rssi_by_ssid(summary_df: pd.DataFrame | None) -> pd.DataFrame | None:
     # expects columns: ssid/SSID, min_rssi, avg_rssi, max_rssi, frames
+    if summary_df is None:
+        return None
     name_col = "ssid" if "ssid" in summary_df.columns else ("SSID" if "SSID" in summary_df.columns else None)
     if not name_col or summary_df.empty:
         return None
-    df = summary_df[[name_col,"min_rssi","avg_rssi","max_rssi","frames"]].dropna(subset=["avg_rssi"]).copy()
-    if df.empty:
-        return None
+    df = summary_df[[name_col,"min_rssi","avg_rssi","max_rssi","frames"]].dropna(subset=["avg_rssi"])
     df = df[df["frames"] >= MIN_FRAMES_FOR_CHART].sort_values("avg_rssi")  # weaker→stronger
     if df.empty:
         return None
+    return df.rename(columns={name_col: "ssid"}).reset_index(drop=True)
+
+def _draw_rssi_by_ssid(df: pd.DataFrame, path: str) -> str:
     fig_h = max(3, 0.28*len(df))
     fig, ax = plt.subplots(figsize=(7, fig_h))
     y = range(len(df))
@@ -180,20 +406,41 @@ def _chart_rssi_by_ssid(summary_df: pd.DataFrame, outdir: Path) -> str | None:
         ax.text(mn, i, f"min {mn:.0f}", va="center", ha="right", fontsize=8)
         ax.text(mx, i, f"max {mx:.0f}", va="center", ha="left", fontsize=8)
     ax.set_yticks(list(y))
-    ax.set_yticklabels(df[name_col])
+    ax.set_yticklabels(df["ssid"])
     ax.set_xlabel("Signal (dBm, higher/less negative = stronger)")
     ax.set_title("Signal quality by SSID (min/avg/max)")
-    path = outdir / "rssi_by_ssid.png"
-    plt.tight_layout(); plt.savefig(path); plt.close()
-    return str(path)
+    return _save(fig, path)
 
-def _chart_enc_auth(df: pd.DataFrame, outdir: Path) -> str | None:
-    if not set(["encType","authMode"]).issubset(df.columns):
+def _prep_top_talkers(traffic) -> tuple[pd.DataFrame, pd.DataFrame] | None:
+    # the two talkers() tables: src_mac + frames, src_mac + bytes (largest first)
+    if traffic is None:
         return None
-    pv = df.groupby(["encType","authMode"]).size().reset_index(name="n")
-    if pv.empty:
+    frames_by_src, bytes_by_src = traffic.talkers()
+    if frames_by_src.empty:
         return None
-    pivot = pv.pivot(index="encType", columns="authMode", values="n").fillna(0)
+    return frames_by_src, bytes_by_src
+
+def _draw_top_talkers(tables: tuple[pd.DataFrame, pd.DataFrame], path: str) -> str:
+    frames_by_src, bytes_by_src = tables
+    panels = [(frames_by_src, "frames", "Frames", PALETTE[0])]
+    if not bytes_by_src.empty:
+        panels.append((bytes_by_src, "bytes", "Bytes", PALETTE[2]))
+    fig, axes = plt.subplots(1, len(panels), figsize=(7, max(3, 0.28*len(frames_by_src))), squeeze=False)
+    for ax, (tbl, col, label, color) in zip(axes[0], panels):
+        tbl = tbl.iloc[::-1]  # largest at the top
+        ax.barh([str(m) for m in tbl["src_mac"]], tbl[col].astype(float), color=color)
+        ax.set_xlabel(label)
+        ax.tick_params(axis="y", labelsize=7)
+    fig.suptitle("Top talkers (source MAC)")
+    return _save(fig, path)
+
+def _prep_enc_auth(pv: pd.DataFrame | None) -> pd.DataFrame | None:
+    # expects columns: encType, authMode, n (frame count)
+    if pv is None or pv.empty:
+        return None
+    return pv.pivot(index="encType", columns="authMode", values="n").fillna(0)
+
+def _draw_enc_auth(pivot: pd.DataFrame, path: str) -> str:
     fig, ax = plt.subplots(figsize=(7, 3 + 0.3*len(pivot)))
     bottom = None
     for i, col in enumerate(pivot.columns):
@@ -202,52 +449,68 @@ def _chart_enc_auth(df: pd.DataFrame, outdir: Path) -> str | None:
         bottom = vals if bottom is None else bottom + vals
     ax.set_ylabel("Count"); ax.set_title("Encryption × Auth distribution")
     ax.legend(title="authMode", fontsize=8)
-    path = outdir / "enc_auth_stack.png"
-    plt.tight_layout(); plt.savefig(path); plt.close()
-    return str(path)
-
-def make_charts(source: str, df: pd.DataFrame, outdir: Path) -> list[str]:
+    return _save(fig, path)
+
+def _chart_digest(name: str, data) -> str:
+    """Hash of everything a chart is drawn from: name, style version, values, labels."""
+    h = hashlib.sha1(f"{name}:{CHART_STYLE_VERSION}".encode())
+    for obj in (data if isinstance(data, tuple) else (data,)):
+        h.update(pd.util.hash_pandas_object(obj, index=True).values.tobytes())
+        cols = obj.columns if isinstance(obj, pd.DataFrame) else [obj.name]
+        h.update(repr([str(c) for c in cols]).encode())
+    return h.hexdigest()[:16]
+
+def _prune_chart_cache(outdir: Path, keep: int):
+    # least recently used first: a cache hit touches its PNG
+    pngs = sorted(outdir.glob("*-" + "[0-9a-f]" * 16 + ".png"), key=lambda p: p.stat().st_mtime)
+    for p in pngs[:max(0, len(pngs) - keep)]:
+        p.unlink(missing_ok=True)
+
+def make_charts(ctx: ReportContext, outdir: Path, workers: int = CHART_WORKERS) -> list[str]:
     """
-    Returns list of PNG paths. Source is 'csv' or 'db'.
+    Returns list of PNG paths. Every chart input comes from the report's
+    ReportContext (CSV or DB data, or streamed DB aggregates). PNGs already
+    in outdir for the same data are reused; the rest are drawn in up to
+    `workers` processes.
     """
     outdir.mkdir(parents=True, exist_ok=True)
-    charts = []
-
-    # Frames-over-time for both modes
-    ts_col = "timestamp_ms" if "timestamp_ms" in df.columns else ("timestamp" if "timestamp" in df.columns else None)
-    if ts_col:
-        p = _chart_frames_over_time(df, outdir, ts_col)
-        if p: charts.append(p)
-
-    if source == "csv":
-        # Build a small summary for RSSI by SSID
-        if set(["ssid","rssi"]).issubset(df.columns):
-            tmp = df.copy()
-            g = tmp.groupby("ssid", dropna=False).agg(
-                frames=("ssid","size"),
-                min_rssi=("rssi","min"),
-                avg_rssi=("rssi","mean"),
-                max_rssi=("rssi","max")
-            ).reset_index()
-            g = g.rename(columns={"ssid":"ssid"})
-            p = _chart_rssi_by_ssid(g, outdir)
-            if p: charts.append(p)
-    else:
-        # DB/analysis: leverage mac_summary_enhanced for SSID + RSSI stats if present
-        try:
-            summ = mac_summary_enhanced(df)
-            if not summ.empty and "ssid" in summ.columns:
-                p = _chart_rssi_by_ssid(summ, outdir)
-                if p: charts.append(p)
-        except Exception:
-            pass
+    specs = [
+        # Frames-over-time for both modes
+        ("frames_over_time", _draw_frames_per_min, lambda: _prep_frames_per_min(ctx.frames_per_minute)),
+        # RSSI by SSID: CSV groups by SSID, DB reuses the per-MAC summary
+        ("rssi_by_ssid", _draw_rssi_by_ssid, lambda: _prep_rssi_by_ssid(ctx.rssi_by_ssid)),
         # encType × authMode
-        p = _chart_enc_auth(df, outdir)
-        if p: charts.append(p)
+        ("enc_auth_stack", _draw_enc_auth, lambda: _prep_enc_auth(ctx.enc_auth)),
+        ("top_talkers", _draw_top_talkers, lambda: _prep_top_talkers(ctx.traffic)),
+    ]
+    charts, todo = [], []
+    for name, draw, prep in specs:
+        data = prep()
+        if data is None:
+            continue
+        path = outdir / f"{name}-{_chart_digest(name, data)}.png"
+        if path.exists():
+            os.utime(path)
+        else:
+            todo.append((draw, data, str(path)))
+        charts.append(str(path))
 
+    workers = min(workers, len(todo), os.cpu_count() or 1)
+    if workers > 1:
+        try:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                for f in [pool.submit(draw, data, path) for draw, data, path in todo]:
+                    f.result()
+            todo = []
+        except (OSError, BrokenProcessPool) as e:
+            print(f"[charts] process pool unavailable ({e}); drawing in-process")
+    for draw, data, path in todo:
+        draw(data, path)
+
+    if CHART_CACHE_MAX > 0:
+        _prune_chart_cache(outdir, max(CHART_CACHE_MAX, len(charts)))
     return charts
 
-
 # -----------------------
 # Branding helpers
 # -----------------------
@@ -299,12 +562,17 @@ def _make_logo(logo_path: str, align: str, max_w_mm: float, max_h_mm: float, ups
 # -----------------------
 # PDF builder
 # -----------------------
-def build_pdf(df: pd.DataFrame, out_pdf: Path, meta: dict, source: str):
+def build_pdf(df: pd.DataFrame, out_pdf: Path, meta: dict, source: str, analysis=None, log=print):
     """
     Build the PDF. df may be:
       - CSV schema (timestamp, ssid, bssid, channel, rssi)
       - DB/analysis schema (timestamp_ms, frame_len, src_mac/dst_mac, SSID/encType/authMode/contentLength, strength/rssi, ...)
+    or None when analysis is given: a wifi_analysis.ChunkedAnalysis already
+    fed with the DB rows chunk by chunk, whose aggregates the sections read.
+    All sections read from one ReportContext; log (None = quiet) gets the
+    per-section timings.
     """
+    ctx = ReportContext(df, analysis)
     styles = getSampleStyleSheet()
     styles.add(ParagraphStyle(name="Tiny", fontSize=8, leading=10))
 
@@ -357,36 +625,20 @@ def build_pdf(df: pd.DataFrame, out_pdf: Path, meta: dict, source: str):
     ]
 
     # ---- Schema detection ----
-    has_csv_schema = all(c in df.columns for c in ["timestamp", "ssid", "bssid", "channel", "rssi"])
-    has_ts_ms = "timestamp_ms" in df.columns
+    has_csv_schema = ctx.has_csv_schema
+    total_frames = ctx.total_frames
 
-    total_frames = int(df.shape[0])
     summary_bits = [f"{total_frames} frames observed"]
     if has_csv_schema:
-        summary_bits.insert(0, f"{df['bssid'].nunique()} unique MACs across {df['ssid'].replace('', pd.NA).dropna().nunique()} SSIDs")
-    else:
-        mac_col = _first_present(df, ["src_mac", "srcMac", "dst_mac", "dstMac", "bssid"])
-        if mac_col:
-            summary_bits.insert(0, f"{df[mac_col].nunique()} unique MACs")
+        summary_bits.insert(0, f"{ctx.unique_macs} unique MACs across {df['ssid'].replace('', pd.NA).dropna().nunique()} SSIDs")
+    elif ctx.unique_macs is not None:
+        summary_bits.insert(0, f"{ctx.unique_macs} unique MACs")
 
     story += [Paragraph("<b>Summary</b>: " + " • ".join(summary_bits) + ".", styles["Normal"]), Spacer(1, 12)]
 
     # ---- Parameters ----
-    if has_csv_schema:
-        min_ts = _fmt_ts(df["timestamp"].min())
-        max_ts = _fmt_ts(df["timestamp"].max())
-    elif has_ts_ms:
-        ts = pd.to_datetime(df["timestamp_ms"], unit="ms", errors="coerce")
-        min_ts = _fmt_ts(ts.min())
-        max_ts = _fmt_ts(ts.max())
-    else:
-        tcol = _first_present(df, ["time", "timestamp"])
-        if tcol:
-            ts = pd.to_datetime(df[tcol], errors="coerce")
-            min_ts = _fmt_ts(ts.min())
-            max_ts = _fmt_ts(ts.max())
-        else:
-            min_ts = max_ts = ""
+    first, last = ctx.time_window
+    min_ts, max_ts = _fmt_ts(first), _fmt_ts(last)
 
     params_rows = [
         ["Records", f"{total_frames}"],
@@ -419,13 +671,14 @@ def build_pdf(df: pd.DataFrame, out_pdf: Path, meta: dict, source: str):
     story += [Paragraph("<b>Parameters</b>", styles["Heading3"]), Spacer(1, 4), params_tbl, Spacer(1, 12)]
 
     # ---- Key Visuals (charts) ----
-    chart_paths = make_charts("csv" if has_csv_schema else "db", df, Path("artifacts"))
+    with ctx.timed("charts"):
+        chart_paths = make_charts(ctx, Path("artifacts"))
     if chart_paths:
         story += [Paragraph("<b>Key Visuals</b>", styles["Heading2"]), Spacer(1, 6)]
         for p in chart_paths:
             story += [RLImage(p, width=170*mm, height=95*mm), Spacer(1, 4)]
         cap = ParagraphStyle("Cap", parent=styles["Normal"], fontSize=8, textColor=colors.HexColor("#555"))
-        story += [Paragraph("Charts: Frames/min timeline; RSSI by SSID (min/avg/max); Encryption × Auth (if available).", cap), Spacer(1, 12)]
+        story += [Paragraph("Charts: Frames/min timeline; RSSI by SSID (min/avg/max); Encryption × Auth; top talkers (if available).", cap), Spacer(1, 12)]
         story += [PageBreak()]
     else:
         story += [Paragraph("<b>Key Visuals</b>", styles["Heading2"]),
@@ -435,13 +688,9 @@ def build_pdf(df: pd.DataFrame, out_pdf: Path, meta: dict, source: str):
 
     # ---- Analytics sections (only if needed cols exist) ----
     if HAVE_ANALYSIS:
-        analysis_df = df.copy()
-        if "timestamp_ms" not in analysis_df.columns and "timestamp" in analysis_df.columns:
-            ts = pd.to_datetime(analysis_df["timestamp"], errors="coerce")
-            analysis_df["timestamp_ms"] = (ts.astype("int64") // 1_000_000).astype("int64")
+        sz, ia, rtscts, links = ctx.frame_size, ctx.interarrival, ctx.rts_cts, ctx.ap_links
 
-        if "frame_len" in analysis_df.columns:
-            sz = frame_size_stats(analysis_df)
+        if sz is not None:
             story += [
                 Paragraph("<b>Frame Size Distribution</b>", styles["Heading3"]),
                 Spacer(1, 4),
@@ -454,8 +703,7 @@ def build_pdf(df: pd.DataFrame, out_pdf: Path, meta: dict, source: str):
                 Spacer(1, 10),
             ]
 
-        if "timestamp_ms" in analysis_df.columns:
-            ia = interarrival_stats(analysis_df)
+        if ia is not None:
             story += [
                 Paragraph("<b>Inter-Arrival Times</b>", styles["Heading3"]),
                 Spacer(1, 4),
@@ -466,8 +714,7 @@ def build_pdf(df: pd.DataFrame, out_pdf: Path, meta: dict, source: str):
                 Spacer(1, 10),
             ]
 
-        if set(["frame_type", "subtype"]).issubset(analysis_df.columns):
-            rtscts = rts_cts_stats(analysis_df)
+        if rtscts is not None:
             story += [
                 Paragraph("<b>RTS / CTS</b>", styles["Heading3"]),
                 Spacer(1, 4),
@@ -476,28 +723,54 @@ def build_pdf(df: pd.DataFrame, out_pdf: Path, meta: dict, source: str):
                     f"RTS→CTS match rate: {rtscts['match_rate']*100:.1f}%",
                     styles["Normal"]
                 ),
-                Spacer(1, 10),
             ]
-
-        if set(["frame_type", "subtype", "bssid"]).issubset(analysis_df.columns):
-            aps = infer_aps(analysis_df)
-            links = ap_client_links(analysis_df, aps)
-            if not links.empty:
-                rows = [["SSID", "Channel", "AP (BSSID)", "Client MAC", "Frames"]]
-                for r in links.head(10).itertuples(index=False):
-                    rows.append([r.ssid or "<unknown>", r.channel if pd.notna(r.channel) else "-", r.ap_bssid, r.client_mac, int(r.frames)])
-                tbl = Table(rows, repeatRows=1)
-                tbl.setStyle(TableStyle([
-                    ("BACKGROUND", (0, 0), (-1, 0), HEADER_BG),
-                    ("GRID", (0, 0), (-1, -1), 0.25, GRID),
-                    ("FONTSIZE", (0, 0), (-1, -1), 8),
-                    ("VALIGN", (0, 0), (-1, -1), "MIDDLE"),
-                ]))
-                story += [Paragraph("<b>Access Points & SSIDs</b>", styles["Heading3"]), Spacer(1, 4), tbl, Spacer(1, 10)]
+            if rtscts.get("matched"):
+                hist = " • ".join(f"{ms} ms: {n}" for ms, n in rtscts["latency_hist"].items())
+                story += [
+                    Spacer(1, 2),
+                    Paragraph(
+                        f"RTS→CTS latency: Mean {rtscts['latency_mean_ms']:.2f} ms • "
+                        f"P50 {rtscts['latency_p50_ms']:.0f} ms • P95 {rtscts['latency_p95_ms']:.0f} ms • "
+                        f"Max {rtscts['latency_max_ms']:.0f} ms",
+                        styles["Normal"]
+                    ),
+                    Paragraph(f"Latency distribution ({rtscts['matched']} matched): {hist}", styles["Normal"]),
+                ]
+            story += [Spacer(1, 10)]
+
+        if links is not None and not links.empty:
+            rows = [["SSID", "Channel", "AP (BSSID)", "Client MAC", "Frames", "Bytes", "First Seen", "Last Seen"]]
+            for r in links.head(10).itertuples(index=False):
+                rows.append([r.ssid or "<unknown>", r.channel if pd.notna(r.channel) else "-", r.ap_bssid, r.client_mac,
+                             int(r.frames), int(r.bytes) if pd.notna(r.bytes) else "-",
+                             _fmt_ts(r.first_seen), _fmt_ts(r.last_seen)])
+            tbl = Table(rows, repeatRows=1)
+            tbl.setStyle(TableStyle([
+                ("BACKGROUND", (0, 0), (-1, 0), HEADER_BG),
+                ("GRID", (0, 0), (-1, -1), 0.25, GRID),
+                ("FONTSIZE", (0, 0), (-1, -1), 8),
+                ("VALIGN", (0, 0), (-1, -1), "MIDDLE"),
+            ]))
+            story += [Paragraph("<b>Access Points & SSIDs</b>", styles["Heading3"]), Spacer(1, 4), tbl, Spacer(1, 10)]
+
+        pairs = mac_pairs(df, matrix=ctx.traffic) if ctx.traffic is not None else None
+        if pairs is not None and not pairs.empty:
+            rows = [["Source MAC", "Destination MAC", "Frames"]]
+            for r in pairs.itertuples(index=False):
+                rows.append([r.src_mac if pd.notna(r.src_mac) else "-", r.dst_mac if pd.notna(r.dst_mac) else "-",
+                             int(r.frames)])
+            tbl = Table(rows, repeatRows=1)
+            tbl.setStyle(TableStyle([
+                ("BACKGROUND", (0, 0), (-1, 0), HEADER_BG),
+                ("GRID", (0, 0), (-1, -1), 0.25, GRID),
+                ("FONTSIZE", (0, 0), (-1, -1), 8),
+                ("VALIGN", (0, 0), (-1, -1), "MIDDLE"),
+            ]))
+            story += [Paragraph("<b>Top MAC Pairs</b>", styles["Heading3"]), Spacer(1, 4), tbl, Spacer(1, 10)]
 
     # ---- Observed MACs (final table) ----
+    summary = ctx.mac_summary
     if has_csv_schema:
-        summary = summarize_bssid_table(df)
         header = ["#", "MAC (BSSID)", "SSID(s)", "Frames (n)", "First Seen", "Last Seen", "Min dBm", "Avg dBm", "Max dBm", "Ch"]
         rows = [header]
         for i, row in enumerate(summary.itertuples(index=False), start=1):
@@ -518,8 +791,6 @@ def build_pdf(df: pd.DataFrame, out_pdf: Path, meta: dict, source: str):
         col_widths = [8*mm, 32*mm, 40*mm, 22*mm, 32*mm, 32*mm, 16*mm, 16*mm, 16*mm, 16*mm]
     else:
         # Enhanced summary with your preferred order
-        summary = mac_summary_enhanced(df)
-
         # stacked header labels for dBm (force bold)
         hdr_style = ParagraphStyle("Hdr", parent=styles["Normal"], fontSize=8, alignment=TA_CENTER, fontName="Helvetica-Bold")
 
@@ -598,7 +869,7 @@ def build_pdf(df: pd.DataFrame, out_pdf: Path, meta: dict, source: str):
     story += [Paragraph(foot, ParagraphStyle("foot", parent=styles["Normal"], fontSize=8, textColor=colors.HexColor('#555555')))]
 
     # --- Per-Frame Details (last 25) ---
-    pf = per_frame_view(df, limit=25)
+    pf = ctx.per_frame
     if not pf.empty:
         col_order = []
         for c in ["time", "timestamp"]:
@@ -643,11 +914,14 @@ def build_pdf(df: pd.DataFrame, out_pdf: Path, meta: dict, source: str):
         canvas.drawRightString(w - 20*mm, 12*mm, f"Page {doc.page}")
         canvas.restoreState()
 
-    doc.build(
-        story,
-        onFirstPage=lambda c, d: _header_footer(c, d),
-        onLaterPages=lambda c, d: _header_footer(c, d),
-    )
+    with ctx.timed("pdf_build"):
+        doc.build(
+            story,
+            onFirstPage=lambda c, d: _header_footer(c, d),
+            onLaterPages=lambda c, d: _header_footer(c, d),
+        )
+    if log:
+        ctx.log_timings(log)
 
 
 # -----------------------
@@ -684,6 +958,9 @@ def main():
     ap.add_argument("--db-user", default="root")
     ap.add_argument("--db-pass", default="")
     ap.add_argument("--db-name", default="team404")
+    ap.add_argument("--chunk-size", type=int, default=0,
+                    help="DB only: stream the project in chunks of N rows into mergeable "
+                         "aggregates instead of loading it whole (0 = off)")
 
     args = ap.parse_args()
 
@@ -694,6 +971,7 @@ def main():
     print(f"[logo] resolved path: {args.logo_path}")
 
     # Decide data source
+    analysis = None
     if args.source == "csv":
         if not args.in_csv:
             raise SystemExit("Error: --in is required when --source=csv")
@@ -718,7 +996,11 @@ def main():
             pid = int(args.project_id)
 
         project_meta = fetch_project_metadata(conn, pid)
-        df = fetch_ingest_as_analysis_df(conn, pid)
+        if args.chunk_size > 0:
+            analysis = analyze_chunks(iter_ingest_analysis_chunks(conn, pid, args.chunk_size, report=print))
+            df = None
+        else:
+            df = fetch_ingest_as_analysis_df(conn, pid, report=print)
         data_file_name = "(database)"
 
     # Pagesize decision (portrait/landscape)
@@ -756,7 +1038,7 @@ def main():
 
     out.parent.mkdir(parents=True, exist_ok=True)
 
-    build_pdf(df, out, meta, args.source)
+    build_pdf(df, out, meta, args.source, analysis)
     print(f"Report written to: {out.resolve()}")
 
 
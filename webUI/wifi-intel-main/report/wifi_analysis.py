@@ -21,16 +21,34 @@ def _first_present(df: pd.DataFrame, candidates: list[str]) -> str | None:
     return None
 
 
-def _top_mode(s: pd.Series) -> str:
-    """Return most frequent non-null value as string (safe)."""
-    s = s.dropna()
-    if s.empty:
-        return ""
-    try:
-        return str(s.mode().iloc[0])
-    except Exception:
-        vc = s.value_counts()
-        return str(vc.index[0]) if len(vc) else ""
+def _group_modes(gid: np.ndarray, ngroups: int, values: pd.Series) -> np.ndarray:
+    """
+    Most frequent non-null value per group, as strings ("" if none), for row
+    group numbers gid in 0..ngroups-1. Ties go to the smallest value, like
+    Series.mode(). Counts (group, value) code pairs in one pass - a bincount
+    when the pairs fit a dense table, value_counts otherwise - and takes the
+    first maximum per group; no per-group Python.
+    """
+    out = np.full(ngroups, "", dtype=object)
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        codes, uniques = values.cat.codes.to_numpy(), values.cat.categories
+    else:
+        codes, uniques = pd.factorize(values, sort=True)
+    ok = codes >= 0
+    if not ok.any():
+        return out
+    nv = len(uniques)
+    keys = gid[ok].astype("int64") * nv + codes[ok]
+    if ngroups * nv <= 4 * len(keys):
+        table = np.bincount(keys, minlength=ngroups * nv).reshape(ngroups, nv)
+        g = np.flatnonzero(table.any(axis=1))
+        c = table[g].argmax(axis=1)
+    else:
+        counts = pd.Series(keys).value_counts(sort=False).sort_index()
+        top = counts.groupby(counts.index.to_numpy() // nv, sort=False).idxmax()
+        g, c = np.divmod(top.to_numpy(), nv)
+    out[g] = pd.Series(uniques.take(c)).astype(str).to_numpy()
+    return out
 
 
 # ---------- analytics used by the report ----------
@@ -82,12 +100,12 @@ def beacon_summary(df: pd.DataFrame) -> pd.DataFrame:
     ]
     if beacons.empty:
         return pd.DataFrame(columns=["ssid", "channel", "bssid_count", "beacon_count", "hidden"])
-    grp = beacons.groupby(["ssid", "channel"], dropna=False)
+    grp = beacons.groupby(["ssid", "channel"], dropna=False, observed=True)
     res = grp.agg(
         bssid_count=("bssid", pd.Series.nunique),
         beacon_count=("bssid", "count"),
     ).reset_index()
-    res["hidden"] = res["ssid"].fillna("").eq("") | res["ssid"].astype(str).str.contains("hidden", case=False, na=False)
+    res["hidden"] = res["ssid"].astype(object).fillna("").eq("") | res["ssid"].astype(str).str.contains("hidden", case=False, na=False)
     return res.sort_values(["hidden", "beacon_count"], ascending=[False, False])
 
 
@@ -102,7 +120,7 @@ def infer_aps(df: pd.DataFrame) -> pd.DataFrame:
     ]
     if beacons.empty:
         return pd.DataFrame(columns=["ap_bssid", "ssid", "channel", "beacon_count"])
-    aps = beacons.groupby("bssid", dropna=False).agg(
+    aps = beacons.groupby("bssid", dropna=False, observed=True).agg(
         ssid=("ssid", lambda x: x.dropna().iloc[0] if len(x.dropna()) else ""),
         channel=("channel", lambda x: x.dropna().iloc[0] if len(x.dropna()) else np.nan),
         beacon_count=("bssid", "count"),
@@ -110,96 +128,217 @@ def infer_aps(df: pd.DataFrame) -> pd.DataFrame:
     return aps
 
 
-def talkers(df: pd.DataFrame, top_n: int = 10) -> Tuple[pd.DataFrame, pd.DataFrame]:
-    frames_by_src = (
-        df.groupby("src_mac", dropna=False)
-        .size()
-        .reset_index(name="frames")
-        .sort_values("frames", ascending=False)
-        .head(top_n)
-    )
-    bytes_by_src = (
-        df.groupby("src_mac", dropna=False)["frame_len"]
-        .sum()
-        .reset_index(name="bytes")
-        .sort_values("bytes", ascending=False)
-        .head(top_n)
-    )
-    return frames_by_src, bytes_by_src
+@dataclass
+class TrafficMatrix:
+    """
+    Frames and bytes per (src_mac, dst_mac) pair; per_mac sums them per source.
+    Built once (traffic_matrix or TrafficAgg) and shared by talkers, mac_pairs
+    and the talkers chart.
+    """
+    pairs: pd.DataFrame   # src_mac, dst_mac, frames, bytes
+    per_mac: pd.DataFrame | None = None  # src_mac, frames, bytes
+
+    def __post_init__(self):
+        if self.per_mac is None:
+            self.per_mac = (self.pairs.groupby("src_mac", dropna=False, sort=False)[["frames", "bytes"]]
+                            .sum(min_count=1).reset_index())
+            self.per_mac["frames"] = self.per_mac["frames"].astype("int64")
 
+    def talkers(self, top_n: int = 10) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        frames_by_src = self.per_mac.nlargest(top_n, "frames")[["src_mac", "frames"]]
+        bytes_by_src = self.per_mac.dropna(subset=["bytes"]).nlargest(top_n, "bytes")[["src_mac", "bytes"]]
+        return frames_by_src, bytes_by_src
 
-def mac_pairs(df: pd.DataFrame, top_n: int = 10) -> pd.DataFrame:
-    if not set(["src_mac", "dst_mac"]).issubset(df.columns):
+    def top_pairs(self, top_n: int = 10) -> pd.DataFrame:
+        return self.pairs.nlargest(top_n, "frames")[["src_mac", "dst_mac", "frames"]]
+
+
+def traffic_matrix(df: pd.DataFrame) -> TrafficMatrix:
+    """
+    One pass over the rows: the (src, dst) codes are packed into one integer
+    key, factorized and counted with bincount; per-source totals come from the
+    same codes. NULL MACs are kept as their own group. bytes is NA when there
+    is no frame length column.
+    """
+    src = df["src_mac"] if "src_mac" in df.columns else pd.Series(np.nan, index=df.index)
+    dst = df["dst_mac"] if "dst_mac" in df.columns else pd.Series(np.nan, index=df.index, dtype=src.dtype)
+    len_col = _first_present(df, ["frame_len", "contentLength", "content_length", "len", "length"])
+    ln = (pd.to_numeric(df[len_col], errors="coerce").fillna(0).to_numpy(dtype="float64")
+          if len_col else None)
+    (src_code, dst_code), macs = _shared_codes(src, dst)
+    names = np.append(np.asarray(macs, dtype=object), np.nan)  # code -1 -> NaN
+
+    width = len(macs) + 1
+    pair_code, pair_keys = pd.factorize((src_code + 1).astype("int64") * width + (dst_code + 1))
+    s_code, d_code = np.divmod(pair_keys, width)
+    pairs = pd.DataFrame({
+        "src_mac": names[s_code - 1],
+        "dst_mac": names[d_code - 1],
+        "frames": np.bincount(pair_code, minlength=len(pair_keys)),
+        "bytes": np.bincount(pair_code, ln, len(pair_keys)) if len_col else np.nan,
+    })
+
+    frames = np.bincount(src_code + 1, minlength=width)
+    seen = np.flatnonzero(frames)
+    per_mac = pd.DataFrame({
+        "src_mac": names[seen - 1],
+        "frames": frames[seen],
+        "bytes": np.bincount(src_code + 1, ln, width)[seen] if len_col else np.nan,
+    })
+    return TrafficMatrix(pairs, per_mac)
+
+
+def talkers(df: pd.DataFrame, top_n: int = 10, matrix: TrafficMatrix | None = None) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """Top sources by frames and by bytes; pass matrix to reuse a traffic_matrix(df)."""
+    return (matrix if matrix is not None else traffic_matrix(df)).talkers(top_n)
+
+
+def mac_pairs(df: pd.DataFrame, top_n: int = 10, matrix: TrafficMatrix | None = None) -> pd.DataFrame:
+    if matrix is None and not set(["src_mac", "dst_mac"]).issubset(df.columns):
         return pd.DataFrame(columns=["src_mac", "dst_mac", "frames"])
-    pairs = (
-        df.groupby(["src_mac", "dst_mac"], dropna=False)
-        .size()
-        .reset_index(name="frames")
-        .sort_values("frames", ascending=False)
-    )
-    return pairs.head(top_n)
+    return (matrix if matrix is not None else traffic_matrix(df)).top_pairs(top_n)
 
 
-def rts_cts_stats(df: pd.DataFrame) -> Dict[str, float]:
+def _shared_codes(*cols: pd.Series) -> tuple[list[np.ndarray], pd.Index]:
+    """
+    Integer codes for several MAC columns in one code space (NULL -> -1), so
+    equal MACs get equal codes across columns, and the values behind the
+    codes. Categorical columns are mapped through their categories instead
+    of hashing every row.
+    """
+    if all(isinstance(c.dtype, pd.CategoricalDtype) for c in cols):
+        union = cols[0].cat.categories
+        for c in cols[1:]:
+            union = union.union(c.cat.categories)
+        out = []
+        for c in cols:
+            lookup = np.append(union.get_indexer(c.cat.categories), -1)  # code -1 -> -1
+            out.append(lookup[c.cat.codes.to_numpy()])
+        return out, union
+    codes, uniques = pd.factorize(np.concatenate([np.asarray(c, dtype=object) for c in cols]))
+    return np.split(codes, np.cumsum([len(c) for c in cols])[:-1]), pd.Index(uniques)
+
+
+def _is_value(s: pd.Series, value: str) -> np.ndarray:
+    """s.astype(str).str.lower() == value; a categorical only lowers its categories."""
+    if isinstance(s.dtype, pd.CategoricalDtype):
+        return s.isin([c for c in s.cat.categories if str(c).lower() == value]).to_numpy()
+    return (s.astype(str).str.lower() == value).to_numpy()
+
+
+def rts_cts_stats(df: pd.DataFrame, window_ms: int = 5) -> Dict[str, float]:
+    """
+    RTS/CTS counts, and how many RTS (A>B) have a CTS back (B>A) within
+    window_ms. Each RTS takes the nearest such CTS (merge_asof by reversed
+    MAC pair); latency_hist is the distribution of CTS - RTS times in ms.
+    """
     subtype = df.get("subtype")
     frame_type = df.get("frame_type")
     if subtype is None or frame_type is None:
         return {"rts_count": 0, "cts_count": 0, "match_rate": 0.0}
 
-    sub = subtype.astype(str).str.lower()
-    rts = df[(frame_type == "ctrl") & (sub == "rts")]
-    cts = df[(frame_type == "ctrl") & (sub == "cts")]
+    ctrl = df[(frame_type == "ctrl").fillna(False).to_numpy(dtype=bool)]
+    rts = ctrl[_is_value(ctrl["subtype"], "rts")]
+    cts = ctrl[_is_value(ctrl["subtype"], "cts")]
     stats = {
         "rts_count": int(len(rts)),
         "cts_count": int(len(cts)),
         "match_rate": 0.0,
+        "matched": 0,
+        "latency_hist": {},
     }
     if rts.empty or cts.empty:
         return stats
 
-    rts_tmp = rts[["timestamp_ms", "src_mac", "dst_mac"]].copy()
-    cts_tmp = cts[["timestamp_ms", "src_mac", "dst_mac"]].copy()
-    rts_tmp["key"] = rts_tmp["src_mac"].astype(str) + ">" + rts_tmp["dst_mac"].astype(str)
-    cts_tmp["key_rev"] = cts_tmp["src_mac"].astype(str) + ">" + cts_tmp["dst_mac"].astype(str)
-
-    cts_idx = cts_tmp.set_index("key_rev")
-    matches = 0
-    for _, row in rts_tmp.iterrows():
-        key_rev = f"{row['dst_mac']}>{row['src_mac']}"
-        if key_rev in cts_idx.index:
-            sel = cts_idx.loc[[key_rev]] if isinstance(cts_idx.loc[key_rev], pd.DataFrame) else pd.DataFrame([cts_idx.loc[key_rev]])
-            dt_min = (pd.to_numeric(sel["timestamp_ms"], errors="coerce") - pd.to_numeric(row["timestamp_ms"], errors="coerce")).abs().min()
-            if pd.notna(dt_min) and dt_min <= 5:  # 5 ms window
-                matches += 1
-
-    if len(rts_tmp) > 0:
-        stats["match_rate"] = round(matches / len(rts_tmp), 3)
+    (rts_src, rts_dst, cts_src, cts_dst), _ = _shared_codes(rts["src_mac"], rts["dst_mac"],
+                                                            cts["src_mac"], cts["dst_mac"])
+    # (A, B) pair as one int; a CTS is keyed by its reversed pair to line up with its RTS
+    width = max(rts_src.max(), rts_dst.max(), cts_src.max(), cts_dst.max()) + 2
+    left = pd.DataFrame({
+        "ts": pd.to_numeric(rts["timestamp_ms"], errors="coerce").to_numpy(dtype="float64"),
+        "pair": (rts_src + 1).astype("int64") * width + (rts_dst + 1),
+    }).dropna(subset=["ts"]).sort_values("ts", kind="stable")
+    right = pd.DataFrame({
+        "ts": pd.to_numeric(cts["timestamp_ms"], errors="coerce").to_numpy(dtype="float64"),
+        "pair": (cts_dst + 1).astype("int64") * width + (cts_src + 1),
+    }).dropna(subset=["ts"]).sort_values("ts", kind="stable")
+    right["cts_ts"] = right["ts"]
+
+    m = pd.merge_asof(left, right, on="ts", by="pair", direction="nearest", tolerance=float(window_ms))
+    latency = (m["cts_ts"] - m["ts"]).dropna()
+    stats["matched"] = int(len(latency))
+    stats["match_rate"] = round(len(latency) / len(rts), 3)
+    if not latency.empty:
+        stats.update({
+            "latency_p50_ms": float(np.percentile(latency, 50)),
+            "latency_p95_ms": float(np.percentile(latency, 95)),
+            "latency_max_ms": float(latency.max()),
+            "latency_mean_ms": float(latency.mean()),
+        })
+        hist = latency.round().astype("int64").value_counts().sort_index()
+        stats["latency_hist"] = {int(k): int(v) for k, v in hist.items()}
     return stats
 
 
-def ap_client_links(df: pd.DataFrame, aps_df: pd.DataFrame) -> pd.DataFrame:
-    if aps_df is None or aps_df.empty or "ap_bssid" not in aps_df.columns:
-        return pd.DataFrame(columns=["ssid", "channel", "ap_bssid", "client_mac", "frames"])
-    ap_set = set(aps_df["ap_bssid"].tolist())
-    data = df[df.get("frame_type", "") == "data"].copy()
-    if data.empty or "bssid" not in data.columns:
-        return pd.DataFrame(columns=["ssid", "channel", "ap_bssid", "client_mac", "frames"])
+LINK_COLUMNS = ["ssid", "channel", "ap_bssid", "client_mac", "frames", "bytes", "first_seen", "last_seen"]
 
-    data = data[data["bssid"].isin(ap_set)]
-    rows = []
-    for _, r in data.iterrows():
-        ap = r["bssid"]
-        if r.get("src_mac") is not None and r["src_mac"] != ap:
-            rows.append((ap, r["src_mac"]))
-        if r.get("dst_mac") is not None and r["dst_mac"] != ap:
-            rows.append((ap, r["dst_mac"]))
 
-    if not rows:
-        return pd.DataFrame(columns=["ssid", "channel", "ap_bssid", "client_mac", "frames"])
+def ap_client_links(df: pd.DataFrame, aps_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    (AP, client) pairs seen in data frames addressed to/from a known AP
+    (bssid in aps_df): frames, bytes, first/last seen per link, busiest first.
+    The src and dst sides are masked and stacked with concat, then counted
+    with one groupby on an integer pair key.
+    """
+    if aps_df is None or aps_df.empty or "ap_bssid" not in aps_df.columns:
+        return pd.DataFrame(columns=LINK_COLUMNS)
+    if "frame_type" not in df.columns or "bssid" not in df.columns:
+        return pd.DataFrame(columns=LINK_COLUMNS)
+
+    is_data = (df["frame_type"] == "data").fillna(False).to_numpy(dtype=bool)
+    data = df[is_data & df["bssid"].isin(_plain(aps_df["ap_bssid"])).to_numpy()]
+    sides = [c for c in ("src_mac", "dst_mac") if c in data.columns]
+    if data.empty or not sides:
+        return pd.DataFrame(columns=LINK_COLUMNS)
+
+    (ap, *clients), macs = _shared_codes(data["bssid"], *(data[c] for c in sides))
+    ts = (pd.to_numeric(data["timestamp_ms"], errors="coerce").to_numpy(dtype="float64")
+          if "timestamp_ms" in data.columns else np.full(len(data), np.nan))
+    len_col = _first_present(data, ["frame_len", "contentLength", "content_length", "len", "length"])
+    ln = (pd.to_numeric(data[len_col], errors="coerce").to_numpy(dtype="float64")
+          if len_col else np.full(len(data), np.nan))
+
+    width = len(macs) + 1
+    parts = []
+    for client in clients:
+        keep = (ap >= 0) & (client >= 0) & (client != ap)
+        parts.append(pd.DataFrame({
+            "pair": ap[keep].astype("int64") * width + client[keep],
+            "ts": ts[keep],
+            "len": ln[keep],
+        }))
+    pairs = pd.concat(parts, ignore_index=True)
+    if pairs.empty:
+        return pd.DataFrame(columns=LINK_COLUMNS)
+
+    links = pairs.groupby("pair", sort=False).agg(
+        frames=("pair", "size"),
+        bytes=("len", "sum"),
+        first_seen=("ts", "min"),
+        last_seen=("ts", "max"),
+    )
+    ap_code, client_code = np.divmod(links.index.to_numpy(), width)
+    links = links.reset_index(drop=True)
+    links.insert(0, "ap_bssid", macs.take(ap_code).astype(object))
+    links.insert(1, "client_mac", macs.take(client_code).astype(object))
+    links["bytes"] = links["bytes"].astype("int64") if len_col else pd.NA
+    links["first_seen"] = pd.to_datetime(links["first_seen"], unit="ms", errors="coerce")
+    links["last_seen"] = pd.to_datetime(links["last_seen"], unit="ms", errors="coerce")
 
-    pairs = pd.DataFrame(rows, columns=["ap_bssid", "client_mac"]).value_counts().reset_index(name="frames")
-    out = pairs.merge(aps_df[["ap_bssid", "ssid", "channel"]], on="ap_bssid", how="left")
-    return out.sort_values("frames", ascending=False)
+    aps = aps_df[["ap_bssid", "ssid", "channel"]].apply(_plain).drop_duplicates("ap_bssid")
+    out = links.merge(aps, on="ap_bssid", how="left")[LINK_COLUMNS]
+    return out.sort_values(["frames", "ap_bssid", "client_mac"], ascending=[False, True, True],
+                           ignore_index=True)
 
 
 # ---------- assessor-requested helpers used by the PDF ----------
@@ -207,37 +346,35 @@ def mac_summary_enhanced(df: pd.DataFrame) -> pd.DataFrame:
     """
     Per-MAC summary including SSID, encType, authMode, and average content length.
     Works with both snake_case and camelCase columns.
+
+    The MACs are factorized once; one groupby on those codes computes the
+    counts, time range, RSSI and length stats, and the modal
+    SSID/encType/authMode reuse the same codes (_group_modes).
     """
     mac_col = _first_present(df, ["src_mac", "srcMac", "bssid", "mac", "dst_mac", "dstMac"])
-    tmp = df.copy()
-    if mac_col is None:
-        tmp["mac_tmp"] = "(unknown)"
-        mac_col = "mac_tmp"
-
-    # timestamps
-    if "timestamp_ms" in tmp.columns:
-        ts = pd.to_datetime(tmp["timestamp_ms"], unit="ms", errors="coerce")
+    mac = df[mac_col] if mac_col else pd.Series("(unknown)", index=df.index)
+
+    # timestamps: min/max on the raw ms, converted once per MAC afterwards
+    tcol = None if "timestamp_ms" in df.columns else _first_present(df, ["time", "timestamp"])
+    if "timestamp_ms" in df.columns:
+        ts = pd.to_numeric(df["timestamp_ms"], errors="coerce")
+    elif tcol:
+        ts = pd.to_datetime(df[tcol], errors="coerce")
     else:
-        tcol = _first_present(tmp, ["time", "timestamp"])
-        ts = pd.to_datetime(tmp[tcol], errors="coerce") if tcol else pd.Series([pd.NaT] * len(tmp))
+        ts = pd.Series(pd.NaT, index=df.index)
 
     # strength
-    rssi_col = _first_present(tmp, ["strength", "rssi"])
-    rssi = pd.to_numeric(tmp[rssi_col], errors="coerce") if rssi_col else pd.Series([pd.NA] * len(tmp))
+    rssi_col = _first_present(df, ["strength", "rssi"])
+    rssi = pd.to_numeric(df[rssi_col], errors="coerce") if rssi_col else pd.Series(np.nan, index=df.index)
 
     # extra fields
-    ssid_col = _first_present(tmp, ["SSID", "ssid"])
-    enc_col  = _first_present(tmp, ["encType", "enc_type"])
-    auth_col = _first_present(tmp, ["authMode", "auth_mode"])
-    len_col  = _first_present(tmp, ["contentLength", "content_length", "len", "length"])
-
-    g = pd.DataFrame({"mac": tmp[mac_col], "ts": ts, "rssi": rssi})
-    if ssid_col: g["ssid"] = tmp[ssid_col]
-    if enc_col:  g["encType"] = tmp[enc_col]
-    if auth_col: g["authMode"] = tmp[auth_col]
-    if len_col:  g["contentLength"] = pd.to_numeric(tmp[len_col], errors="coerce")
-
-    base = g.groupby("mac", dropna=False).agg(
+    ssid_col = _first_present(df, ["SSID", "ssid"])
+    enc_col  = _first_present(df, ["encType", "enc_type"])
+    auth_col = _first_present(df, ["authMode", "auth_mode"])
+    len_col  = _first_present(df, ["contentLength", "content_length", "len", "length"])
+
+    g = pd.DataFrame({"mac": mac, "ts": ts, "rssi": rssi})
+    aggs = dict(
         frames=("mac", "size"),
         first_seen=("ts", "min"),
         last_seen=("ts", "max"),
@@ -245,13 +382,24 @@ def mac_summary_enhanced(df: pd.DataFrame) -> pd.DataFrame:
         avg_rssi=("rssi", "mean"),
         max_rssi=("rssi", "max"),
     )
+    if len_col:
+        g["contentLength"] = pd.to_numeric(df[len_col], errors="coerce")
+        aggs["avg_len"] = ("contentLength", "mean")
 
-    base["ssid"] = g.groupby("mac")["ssid"].agg(_top_mode) if "ssid" in g.columns else ""
-    base["encType"] = g.groupby("mac")["encType"].agg(_top_mode) if "encType" in g.columns else ""
-    base["authMode"] = g.groupby("mac")["authMode"].agg(_top_mode) if "authMode" in g.columns else ""
-    base["avg_len"] = g.groupby("mac")["contentLength"].mean().round(0) if "contentLength" in g.columns else pd.NA
+    gid, macs = pd.factorize(mac, sort=True, use_na_sentinel=False)
+    base = g.groupby(gid).agg(**aggs)
+    base.index = pd.Index(macs, name="mac")
+    if "timestamp_ms" in df.columns:
+        base["first_seen"] = pd.to_datetime(base["first_seen"], unit="ms", errors="coerce")
+        base["last_seen"] = pd.to_datetime(base["last_seen"], unit="ms", errors="coerce")
+
+    for name, col in (("ssid", ssid_col), ("encType", enc_col), ("authMode", auth_col)):
+        base[name] = _group_modes(gid, len(base), df[col]) if col else ""
+    base["avg_len"] = base["avg_len"].round(0) if len_col else pd.NA
 
     out = base.reset_index().rename(columns={"mac": "bssid"})
+    out = out[["bssid", "frames", "first_seen", "last_seen", "min_rssi", "avg_rssi", "max_rssi",
+               "ssid", "encType", "authMode", "avg_len"]]
     out["avg_rssi"] = out["avg_rssi"].round(1)
     return out.sort_values(["frames", "bssid"], ascending=[False, True])
 
@@ -277,3 +425,427 @@ def per_frame_view(df: pd.DataFrame, limit: int = 25) -> pd.DataFrame:
     if time_col:
         view = view.sort_values(time_col)
     return view.tail(limit).reset_index(drop=True)
+
+
+# ---------- mergeable aggregates (chunked input) ----------
+# The same analyses as above, for input that arrives in chunks (see
+# db_adapter.iter_ingest_analysis_chunks) and must not be concatenated.
+# Each aggregate keeps a small partial result: update() folds in a chunk,
+# merge() folds in another aggregate of the same kind, result() returns
+# what the DataFrame function above returns for the whole input.
+# Order-dependent ones (interarrival, per-frame tail) expect chunks in
+# timestamp order, and merge() expects `other` to cover later rows.
+
+def _plain(s: pd.Series) -> pd.Series:
+    """Categorical -> object, so partial results from different chunks line up."""
+    return s.astype(object) if isinstance(s.dtype, pd.CategoricalDtype) else s
+
+
+def _regroup(parts: list, keys: list[str], how: dict) -> pd.DataFrame:
+    """Combine partial per-key aggregates (flat frames) into one."""
+    parts = [p for p in parts if p is not None and not p.empty]
+    if not parts:
+        return None
+    if len(parts) == 1:
+        return parts[0]
+    both = pd.concat(parts, ignore_index=True)
+    return both.groupby(keys, dropna=False, sort=False).agg(how).reset_index()
+
+
+def _add_counts(a: pd.Series | None, b: pd.Series) -> pd.Series:
+    return b if a is None else a.add(b, fill_value=0)
+
+
+def _percentile_from_counts(counts: pd.Series, q: float) -> float:
+    """np.percentile (linear) of the values counted in counts (value -> n)."""
+    counts = counts[counts > 0].sort_index()
+    values = counts.index.to_numpy(dtype="float64")
+    cum = counts.to_numpy().cumsum()
+    pos = q / 100.0 * (cum[-1] - 1)
+    lo, hi = int(np.floor(pos)), int(np.ceil(pos))
+    v_lo = values[np.searchsorted(cum, lo, side="right")]
+    v_hi = values[np.searchsorted(cum, hi, side="right")]
+    return float(v_lo + (v_hi - v_lo) * (pos - lo))
+
+
+class TimeWindowAgg:
+    def __init__(self):
+        self.lo = None
+        self.hi = None
+
+    def update(self, df: pd.DataFrame):
+        if "timestamp_ms" not in df.columns:
+            return self
+        ts = pd.to_numeric(df["timestamp_ms"], errors="coerce").dropna()
+        if not ts.empty:
+            self._span(int(ts.min()), int(ts.max()))
+        return self
+
+    def _span(self, lo, hi):
+        self.lo = lo if self.lo is None else min(self.lo, lo)
+        self.hi = hi if self.hi is None else max(self.hi, hi)
+
+    def merge(self, other: "TimeWindowAgg"):
+        if other.lo is not None:
+            self._span(other.lo, other.hi)
+        return self
+
+    def result(self) -> TimeWindow:
+        if self.lo is None:
+            return TimeWindow(0, 0, 0.0)
+        return TimeWindow(self.lo, self.hi, max(0.0, (self.hi - self.lo) / 1000.0))
+
+
+class FrameSizeAgg:
+    """frame_size_stats from a histogram of frame lengths (exact percentiles)."""
+
+    def __init__(self):
+        self.counts = None
+
+    def update(self, df: pd.DataFrame):
+        if "frame_len" not in df.columns:
+            return self
+        arr = pd.to_numeric(df["frame_len"], errors="coerce").dropna().astype("int64")
+        if not arr.empty:
+            self.counts = _add_counts(self.counts, arr.value_counts())
+        return self
+
+    def merge(self, other: "FrameSizeAgg"):
+        if other.counts is not None:
+            self.counts = _add_counts(self.counts, other.counts)
+        return self
+
+    def result(self) -> Dict[str, float]:
+        if self.counts is None or self.counts.sum() == 0:
+            return {"min": 0, "p50": 0.0, "p95": 0.0, "p99": 0.0, "max": 0, "count": 0, "bytes_total": 0}
+        c = self.counts[self.counts > 0]
+        return {
+            "min": int(c.index.min()),
+            "p50": _percentile_from_counts(c, 50),
+            "p95": _percentile_from_counts(c, 95),
+            "p99": _percentile_from_counts(c, 99),
+            "max": int(c.index.max()),
+            "count": int(c.sum()),
+            "bytes_total": int((c.index.to_numpy(dtype="int64") * c.to_numpy(dtype="int64")).sum()),
+        }
+
+
+class InterarrivalAgg:
+    """interarrival_stats over chunks given in timestamp order."""
+
+    def __init__(self):
+        self.counts = None
+        self.first = None
+        self.last = None
+
+    def update(self, df: pd.DataFrame):
+        if "timestamp_ms" not in df.columns:
+            return self
+        ts = pd.to_numeric(df["timestamp_ms"], errors="coerce").dropna().sort_values()
+        if ts.empty:
+            return self
+        diffs = ts.diff().dropna()
+        if self.last is not None:
+            diffs = pd.concat([pd.Series([float(ts.iloc[0] - self.last)]), diffs])
+        if not diffs.empty:
+            self.counts = _add_counts(self.counts, diffs.value_counts())
+        if self.first is None:
+            self.first = ts.iloc[0]
+        self.last = ts.iloc[-1]
+        return self
+
+    def merge(self, other: "InterarrivalAgg"):
+        if other.first is None:
+            return self
+        if self.last is not None:
+            self.counts = _add_counts(self.counts, pd.Series({float(other.first - self.last): 1}))
+        if other.counts is not None:
+            self.counts = _add_counts(self.counts, other.counts)
+        if self.first is None:
+            self.first = other.first
+        self.last = other.last
+        return self
+
+    def result(self) -> Dict[str, float]:
+        if self.counts is None or self.counts.sum() == 0:
+            return {"mean_ms": 0.0, "p50_ms": 0.0, "p95_ms": 0.0}
+        c = self.counts[self.counts > 0]
+        return {
+            "mean_ms": float((c.index.to_numpy(dtype="float64") * c.to_numpy()).sum() / c.sum()),
+            "p50_ms": _percentile_from_counts(c, 50),
+            "p95_ms": _percentile_from_counts(c, 95),
+        }
+
+
+class TrafficAgg:
+    """traffic_matrix per chunk, pair tables summed across chunks."""
+
+    HOW = {"frames": "sum", "bytes": "sum"}
+
+    def __init__(self):
+        self.pairs = None  # src_mac, dst_mac, frames, bytes
+        self.has_len = False
+
+    def update(self, df: pd.DataFrame):
+        if "src_mac" not in df.columns:
+            return self
+        self.has_len = self.has_len or _first_present(
+            df, ["frame_len", "contentLength", "content_length", "len", "length"]) is not None
+        self.pairs = _regroup([self.pairs, traffic_matrix(df).pairs], ["src_mac", "dst_mac"], self.HOW)
+        return self
+
+    def merge(self, other: "TrafficAgg"):
+        self.pairs = _regroup([self.pairs, other.pairs], ["src_mac", "dst_mac"], self.HOW)
+        self.has_len = self.has_len or other.has_len
+        return self
+
+    def result(self) -> TrafficMatrix:
+        if self.pairs is None:
+            return TrafficMatrix(pd.DataFrame({"src_mac": pd.Series(dtype=object), "dst_mac": pd.Series(dtype=object),
+                                               "frames": pd.Series(dtype="int64"), "bytes": pd.Series(dtype="float64")}))
+        pairs = self.pairs.copy()
+        if not self.has_len:
+            pairs["bytes"] = np.nan
+        return TrafficMatrix(pairs)
+
+
+class RtsCtsAgg:
+    """Keeps only the RTS/CTS rows (a small fraction) for rts_cts_stats."""
+
+    COLS = ["timestamp_ms", "src_mac", "dst_mac", "frame_type", "subtype"]
+
+    def __init__(self):
+        self.rows = []
+
+    def update(self, df: pd.DataFrame):
+        if not set(self.COLS).issubset(df.columns):
+            return self
+        ctrl = df[(df["frame_type"] == "ctrl").fillna(False).to_numpy(dtype=bool)]
+        ctrl = ctrl[_is_value(ctrl["subtype"], "rts") | _is_value(ctrl["subtype"], "cts")]
+        if not ctrl.empty:
+            self.rows.append(ctrl[self.COLS].apply(_plain))
+        return self
+
+    def merge(self, other: "RtsCtsAgg"):
+        self.rows += other.rows
+        return self
+
+    def result(self) -> Dict[str, float]:
+        if not self.rows:
+            return {"rts_count": 0, "cts_count": 0, "match_rate": 0.0}
+        return rts_cts_stats(pd.concat(self.rows, ignore_index=True))
+
+
+class MacSummaryAgg:
+    """mac_summary_enhanced from per-MAC sums/extremes and per-MAC value counts."""
+
+    MODES = ("ssid", "encType", "authMode")
+    HOW = {"frames": "sum", "first_seen": "min", "last_seen": "max", "min_rssi": "min",
+           "max_rssi": "max", "rssi_sum": "sum", "rssi_n": "sum", "len_sum": "sum", "len_n": "sum"}
+
+    def __init__(self):
+        self.base = None
+        self.modes = {k: None for k in self.MODES}
+        self.has_len = False
+
+    def update(self, df: pd.DataFrame):
+        mac_col = _first_present(df, ["src_mac", "srcMac", "bssid", "mac", "dst_mac", "dstMac"])
+        mac = _plain(df[mac_col]) if mac_col else pd.Series("(unknown)", index=df.index)
+
+        if "timestamp_ms" in df.columns:
+            ts = pd.to_datetime(df["timestamp_ms"], unit="ms", errors="coerce")
+        else:
+            tcol = _first_present(df, ["time", "timestamp"])
+            ts = pd.to_datetime(df[tcol], errors="coerce") if tcol else pd.Series(pd.NaT, index=df.index)
+        rssi_col = _first_present(df, ["strength", "rssi"])
+        rssi = (pd.to_numeric(df[rssi_col], errors="coerce").astype("float64") if rssi_col
+                else pd.Series(np.nan, index=df.index))
+        len_col = _first_present(df, ["contentLength", "content_length", "len", "length"])
+        self.has_len = self.has_len or len_col is not None
+        ln = (pd.to_numeric(df[len_col], errors="coerce").astype("float64") if len_col
+              else pd.Series(np.nan, index=df.index))
+
+        g = pd.DataFrame({"mac": mac, "ts": ts, "rssi": rssi, "len": ln})
+        base = g.groupby("mac", dropna=False).agg(
+            frames=("mac", "size"),
+            first_seen=("ts", "min"),
+            last_seen=("ts", "max"),
+            min_rssi=("rssi", "min"),
+            max_rssi=("rssi", "max"),
+            rssi_sum=("rssi", "sum"),
+            rssi_n=("rssi", "count"),
+            len_sum=("len", "sum"),
+            len_n=("len", "count"),
+        ).reset_index()
+        self.base = _regroup([self.base, base], ["mac"], self.HOW)
+
+        for name, candidates in (("ssid", ["SSID", "ssid"]), ("encType", ["encType", "enc_type"]),
+                                 ("authMode", ["authMode", "auth_mode"])):
+            col = _first_present(df, candidates)
+            if col is None:
+                continue
+            v = pd.DataFrame({"mac": mac, "value": _plain(df[col])})
+            v = v[v["value"].notna()]
+            part = v.groupby(["mac", "value"], dropna=False).size().reset_index(name="n")
+            self.modes[name] = _regroup([self.modes[name], part], ["mac", "value"], {"n": "sum"})
+        return self
+
+    def merge(self, other: "MacSummaryAgg"):
+        self.base = _regroup([self.base, other.base], ["mac"], self.HOW)
+        for name in self.MODES:
+            self.modes[name] = _regroup([self.modes[name], other.modes[name]], ["mac", "value"], {"n": "sum"})
+        self.has_len = self.has_len or other.has_len
+        return self
+
+    def result(self) -> pd.DataFrame:
+        cols = ["bssid", "frames", "first_seen", "last_seen", "min_rssi", "avg_rssi", "max_rssi",
+                "ssid", "encType", "authMode", "avg_len"]
+        if self.base is None:
+            return pd.DataFrame(columns=cols)
+        out = self.base.copy()
+        out["avg_rssi"] = (out["rssi_sum"] / out["rssi_n"].where(out["rssi_n"] > 0)).round(1)
+        for name in self.MODES:
+            counts = self.modes[name]
+            if counts is None or counts.empty:
+                out[name] = ""
+                continue
+            # Most frequent value; ties go to the smallest, like Series.mode()
+            top = (counts.sort_values(["n", "value"], ascending=[False, True])
+                   .drop_duplicates("mac")[["mac", "value"]]
+                   .rename(columns={"value": name}))
+            out = out.merge(top, on="mac", how="left")
+            out[name] = out[name].map(lambda x: "" if pd.isna(x) else str(x))
+        out["avg_len"] = ((out["len_sum"] / out["len_n"].where(out["len_n"] > 0)).round(0)
+                          if self.has_len else pd.NA)
+        out = out.rename(columns={"mac": "bssid"})[cols]
+        return out.sort_values(["frames", "bssid"], ascending=[False, True])
+
+
+class PerFrameAgg:
+    """per_frame_view(limit) of everything seen, keeping only the last rows."""
+
+    def __init__(self, limit: int = 25):
+        self.limit = limit
+        self.tail = None
+
+    def update(self, df: pd.DataFrame):
+        view = per_frame_view(df, limit=self.limit).apply(_plain)
+        return self._keep(view)
+
+    def merge(self, other: "PerFrameAgg"):
+        return self._keep(other.tail) if other.tail is not None else self
+
+    def _keep(self, view):
+        both = view if self.tail is None else pd.concat([self.tail, view], ignore_index=True)
+        self.tail = per_frame_view(both, limit=self.limit)
+        return self
+
+    def result(self) -> pd.DataFrame:
+        return self.tail if self.tail is not None else pd.DataFrame()
+
+
+class FramesPerMinuteAgg:
+    """Frame counts per minute (frames-over-time chart)."""
+
+    def __init__(self, ts_col: str = "timestamp_ms"):
+        self.ts_col = ts_col
+        self.counts = None
+
+    def update(self, df: pd.DataFrame):
+        if self.ts_col not in df.columns:
+            return self
+        ts = df[self.ts_col]
+        ts = (pd.to_datetime(ts, unit="ms", errors="coerce") if self.ts_col == "timestamp_ms"
+              else pd.to_datetime(ts, errors="coerce"))
+        per_min = ts.dropna().dt.floor("min").value_counts()
+        if not per_min.empty:
+            self.counts = _add_counts(self.counts, per_min)
+        return self
+
+    def merge(self, other: "FramesPerMinuteAgg"):
+        if other.counts is not None:
+            self.counts = _add_counts(self.counts, other.counts)
+        return self
+
+    def result(self) -> pd.Series:
+        return self.counts.sort_index() if self.counts is not None else pd.Series(dtype="int64")
+
+
+class EncAuthAgg:
+    """Frame counts per (encType, authMode) (encryption x auth chart)."""
+
+    def __init__(self):
+        self.counts = None
+
+    def update(self, df: pd.DataFrame):
+        enc_col = _first_present(df, ["encType", "enc_type"])
+        auth_col = _first_present(df, ["authMode", "auth_mode"])
+        if not enc_col or not auth_col:
+            return self
+        pairs = df[[enc_col, auth_col]].astype(object).value_counts()
+        if not pairs.empty:
+            self.counts = _add_counts(self.counts, pairs)
+        return self
+
+    def merge(self, other: "EncAuthAgg"):
+        if other.counts is not None:
+            self.counts = _add_counts(self.counts, other.counts)
+        return self
+
+    def result(self) -> pd.DataFrame:
+        """Columns encType, authMode, n; empty if no chunk had both columns."""
+        if self.counts is None:
+            return pd.DataFrame(columns=["encType", "authMode", "n"])
+        out = self.counts.sort_index().astype("int64").rename("n").reset_index()
+        out.columns = ["encType", "authMode", "n"]
+        return out
+
+
+class ChunkedAnalysis:
+    """
+    Every aggregate the DB report uses, fed chunk by chunk:
+
+        ca = ChunkedAnalysis()
+        for chunk in iter_ingest_analysis_chunks(conn, pid):
+            ca.update(chunk)
+        ca.mac_summary.result(), ca.frame_size.result(), ca.traffic.result().talkers(), ...
+    """
+
+    def __init__(self, per_frame_limit: int = 25):
+        self.frames = 0
+        self.time_window = TimeWindowAgg()
+        self.frame_size = FrameSizeAgg()
+        self.interarrival = InterarrivalAgg()
+        self.traffic = TrafficAgg()
+        self.rts_cts = RtsCtsAgg()
+        self.mac_summary = MacSummaryAgg()
+        self.per_frame = PerFrameAgg(per_frame_limit)
+        self.per_minute = FramesPerMinuteAgg()
+        self.enc_auth = EncAuthAgg()
+
+    def _aggs(self):
+        return [self.time_window, self.frame_size, self.interarrival, self.traffic,
+                self.rts_cts, self.mac_summary, self.per_frame, self.per_minute,
+                self.enc_auth]
+
+    def update(self, df: pd.DataFrame):
+        if df.empty:
+            return self
+        self.frames += len(df)
+        for agg in self._aggs():
+            agg.update(df)
+        return self
+
+    def merge(self, other: "ChunkedAnalysis"):
+        self.frames += other.frames
+        for a, b in zip(self._aggs(), other._aggs()):
+            a.merge(b)
+        return self
+
+
+def analyze_chunks(chunks, per_frame_limit: int = 25) -> ChunkedAnalysis:
+    """Feed an iterable of DataFrames (in timestamp order) through ChunkedAnalysis."""
+    ca = ChunkedAnalysis(per_frame_limit)
+    for chunk in chunks:
+        ca.update(chunk)
+    return ca
@@ -0,0 +1,248 @@
+# tools/bench_analysis.py
+"""
+Time report/wifi_analysis sections on synthetic DB-shaped frames (the
+df_schema dtypes db_adapter produces), against the implementation each one
+replaced, and check both give the same result.
+
+    python tools/bench_analysis.py                     # 1M and 10M rows
+    python tools/bench_analysis.py --rows 1000000 --macs 20000
+"""
+from datetime import datetime
+import sys, os
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from report import wifi_analysis as wa
+from report.df_schema import ENC_TYPES, AUTH_MODES
+
+
+def synthetic_frame(rows, macs, ssids, ctrl=0.3, seed=404):
+    """
+    rows frames over an hour from macs MACs; each MAC mostly sticks to one SSID.
+    A ctrl fraction of the rows are RTS/CTS control frames: an RTS A>B is
+    usually followed by the CTS B>A in the next row. The rest are data frames
+    between a client and its AP (MAC i is the AP of SSID i), half of them
+    downlink.
+    """
+    rng = np.random.default_rng(seed)
+    mac_names = [f"02:00:{i >> 24 & 255:02x}:{i >> 16 & 255:02x}:{i >> 8 & 255:02x}:{i & 255:02x}"
+                 for i in range(macs)]
+    ssid_names = [f"bench-{i}" for i in range(ssids)]
+    src = rng.integers(0, macs, rows)
+    ssid = np.where(rng.random(rows) < 0.9, src % ssids, rng.integers(0, ssids, rows))
+    ssid[rng.random(rows) < 0.05] = -1  # hidden
+    start = int(datetime(2025, 1, 1).timestamp() * 1000)
+
+    dst = rng.integers(-1, macs, rows)
+    frame_type = np.zeros(rows, dtype="int8")         # data
+    subtype = np.zeros(rows, dtype="int8")            # qos_data
+    rts = np.flatnonzero(rng.random(rows // 2) < ctrl) * 2
+    rts = rts[rts + 1 < rows]
+    cts = rts + 1
+    dst[rts] = (src[rts] + 1 + rng.integers(0, macs - 1, len(rts))) % macs
+    frame_type[rts] = frame_type[cts] = 1             # ctrl
+    subtype[rts] = 1                                  # rts
+    answered = rng.random(len(cts)) < 0.9
+    subtype[cts] = np.where(answered, 2, 3)           # cts, or an ack
+    src[cts[answered]], dst[cts[answered]] = dst[rts[answered]], src[rts[answered]]
+
+    data = frame_type == 0
+    bssid = np.where(data, src % ssids, -1)
+    down = data & (rng.random(rows) < 0.5)
+    dst[down], src[down] = src[down], bssid[down]
+    up = data & ~down
+    dst[up] = bssid[up]
+
+    return pd.DataFrame({
+        "ID": np.arange(1, rows + 1),
+        "src_mac": pd.Categorical.from_codes(src, mac_names),
+        "dst_mac": pd.Categorical.from_codes(dst, mac_names),
+        "ssid": pd.Categorical.from_codes(ssid, ssid_names),
+        "enc_type": pd.Categorical.from_codes(rng.integers(0, 4, rows), dtype=ENC_TYPES),
+        "auth_mode": pd.Categorical.from_codes(rng.integers(0, 2, rows), dtype=AUTH_MODES),
+        "strength": pd.array(rng.integers(-92, -30, rows), dtype="Int16"),
+        "frame_len": pd.array(rng.integers(40, 1500, rows), dtype="Int32"),
+        "content_length": pd.array(rng.integers(40, 1500, rows), dtype="Int32"),
+        "timestamp_ms": np.sort(rng.integers(start, start + 3_600_000, rows)),
+        "bssid": pd.Categorical.from_codes(bssid, mac_names),
+        "frame_type": pd.Categorical.from_codes(frame_type, ["data", "ctrl"]),
+        "subtype": pd.Categorical.from_codes(subtype, ["qos_data", "rts", "cts", "ack"]),
+    })
+
+
+# ---------- implementations before the rewrite ----------
+def _top_mode_old(s):
+    s = s.dropna()
+    if s.empty:
+        return ""
+    try:
+        return str(s.mode().iloc[0])
+    except Exception:
+        vc = s.value_counts()
+        return str(vc.index[0]) if len(vc) else ""
+
+
+def mac_summary_old(df):
+    """The pre-single-pass mac_summary_enhanced: a frame copy, a base groupby, then four more groupbys."""
+    first = wa._first_present
+    mac_col = first(df, ["src_mac", "srcMac", "bssid", "mac", "dst_mac", "dstMac"])
+    tmp = df.copy()
+    ts = pd.to_datetime(tmp["timestamp_ms"], unit="ms", errors="coerce")
+    rssi = pd.to_numeric(tmp[first(tmp, ["strength", "rssi"])], errors="coerce")
+    g = pd.DataFrame({"mac": tmp[mac_col], "ts": ts, "rssi": rssi})
+    g["ssid"] = tmp[first(tmp, ["SSID", "ssid"])]
+    g["encType"] = tmp[first(tmp, ["encType", "enc_type"])]
+    g["authMode"] = tmp[first(tmp, ["authMode", "auth_mode"])]
+    g["contentLength"] = pd.to_numeric(tmp[first(tmp, ["contentLength", "content_length"])], errors="coerce")
+    base = g.groupby("mac", dropna=False, observed=True).agg(
+        frames=("mac", "size"), first_seen=("ts", "min"), last_seen=("ts", "max"),
+        min_rssi=("rssi", "min"), avg_rssi=("rssi", "mean"), max_rssi=("rssi", "max"),
+    )
+    base["ssid"] = g.groupby("mac", observed=True)["ssid"].agg(_top_mode_old)
+    base["encType"] = g.groupby("mac", observed=True)["encType"].agg(_top_mode_old)
+    base["authMode"] = g.groupby("mac", observed=True)["authMode"].agg(_top_mode_old)
+    base["avg_len"] = g.groupby("mac", observed=True)["contentLength"].mean().round(0)
+    out = base.reset_index().rename(columns={"mac": "bssid"})
+    out["avg_rssi"] = out["avg_rssi"].round(1)
+    return out.sort_values(["frames", "bssid"], ascending=[False, True])
+
+
+def rts_cts_old(df):
+    """The pre-merge_asof rts_cts_stats: an iterrows() loop with a .loc lookup per RTS."""
+    sub = df["subtype"].astype(str).str.lower()
+    rts = df[(df["frame_type"] == "ctrl") & (sub == "rts")]
+    cts = df[(df["frame_type"] == "ctrl") & (sub == "cts")]
+    stats = {"rts_count": int(len(rts)), "cts_count": int(len(cts)), "match_rate": 0.0}
+    if rts.empty or cts.empty:
+        return stats
+    rts_tmp = rts[["timestamp_ms", "src_mac", "dst_mac"]].copy()
+    cts_tmp = cts[["timestamp_ms", "src_mac", "dst_mac"]].copy()
+    cts_tmp["key_rev"] = cts_tmp["src_mac"].astype(str) + ">" + cts_tmp["dst_mac"].astype(str)
+    cts_idx = cts_tmp.set_index("key_rev")
+    matches = 0
+    for _, row in rts_tmp.iterrows():
+        key_rev = f"{row['dst_mac']}>{row['src_mac']}"
+        if key_rev in cts_idx.index:
+            sel = cts_idx.loc[[key_rev]] if isinstance(cts_idx.loc[key_rev], pd.DataFrame) else pd.DataFrame([cts_idx.loc[key_rev]])
+            dt_min = (pd.to_numeric(sel["timestamp_ms"], errors="coerce") - pd.to_numeric(row["timestamp_ms"], errors="coerce")).abs().min()
+            if pd.notna(dt_min) and dt_min <= 5:
+                matches += 1
+    stats["match_rate"] = round(matches / len(rts_tmp), 3)
+    return stats
+
+
+def bench_aps(df):
+    """What infer_aps finds from the beacons: one AP per SSID."""
+    ssids = list(df["ssid"].cat.categories)
+    return pd.DataFrame({"ap_bssid": df["src_mac"].cat.categories[:len(ssids)],
+                         "ssid": ssids, "channel": [1 + i % 11 for i in range(len(ssids))]})
+
+
+def ap_links_old(df):
+    """The pre-vectorized ap_client_links: iterrows() over every data frame, then value_counts."""
+    aps_df = bench_aps(df)
+    ap_set = set(aps_df["ap_bssid"].tolist())
+    data = df[df.get("frame_type", "") == "data"].copy()
+    data = data[data["bssid"].isin(ap_set)]
+    rows = []
+    for _, r in data.iterrows():
+        ap = r["bssid"]
+        if r.get("src_mac") is not None and r["src_mac"] != ap:
+            rows.append((ap, r["src_mac"]))
+        if r.get("dst_mac") is not None and r["dst_mac"] != ap:
+            rows.append((ap, r["dst_mac"]))
+    pairs = pd.DataFrame(rows, columns=["ap_bssid", "client_mac"]).value_counts().reset_index(name="frames")
+    out = pairs.merge(aps_df[["ap_bssid", "ssid", "channel"]], on="ap_bssid", how="left")
+    return out.sort_values(["frames", "ap_bssid", "client_mac"], ascending=[False, True, True])
+
+
+def ap_links_new(df):
+    out = wa.ap_client_links(df, bench_aps(df))
+    return out[["ap_bssid", "client_mac", "frames", "ssid", "channel"]]
+
+
+def traffic_old(df):
+    """The pre-traffic_matrix talkers (two groupbys) + mac_pairs (a third); per-MAC totals for comparison."""
+    frames = df.groupby("src_mac", dropna=False, observed=True).size().reset_index(name="frames")
+    nbytes = df.groupby("src_mac", dropna=False, observed=True)["frame_len"].sum().reset_index(name="bytes")
+    df.groupby(["src_mac", "dst_mac"], dropna=False, observed=True).size().reset_index(name="frames") \
+        .sort_values("frames", ascending=False).head(10)
+    out = frames.merge(nbytes, on="src_mac")
+    return out.astype({"src_mac": object}).sort_values("src_mac", ignore_index=True)
+
+
+def traffic_new(df):
+    tm = wa.traffic_matrix(df)
+    tm.top_pairs(10)
+    out = tm.per_mac.astype({"bytes": "int64"})
+    return out.sort_values("src_mac", ignore_index=True)
+
+
+def _same(a, b):
+    if isinstance(a, dict):
+        return all(a[k] == b[k] for k in b)   # the old versions return fewer keys
+    a = a.reset_index(drop=True).astype(str)
+    b = b.reset_index(drop=True).astype(str)
+    return list(a.columns) == list(b.columns) and a.equals(b)
+
+
+# name -> (new, old, largest frame the old version is run on)
+SECTIONS = {
+    "mac_summary": (wa.mac_summary_enhanced, mac_summary_old, None),
+    "rts_cts": (wa.rts_cts_stats, rts_cts_old, 20_000),
+    "ap_client_links": (ap_links_new, ap_links_old, 200_000),
+    "traffic": (traffic_new, traffic_old, None),
+}
+
+
+def timed(fn, df, repeat):
+    best, out = None, None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        out = fn(df)
+        dt = time.perf_counter() - t0
+        best = dt if best is None else min(best, dt)
+    return best, out
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmark wifi_analysis sections against their old versions.")
+    ap.add_argument("--rows", type=int, nargs="+", default=[1_000_000, 10_000_000],
+                    help="frame counts to run (default: 1M 10M)")
+    ap.add_argument("--macs", type=int, default=5000, help="distinct MACs (default: 5000)")
+    ap.add_argument("--ssids", type=int, default=50, help="distinct SSIDs (default: 50)")
+    ap.add_argument("--ctrl", type=float, default=0.3, help="fraction of RTS/CTS frames (default: 0.3)")
+    ap.add_argument("--repeat", type=int, default=3, help="runs per version, best is reported (default: 3)")
+    ap.add_argument("--only", choices=sorted(SECTIONS), nargs="+", help="sections to run (default: all)")
+    ap.add_argument("--skip-old", action="store_true", help="only time the current implementation")
+    args = ap.parse_args()
+
+    failed = False
+    for rows in args.rows:
+        t0 = time.perf_counter()
+        df = synthetic_frame(rows, args.macs, args.ssids, args.ctrl)
+        print(f"{rows:,} rows, {args.macs} MACs, {args.ssids} SSIDs, "
+              f"{int((df['frame_type'] == 'ctrl').sum()):,} control frames "
+              f"(built in {time.perf_counter() - t0:.1f}s)")
+        for name in args.only or SECTIONS:
+            new, old, old_max = SECTIONS[name]
+            new_s, new_out = timed(new, df, args.repeat)
+            line = f"  {name:<16} new {new_s * 1000:9.1f} ms"
+            if old_max is not None and rows > old_max and not args.skip_old:
+                line += f"   old skipped above {old_max:,} rows"
+            elif not args.skip_old:
+                old_s, old_out = timed(old, df, args.repeat)
+                same = _same(new_out, old_out)
+                failed = failed or not same
+                line += (f"   old {old_s * 1000:9.1f} ms   {old_s / new_s:5.1f}x   "
+                         f"{'same result' if same else 'RESULTS DIFFER'}")
+            print(line)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+# tools/check_bulk_rows.py
+"""
+Check ingest_client's bulk-row conversion without a database: a DataFrame
+in the df_schema dtypes (nullable Int16/UInt16/Int32, categoricals,
+datetime64) with a missing value in every column must come out as plain
+Python values with None for the missing ones, and as \\N in a LOAD DATA
+file.
+
+    python3 tools/check_bulk_rows.py
+"""
+from datetime import datetime
+import sys, os
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+import numpy as np
+import pandas as pd
+
+from client.ingest_client import _EXTERNAL_FIELDS, _INTERNAL_FIELDS, _bulk_rows, _tsv
+from report.df_schema import ENC_TYPES
+
+def internal_frame():
+    return pd.DataFrame({
+        "capture_time": pd.to_datetime(["2025-01-01 10:00:00", None]),
+        "src_mac": pd.Series(["aa:bb:cc:dd:ee:01", None], dtype="category"),
+        "dst_mac": [None, "ff:ff:ff:ff:ff:ff"],
+        "ssid": pd.Series(["LabNet", np.nan], dtype="category"),
+        "enc_type": pd.Series(["WPA2", None], dtype=ENC_TYPES),
+        "auth_mode": ["PSK", pd.NA],
+        "strength": pd.array([-48, pd.NA], dtype="Int16"),
+        "content_length": pd.array([pd.NA, 1500], dtype="Int32"),
+        "type_internal": ["TCP", None],
+        "src_ip": pd.Series(["10.0.0.2", None], dtype="category"),
+        "dst_ip": [np.nan, "10.0.0.1"],
+        "src_port": pd.array([443, pd.NA], dtype="UInt16"),
+        "dst_port": pd.array([pd.NA, 53], dtype="UInt16"),
+        "sniff_type": ["internal", None],
+    })
+
+def main():
+    rows = list(_bulk_rows(internal_frame(), _INTERNAL_FIELDS))
+    expected = [
+        (datetime(2025, 1, 1, 10), "aa:bb:cc:dd:ee:01", None, "LabNet", "WPA2", "PSK",
+         -48, None, "TCP", "10.0.0.2", None, 443, None, "internal"),
+        (None, None, "ff:ff:ff:ff:ff:ff", None, None, None,
+         None, 1500, None, None, "10.0.0.1", None, 53, "internal"),   # sniff_type default
+    ]
+    failed = 0
+    for got, want in zip(rows, expected):
+        for (name, _col, _d), g, w in zip(_INTERNAL_FIELDS, got, want):
+            if g != w or type(g) is not type(w):
+                failed += 1
+                print(f"[!] {name}: got {g!r} ({type(g).__name__}), want {w!r}")
+    line = "\t".join(_tsv(v) for v in rows[1])
+    if line.split("\t")[:3] != ["\\N", "\\N", "ff:ff:ff:ff:ff:ff"]:
+        failed += 1
+        print(f"[!] LOAD DATA line: {line!r}")
+
+    # dicts and tuples carrying pandas missing values as well
+    ext = list(_bulk_rows([{"src_mac": "m", "strength": pd.NA, "ssid": np.nan},
+                           (pd.NaT, "m", None, "s", None, None, np.int16(-40))],
+                          _EXTERNAL_FIELDS))
+    if ext[0][6] is not None or ext[0][3] is not None or ext[1][0] is not None \
+            or ext[1][6] != -40 or type(ext[1][6]) is not int:
+        failed += 1
+        print(f"[!] dict/tuple records: {ext}")
+
+    print(f"[{'!' if failed else '+'}] bulk row conversion: {failed} problems")
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
@@ -2,10 +2,39 @@
 from datetime import datetime, timedelta
 import sys, os
 sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+import argparse
 import random
-from client.ingest_client import create_project, insert_sniff_external, stop_project
+import time
+from client.ingest_client import create_project, insert_sniff_external_many, stop_project
+
+def demo_rows(now, macs, ssids, rows=None):
+    """~1000 random external rows (10-20 per MAC), or exactly `rows` if given."""
+    if rows is None:
+        per_mac = [(m, random.randint(10, 20)) for m in macs]
+    else:
+        per_mac = [(m, rows // len(macs) + (i < rows % len(macs))) for i, m in enumerate(macs)]
+    for m, n in per_mac:
+        for _ in range(n):
+            ts = now + timedelta(seconds=random.randint(0, 300))
+            yield {
+                "capture_time": ts.strftime("%Y-%m-%d %H:%M:%S"),
+                "src_mac": m,
+                "dst_mac": None,
+                "ssid": random.choice(ssids),
+                "enc_type": random.choice(["WPA2","WPA3","Public"]),
+                "auth_mode": random.choice(["PSK","Enterprise"]),
+                "strength": random.randint(-92, -35),
+                "content_length": random.randint(40, 1500),
+                "type_external": random.choice(["Beacon","Probe","Broadcast","DataFrame"]),
+            }
 
 def main():
+    ap = argparse.ArgumentParser(description="Seed a demo sniff_external project.")
+    ap.add_argument("--rows", type=int, help="number of rows (default: ~1000)")
+    ap.add_argument("--load", action="store_true",
+                    help="use LOAD DATA LOCAL INFILE instead of multi-row INSERTs")
+    args = ap.parse_args()
+
     now = datetime.now()
     pid = create_project(now.strftime("%Y-%m-%d %H:%M:%S"), "sniff_external")
     print(f"ProjectID: {pid}")
@@ -13,23 +42,11 @@ def main():
     macs = [f"aa:bb:cc:{i:02x}:{i+1:02x}:{i+2:02x}" for i in range(10, 110, 2)]
     ssids = ["UTS-WiFi", "eduroam", "Hidden", "LabNet", "GuestNet"]
 
-    total = 0
-    for m in macs:
-        for _ in range(random.randint(10, 20)):  # ~1000 rows total
-            ts = now + timedelta(seconds=random.randint(0, 300))
-            insert_sniff_external(
-                project_id=pid,
-                capture_time=ts.strftime("%Y-%m-%d %H:%M:%S"),
-                src_mac=m,
-                dst_mac=None,
-                ssid=random.choice(ssids),
-                enc_type=random.choice(["WPA2","WPA3","Public"]),
-                auth_mode=random.choice(["PSK","Enterprise"]),
-                strength=random.randint(-92, -35),
-                content_length=random.randint(40, 1500),
-                type_external=random.choice(["Beacon","Probe","Broadcast","DataFrame"]),
-            )
-            total += 1
+    t0 = time.perf_counter()
+    first, last = insert_sniff_external_many(pid, demo_rows(now, macs, ssids, args.rows),
+                                             method="load" if args.load else "executemany")
+    total = 0 if first is None else last - first + 1
+    print(f"Inserted IDs {first}..{last} in {time.perf_counter() - t0:.2f}s")
 
     stop_project(pid, datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
     print(f"Seeded {total} rows and closed project {pid}")